@@ -1,12 +1,38 @@
 import os
 import platform
+import shlex
 import subprocess
-import shutil
+import threading
+import queue
+from collections import deque
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from PIL import Image, ImageTk
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import sys
 from datetime import datetime
+from navi import assets
+from navi.gridview import VirtualGrid
+from navi.loader import FolderLoader
+from navi.archive import inside_archive, is_archive_name, split_path
+from navi.index import shared_index
+from navi.settings import INDEX_FILESYSTEM
+from navi.search import NameFilter, Debouncer, DeepSearch, SEARCH_DELAY_MS
+from navi.dircache import DirCache
+from navi.watcher import FolderWatcher, RESYNC
+from navi.thumbnails import ThumbnailLoader, IMAGE_EXTENSIONS
+from navi import core
+from navi.policy import ADMIN
+from navi.jobpanel import JobPanel
+from navi.history import shared_history, BACK_LIMIT, FOLDER, FILE
+from navi.recentwindow import RecentWindow
+from navi.greppanel import GrepPanel
+from navi.du import shared_disk_usage
+from navi.sorting import SortColumns
+from navi.instrument import shared_recorder
+from navi.perfoverlay import PerfOverlay
+from navi.quickopen import QuickOpen
+from navi.dupes import shared_hash_cache
+from navi.dupewindow import DuplicateWindow
+from navi.treemapview import TreemapView
 
 HOME = os.path.expanduser("~")
 
@@ -19,26 +45,51 @@ SYSTEM_FOLDERS = {
     "Pictures": os.path.join(HOME, "Pictures"),
 }
 
-class FileExplorer(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("NAVI EXPLORER")
-        self.geometry("900x650")
-        self.configure(bg="#2c3e50") 
-
-        self.folder_icon = ImageTk.PhotoImage(Image.open("images/folder_icon.png").resize((48, 48)))
-        self.document_icon = ImageTk.PhotoImage(Image.open("images/file_icon.png").resize((48, 48)))
-        self.application_icon = ImageTk.PhotoImage(Image.open("images/app_icon.png").resize((48, 48)))
-        self.unknown_icon = ImageTk.PhotoImage(Image.open("images/folder_icon.png").resize((48, 48)))
+class FileExplorer(tk.Frame):
+    def __init__(self, master=None, on_logout=None):
+        # Runs inside the login window when started from front.py
+        if master is None:
+            master = tk.Tk()
+        super().__init__(master, bg="#2c3e50")
+        self.pack(fill="both", expand=True)
+        self.on_logout = on_logout
+        window = self.winfo_toplevel()
+        window.title("NAVI EXPLORER")
+        window.geometry("900x650")
+        window.configure(bg="#2c3e50") 
+
+        # Decoded and resized once per process, shared with the other views
+        self.folder_icon = assets.photo("folder_icon.png", (48, 48))
+        self.document_icon = assets.photo("file_icon.png", (48, 48))
+        self.application_icon = assets.photo("app_icon.png", (48, 48))
+        self.unknown_icon = self.folder_icon
 
         self.current_path = None
         self.all_items = []  
-        self.clipboard = None  
+        self.sort_columns = None  # SortColumns of all_items
+        self.clipboard = []  # paths
         self.current_sort = "name" 
         self.sort_reverse = False  # sort direction
 
-        self.history = [] 
-        self.recent_files = [] 
+        self.history = deque(maxlen=BACK_LIMIT)
+        self.visits = shared_history()
+        self.loader = FolderLoader(self)
+        self.name_filter = NameFilter()
+        self.deep_search = DeepSearch(self)  # walks and archive searches, off the Tk thread
+        self.dir_cache = DirCache()
+        self.listing_mtime = None
+        self.watcher = FolderWatcher(self, self.on_folder_changed)
+        self.thumbnails = ThumbnailLoader(self, lambda: self.item_grid.redraw_icons())
+        self.disk_usage = shared_disk_usage()
+        self.size_job = None  # (path, cancel event, results queue) of the folder size scan
+        self.size_poll_job = None
+
+        # Recursive name index, kept up to date in the background
+        self.policy = ADMIN  # what this view may do, checked by navi.core
+        self.perf = shared_recorder()  # phase timings, shown with F12
+        self.index = shared_index()
+        self.index.start([p for p in SYSTEM_FOLDERS.values()
+                          if os.path.isdir(p) and (INDEX_FILESYSTEM or p != SYSTEM_FOLDERS["Root"])])
 
         self.setup_ui()
 
@@ -47,10 +98,15 @@ class FileExplorer(tk.Tk):
             start_path = HOME
         self.load_folder(start_path)
 
-    def get_icon_for_file(self, filename, is_dir):
-        if is_dir:
+    def get_icon_for_file(self, entry):
+        if entry.is_dir:
             return self.folder_icon
-        ext = os.path.splitext(filename)[1].lower()
+        ext = entry.ext
+        if ext in IMAGE_EXTENSIONS:
+            # Real preview once it has been made, generic icon until then
+            thumbnail = self.thumbnails.get(entry)
+            if thumbnail is not None:
+                return thumbnail
         if ext in [".txt", ".pdf", ".doc", ".docx", ".odt"]:
             return self.document_icon
         elif ext in [".exe", ".app", ".sh", ".bat", ".webloc"]:
@@ -59,16 +115,24 @@ class FileExplorer(tk.Tk):
             return self.unknown_icon
 
     def open_Cli(self):
+        # The terminal explorer is python -m navi.tui, started next to this file
+        # so that the navi package is found, in the folder shown here
+        here = os.path.dirname(os.path.abspath(__file__))
+        command = ["-m", "navi.tui", "--role", "admin", self.current_path]
         try:
             system = platform.system()
             if system == "Windows":
-                subprocess.Popen(["wsl", "xterm", "-fa", "fixed", "-fs", "12", "-e", "cli_explorer.c"])
+                # curses is not part of Python on Windows, so run it under WSL
+                subprocess.Popen(["wsl", "xterm", "-fa", "fixed", "-fs", "12", "-e", "python3"] + command,
+                                 cwd=here)
             elif system == "Linux":
-                subprocess.Popen(["xterm", "-fa", "Monospace", "-fs", "12", "-e", "cli_explorer.c"])
+                subprocess.Popen(["xterm", "-fa", "Monospace", "-fs", "12", "-e", sys.executable] + command,
+                                 cwd=here)
             elif system == "Darwin":
+                line = " ".join(shlex.quote(arg) for arg in [sys.executable] + command)
                 script = f"""
                 tell application "Terminal"
-                    do script "cd '{os.getcwd()}' && ./explorer"
+                    do script "cd {shlex.quote(here)} && {line}"
                     activate
                 end tell
                 """
@@ -88,7 +152,56 @@ class FileExplorer(tk.Tk):
         search_entry = tk.Entry(sidebar, textvariable=self.search_var, font=("Segoe UI", 12),
                                 bg="#2c3e50", fg="white", insertbackground="white")
         search_entry.pack(pady=10, padx=10, fill="x")
-        search_entry.bind("<KeyRelease>", self.search_files)
+        # Only search once typing pauses, and only when the text really changed
+        self.search_debounce = Debouncer(self, SEARCH_DELAY_MS, self.search_files)
+        self.search_var.trace_add("write", lambda *args: self.search_debounce.trigger())
+
+        self.deep_search_var = tk.BooleanVar()
+        deep_search_check = tk.Checkbutton(
+            sidebar,
+            text="Search subfolders",
+            variable=self.deep_search_var,
+            bg="#34495e",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#34495e",
+            activeforeground="white",
+            font=("Segoe UI", 10),
+            command=self.search_files
+        )
+        deep_search_check.pack(padx=10, anchor="w")
+
+        index_btn = tk.Button(
+            sidebar,
+            text="Index This Folder",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+            command=self.index_current_folder
+        )
+        index_btn.pack(fill="x", pady=2, padx=10)
+        index_btn.bind("<Enter>", lambda e: index_btn.config(bg="#3d566e"))
+        index_btn.bind("<Leave>", lambda e: index_btn.config(bg="#4a6d8c"))
+
+        grep_btn = tk.Button(
+            sidebar,
+            text="Search in Files",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+            command=lambda: self.grep.toggle()
+        )
+        grep_btn.pack(fill="x", pady=2, padx=10)
+        grep_btn.bind("<Enter>", lambda e: grep_btn.config(bg="#3d566e"))
+        grep_btn.bind("<Leave>", lambda e: grep_btn.config(bg="#4a6d8c"))
 
         # Back button
         back_btn = tk.Button(
@@ -143,7 +256,7 @@ class FileExplorer(tk.Tk):
         # Recent files button
         recent_btn = tk.Button(
             sidebar,
-            text="Recent Files",
+            text="Recent",
             fg="black",
             bg="#5a6c7d",
             activebackground="#4a5c6d",
@@ -204,6 +317,73 @@ class FileExplorer(tk.Tk):
         create_file_btn.bind("<Enter>", lambda e: create_file_btn.config(bg="#3d566e"))
         create_file_btn.bind("<Leave>", lambda e: create_file_btn.config(bg="#4a6d8c"))
 
+        # Paste the copied file or folder into the current folder
+        paste_btn = tk.Button(
+            sidebar,
+            text="Paste Here",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=self.paste_here
+        )
+        paste_btn.pack(pady=(0, 10), padx=10, fill="x")
+        paste_btn.bind("<Enter>", lambda e: paste_btn.config(bg="#3d566e"))
+        paste_btn.bind("<Leave>", lambda e: paste_btn.config(bg="#4a6d8c"))
+
+        jobs_btn = tk.Button(
+            sidebar,
+            text="Jobs",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=lambda: self.jobs.toggle()
+        )
+        jobs_btn.pack(pady=(0, 10), padx=10, fill="x")
+        jobs_btn.bind("<Enter>", lambda e: jobs_btn.config(bg="#3d566e"))
+        jobs_btn.bind("<Leave>", lambda e: jobs_btn.config(bg="#4a6d8c"))
+
+        # Disk-space triage: duplicate files below a chosen folder
+        dupes_btn = tk.Button(
+            sidebar,
+            text="Find Duplicates",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=self.find_duplicates
+        )
+        dupes_btn.pack(pady=(0, 10), padx=10, fill="x")
+        dupes_btn.bind("<Enter>", lambda e: dupes_btn.config(bg="#3d566e"))
+        dupes_btn.bind("<Leave>", lambda e: dupes_btn.config(bg="#4a6d8c"))
+
+        # Where the space goes, as nested boxes on the item canvas
+        map_btn = tk.Button(
+            sidebar,
+            text="Disk Map",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=self.toggle_treemap
+        )
+        map_btn.pack(pady=(0, 10), padx=10, fill="x")
+        map_btn.bind("<Enter>", lambda e: map_btn.config(bg="#3d566e"))
+        map_btn.bind("<Leave>", lambda e: map_btn.config(bg="#4a6d8c"))
+
         # Command Line Interface section
         cli_label = tk.Label(sidebar, text="Command Line Interface", bg="#34495e", fg="white",
                              font=("Segoe UI", 12, "bold"))
@@ -247,16 +427,16 @@ class FileExplorer(tk.Tk):
 
         self.canvas = tk.Canvas(self.main_frame, bg="#2c3e50", highlightthickness=0)
         self.scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg="#2c3e50")
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Items are drawn on the canvas itself, only for the rows in view
+        self.item_grid = VirtualGrid(
+            self.canvas,
+            self.scrollbar,
+            self.get_icon_for_file,
+            lambda e, entry: self.show_options_menu(e, entry.path, entry.is_dir),
+            columns=4,
         )
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
@@ -273,6 +453,15 @@ class FileExplorer(tk.Tk):
         )
         self.path_label.pack(side="bottom", fill="x")
 
+        # Delete, rename and paste run as background jobs listed in this panel
+        self.jobs = JobPanel(self, before=self.main_frame)
+        self.grep = GrepPanel(self, self.main_frame, lambda: self.current_path, self.open_file)
+        self.treemap = TreemapView(self.canvas, self.jobs.submit,
+                                   lambda text: self.path_label.config(text=text))
+        self.perf_overlay = PerfOverlay(self.main_frame)
+        self.winfo_toplevel().bind("<F12>", lambda e: self.perf_overlay.toggle())
+        self.winfo_toplevel().bind("<Control-p>", lambda e: self.quick_open())
+
     def sort_files(self, sort_type):
         """Sort files based on the selected criteria"""
         if self.current_sort == sort_type:
@@ -282,109 +471,101 @@ class FileExplorer(tk.Tk):
             self.current_sort = sort_type
             self.sort_reverse = False
 
-        if not self.all_items:
+        record = self.perf.begin(self.current_path, "sort")
+        self.apply_sort()
+        self.after_idle(self.perf.finish, record)
+
+    def apply_sort(self, keep_scroll=False):
+        """Display all_items in the current sort order"""
+        sort_type = self.current_sort
+        if sort_type == "size":
+            # Folder sizes fill in as the background scan reports them
+            self.measure_folder_sizes()
+
+        # The columns are rebuilt only when the listing itself changed;
+        # orders already used are cached, so switching back is a reindex
+        with self.perf.phase("sort"):
+            if self.sort_columns is None or not self.sort_columns.matches(self.all_items):
+                self.sort_columns = SortColumns(self.all_items)
+        reverse = self.sort_reverse
+        if sort_type == "date":
+            reverse = not reverse  # Most recent first by default
+        with self.perf.phase("sort"):
+            sorted_items = self.sort_columns.sorted(sort_type, reverse)
+
+        self.name_filter.reset(sorted_items)
+        self.search_files(keep_scroll)
+
+    def measure_folder_sizes(self):
+        """Compute recursive sizes of the folders in view on a worker thread"""
+        if self.size_job is not None and self.size_job[0] == self.current_path:
             return
-
-        try:
-            if sort_type == "name":
-                sorted_items = sorted(self.all_items, 
-                                    key=lambda x: (not os.path.isdir(x[1]), x[0].lower()),
-                                    reverse=self.sort_reverse)
-            elif sort_type == "date":
-                sorted_items = sorted(self.all_items,
-                                    key=lambda x: (not os.path.isdir(x[1]), 
-                                                 os.path.getmtime(x[1]) if os.path.exists(x[1]) else 0),
-                                    reverse=not self.sort_reverse)  # Most recent first by default
-            elif sort_type == "size":
-                def get_size(path):
-                    if os.path.isdir(path):
-                        return 0  # Directories come first
-                    try:
-                        return os.path.getsize(path)
-                    except:
-                        return 0
-                
-                sorted_items = sorted(self.all_items,
-                                    key=lambda x: (not os.path.isdir(x[1]), get_size(x[1])),
-                                    reverse=self.sort_reverse)
-            elif sort_type == "type":
-                def get_extension(path):
-                    if os.path.isdir(path):
-                        return "" 
-                    return os.path.splitext(path)[1].lower()
-                
-                sorted_items = sorted(self.all_items,
-                                    key=lambda x: (not os.path.isdir(x[1]), get_extension(x[1])),
-                                    reverse=self.sort_reverse)
-            else:
-                sorted_items = self.all_items
-
-            # Clear previous content
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-
-            self.display_items(sorted_items)
-            
-        except Exception as e:
-            messagebox.showerror("Sort Error", f"Error sorting files: {e}")
-
-    def show_recent_files(self):
-        """Display recently accessed files"""
-        if not self.recent_files:
-            messagebox.showinfo("Recent Files", "No recent files to display.")
+        if split_path(self.current_path) is not None:
+            return  # an archive's index already has its folder sizes
+        self.cancel_folder_sizes()
+        path = self.current_path
+        cancel_event = threading.Event()
+        results = queue.Queue()
+        self.size_job = (path, cancel_event, results)
+
+        def run():
+            try:
+                totals = self.disk_usage.measure(
+                    path,
+                    on_progress=lambda partial: results.put(("partial", partial)),
+                    cancel_event=cancel_event,
+                )
+                self.disk_usage.save()
+            except OSError:
+                totals = None
+            results.put(("done", totals))
+
+        threading.Thread(target=run, daemon=True).start()
+        self.size_poll_job = self.after(300, self.poll_folder_sizes, self.size_job)
+
+    def poll_folder_sizes(self, job):
+        self.size_poll_job = None
+        if job is not self.size_job:
             return
-        
-        # Create a new window to show recent files
-        recent_window = tk.Toplevel(self)
-        recent_window.title("Recent Files")
-        recent_window.geometry("500x400")
-        recent_window.configure(bg="#2c3e50")
-        
-        # Create listbox for recent files
-        listbox_frame = tk.Frame(recent_window, bg="#2c3e50")
-        listbox_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        scrollbar = ttk.Scrollbar(listbox_frame)
-        scrollbar.pack(side="right", fill="y")
-        
-        listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set,
-                           bg="#34495e", fg="white", font=("Segoe UI", 10))
-        listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.config(command=listbox.yview)
-        
-
-        for file_path in reversed(self.recent_files):
-            if os.path.exists(file_path):
-                file_name = os.path.basename(file_path)
-                listbox.insert(tk.END, f"{file_name} - {file_path}")
-        
-        def open_selected_file():
-            selection = listbox.curselection()
-            if selection:
-                selected_text = listbox.get(selection[0])
-                file_path = selected_text.split(" - ", 1)[1]
-                if os.path.exists(file_path):
-                    self.open_file(file_path)
-                    recent_window.destroy()
-        
-   
-        open_btn = tk.Button(recent_window, text="Open Selected", 
-                           command=open_selected_file,
-                           bg="#4a6d8c", fg="white", font=("Segoe UI", 10, "bold"))
-        open_btn.pack(pady=5)
-        
+        latest = None
+        finished = False
+        while True:
+            try:
+                kind, totals = job[2].get_nowait()
+            except queue.Empty:
+                break
+            latest = totals or latest
+            finished = finished or kind == "done"
+        if latest:
+            for entry in self.all_items:
+                if entry.is_dir and entry.path in latest:
+                    entry.size = latest[entry.path]
+            if self.sort_columns is not None and self.sort_columns.matches(self.all_items):
+                self.sort_columns.refresh_sizes()
+            if self.current_sort == "size":
+                self.apply_sort(keep_scroll=True)
+        if not finished:
+            self.size_poll_job = self.after(300, self.poll_folder_sizes, job)
+
+    def cancel_folder_sizes(self):
+        if self.size_job is not None:
+            self.size_job[1].set()
+            self.size_job = None
+        if self.size_poll_job is not None:
+            self.after_cancel(self.size_poll_job)
+            self.size_poll_job = None
 
-        listbox.bind('<Double-1>', lambda e: open_selected_file())
+    def show_recent_files(self):
+        """Recent folders and files, most frecent first, with a box to jump to one"""
+        RecentWindow(self, self.visits, self.open_path)
 
     def add_to_recent_files(self, file_path):
-        """Add a file to the recent files list"""
-        if file_path in self.recent_files:
-            self.recent_files.remove(file_path)
-        self.recent_files.append(file_path)
-        
-       
-        if len(self.recent_files) > 20:
-            self.recent_files.pop(0)
+        """Remember an opened file across runs"""
+        self.visits.visit(file_path, FILE)
+
+    def quick_open(self):
+        """Palette that fuzzy-finds any visited or indexed path (Ctrl+P)"""
+        QuickOpen(self, self.open_path)
 
     def go_back(self):
         if self.history:
@@ -392,8 +573,28 @@ class FileExplorer(tk.Tk):
             self.load_folder(previous_path, add_history=False)
             
     def back_to_login(self):
-         subprocess.Popen([sys.executable, "front.py"])
-         self.destroy()
+        self.close()
+        if self.on_logout is not None:
+            self.on_logout()
+        else:
+            subprocess.Popen([sys.executable, "front.py"])
+            self.master.destroy()
+
+    def close(self):
+        """Stop background work and remove this view from the window"""
+        self.loader.cancel()
+        self.deep_search.cancel()
+        self.watcher.stop()
+        self.cancel_folder_sizes()
+        self.thumbnails.stop()
+        self.jobs.stop()
+        self.grep.stop()
+        self.perf_overlay.stop()
+        self.winfo_toplevel().unbind("<F12>")
+        self.winfo_toplevel().unbind("<Control-p>")
+        self.treemap.stop()
+        self.search_debounce.cancel()
+        self.destroy()
 
     def create_folder_buttons(self, parent, folder_dict, section_title):
         title_label = tk.Label(parent, text=section_title, bg="#34495e", fg="white",
@@ -418,88 +619,210 @@ class FileExplorer(tk.Tk):
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg="#34495e"))
 
     def load_folder(self, path, add_history=True):
-        if not os.path.exists(path):
+        if path != self.current_path:
+            self.close_treemap()
+        self.loader.cancel()
+        self.watcher.stop()
+        self.cancel_folder_sizes()
+        record = self.perf.begin(path, "open")
+        try:
+            mtime = self.dir_cache.mtime_of(path)
+        except OSError:
+            self.perf.finish(record)
             messagebox.showerror("Error", f"Folder does not exist:\n{path}")
             return
 
         if self.current_path and add_history and self.current_path != path:
             self.history.append(self.current_path)
+        if path != self.current_path and not inside_archive(path):
+            self.visits.visit(path, FOLDER)
 
+        reload = path == self.current_path
         self.current_path = path
         self.path_label.config(text=f"Current path: {path}")
 
-  
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        try:
-            items = os.listdir(path)
-        except PermissionError:
-            messagebox.showerror("Error", f"Permission denied:\n{path}")
+        with self.perf.phase("list"):
+            cached = self.dir_cache.get(path, mtime)
+        if cached is not None:
+            # Unchanged since it was last listed, no need to read it again
+            self.all_items = list(cached)
+            self.apply_sort(keep_scroll=reload)
+            self.watcher.watch(path, mtime, self.all_items)
+            self.after_idle(self.perf.finish, record)
             return
 
-        self.all_items = [(item, os.path.join(path, item)) for item in items]
-
-        # Apply current sorting
-        self.sort_files(self.current_sort)
-
-    def display_items(self, items):
-        columns = 4
-        for index, (item, abs_path) in enumerate(items):
-            is_dir = os.path.isdir(abs_path)
-
-            icon = self.get_icon_for_file(item, is_dir)
-
-            frame = tk.Frame(self.scrollable_frame, bg="#2c3e50", padx=10, pady=10)
-            frame.grid(row=index // columns, column=index % columns, sticky="nw")
+        # Read the folder in the background, icons appear batch by batch
+        self.listing_mtime = mtime
+        self.all_items = []
+        self.name_filter.reset(self.all_items)
+        self.name_filter.apply(self.search_var.get())
+        self.display_items([])
+        self.loader.start(path, self.on_folder_batch, self.on_folder_loaded, self.on_folder_error)
+
+    def on_folder_batch(self, entries):
+        self.all_items.extend(entries)
+        matches = self.name_filter.add(entries)
+        if self.name_filter.query and self.deep_search_var.get():
+            return
+        self.item_grid.add_items(matches)
+
+    def on_folder_loaded(self):
+        self.perf.mark("list")
+        self.dir_cache.put(self.current_path, self.listing_mtime, self.all_items)
+        # Apply current sorting once the whole folder is in
+        self.apply_sort(keep_scroll=True)
+        self.watcher.watch(self.current_path, self.listing_mtime, self.all_items)
+        self.after_idle(self.perf.finish, self.perf.current)
+
+    def on_folder_changed(self, mtime, changes):
+        """Apply changes made to the open folder by other programs"""
+        if changes is RESYNC:
+            self.load_folder(self.current_path, add_history=False)
+            return
+        self.all_items = [e for e in self.all_items if e.name not in changes]
+        self.all_items.extend(e for e in changes.values() if e is not None)
+        self.dir_cache.put(self.current_path, mtime, self.all_items)
+        self.apply_sort(keep_scroll=True)
+
+    def on_folder_error(self, error):
+        self.perf.finish(self.perf.current)
+        if isinstance(error, PermissionError):
+            messagebox.showerror("Error", f"Permission denied:\n{self.current_path}")
+        else:
+            messagebox.showerror("Error", f"Could not read folder:\n{error}")
 
-            btn = tk.Button(
-                frame,
-                image=icon,
-                bd=0,
-                bg="#2c3e50",
-                activebackground="#34495e",
-                cursor="hand2",
-            )
-            btn.image = icon 
-            btn.pack()
-            frame.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
-            btn.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
-
-            label = tk.Label(
-                frame,
-                text=item,
-                bg="#2c3e50",
-                fg="white",
-                wraplength=120,
-                justify="center",
-                font=("Segoe UI", 10),
-            )
-            label.pack()
-            label.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
+    def display_items(self, items, keep_scroll=False):
+        with self.perf.phase("render"):
+            self.item_grid.set_items(items, keep_scroll)
 
     def show_options_menu(self, event, path, is_dir):
+        selected = self.item_grid.selection()
+        if len(selected) > 1 and any(e.path == path for e in selected):
+            self.show_batch_menu(event, selected)
+            return
         menu = tk.Menu(self, tearoff=0)
         menu.add_command(label="Open", command=lambda: self.open_path(path, is_dir))
-        menu.add_command(label="Rename", command=lambda: self.rename_path(path))
-        menu.add_command(label="Copy", command=lambda: self.copy_path(path))
-        if is_dir:
-            menu.add_command(label="Delete Folder", command=lambda: self.delete_folder(path))
+        if inside_archive(path):
+            # Archives are read-only, their members can only be copied out
+            menu.add_command(label="Extract to...", command=lambda: self.extract_paths([path]))
         else:
-            menu.add_command(label="Delete File", command=lambda: self.delete_file(path))
+            menu.add_command(label="Rename", command=lambda: self.rename_path(path))
+            menu.add_command(label="Copy", command=lambda: self.copy_path(path))
+            if is_dir:
+                menu.add_command(label="Delete Folder", command=lambda: self.delete_folder(path))
+            else:
+                menu.add_command(label="Delete File", command=lambda: self.delete_file(path))
         try:
             menu.tk_popup(event.x_root, event.y_root)
         finally:
             menu.grab_release()
 
+    def show_batch_menu(self, event, entries):
+        """Menu for a multi-selection; every action runs as one job"""
+        count = len(entries)
+        menu = tk.Menu(self, tearoff=0)
+        if inside_archive(entries[0].path):
+            menu.add_command(label=f"Extract {count} items to...",
+                             command=lambda: self.extract_paths([e.path for e in entries]))
+        else:
+            menu.add_command(label=f"Copy {count} items", command=lambda: self.copy_selection(entries))
+            menu.add_command(label=f"Move {count} items to...", command=lambda: self.move_selection(entries))
+            menu.add_command(label=f"Rename {count} items...", command=lambda: self.rename_selection(entries))
+            menu.add_command(label=f"Delete {count} items", command=lambda: self.delete_selection(entries))
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    def copy_selection(self, entries):
+        self.clipboard = [e.path for e in entries]
+        messagebox.showinfo("Copied", f"Copied {len(entries)} items to clipboard")
+
+    def move_selection(self, entries):
+        dest = filedialog.askdirectory(title="Move to", initialdir=self.current_path, parent=self)
+        if not dest:
+            return
+        sources = [e.path for e in entries]
+        self.jobs.submit(
+            f"Move {len(sources)} items",
+            core.move_job(sources, dest, self.policy),
+            lambda job: self.on_job_finished(
+                job, "Could not move", lambda: self.dir_cache.moved_all(job.result)),
+        )
+
+    def rename_selection(self, entries):
+        pattern = simpledialog.askstring(
+            "Rename",
+            f"New name pattern for {len(entries)} items.\n"
+            "{name} = old name, {ext} = extension, {n} = number (e.g. {n:03})",
+            initialvalue="{name}_{n}{ext}", parent=self)
+        if not pattern:
+            return
+        try:
+            work = core.rename_job(entries, pattern, self.policy)
+        except (ValueError, IndexError, KeyError) as e:
+            messagebox.showerror("Error", f"Invalid pattern:\n{e}")
+            return
+        self.jobs.submit(
+            f"Rename {len(entries)} items",
+            work,
+            lambda job: self.on_job_finished(
+                job, "Could not rename", lambda: self.dir_cache.moved_all(job.result)),
+        )
+
+    def delete_selection(self, entries):
+        paths = [e.path for e in entries]
+        confirm = messagebox.askyesno("Delete", f"Are you sure you want to permanently delete {len(paths)} items?")
+        if confirm:
+            self.jobs.submit(
+                f"Delete {len(paths)} items",
+                core.delete_job(paths, self.policy),
+                lambda job: self.on_job_finished(
+                    job, "Could not delete", lambda: self.dir_cache.removed_all(paths)),
+            )
+
     def open_path(self, path, is_dir):
-        if is_dir:
+        if is_dir or (is_archive_name(path) and os.path.isfile(path)):
+            # A zip or tar opens as a folder
             self.load_folder(path)
+        elif inside_archive(path):
+            self.open_archive_member(path)
         else:
             self.open_file(path)
             
             self.add_to_recent_files(path)
 
+    def open_archive_member(self, path):
+        """Extract one file of an archive in the background, then open it"""
+        self.jobs.submit(
+            f"Extract {os.path.basename(path)}",
+            core.open_member_job(path, self.policy),
+            self.on_member_extracted,
+        )
+
+    def on_member_extracted(self, job):
+        if job.state == "failed":
+            messagebox.showerror("Error", f"Could not extract file:\n{job.error}")
+        elif job.state == "done":
+            self.open_file(job.result)
+
+    def extract_paths(self, paths):
+        """Copy archive members out into a chosen folder in the background"""
+        dest = filedialog.askdirectory(title="Extract to", parent=self)
+        if not dest:
+            return
+        try:
+            work = core.extract_job(paths, dest, self.policy)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not extract:\n{e}")
+            return
+        self.jobs.submit(
+            f"Extract {len(paths)} items" if len(paths) > 1 else f"Extract {os.path.basename(paths[0])}",
+            work,
+            lambda job: self.on_job_finished(
+                job, "Could not extract", lambda: self.dir_cache.added_all(job.result)),
+        )
+
     def rename_path(self, old_path):
         old_name = os.path.basename(old_path)
         new_name = simpledialog.askstring("Rename", f"Enter new name for:\n{old_name}", parent=self)
@@ -508,46 +831,153 @@ class FileExplorer(tk.Tk):
             if os.path.exists(new_path):
                 messagebox.showerror("Error", "A file or folder with that name already exists.")
                 return
-            try:
-                os.rename(old_path, new_path)
-                self.load_folder(self.current_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not rename:\n{e}")
+            self.jobs.submit(
+                f"Rename {old_name} to {new_name}",
+                lambda progress, control: core.rename(old_path, new_name, self.policy),
+                lambda job: self.on_job_finished(
+                    job, "Could not rename", lambda: self.dir_cache.renamed(old_path, new_path)),
+            )
 
     def copy_path(self, path):
-        self.clipboard = path
+        self.clipboard = [path]
         messagebox.showinfo("Copied", f"Copied to clipboard:\n{os.path.basename(path)}")
 
     def delete_folder(self, path):
         confirm = messagebox.askyesno("Delete Folder", f"Are you sure you want to permanently delete the folder?\n{path}")
         if confirm:
-            try:
-                shutil.rmtree(path)
-                self.load_folder(self.current_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not delete folder:\n{e}")
+            # Files are unlinked in parallel, deepest folders removed first
+            self.jobs.submit(
+                f"Delete {os.path.basename(path)}",
+                core.delete_job([path], self.policy),
+                lambda job: self.on_job_finished(
+                    job, "Could not delete folder", lambda: self.dir_cache.removed(path)),
+            )
 
     def delete_file(self, path):
         confirm = messagebox.askyesno("Delete File", f"Are you sure you want to permanently delete the file?\n{path}")
         if confirm:
-            try:
-                os.remove(path)
-                self.load_folder(self.current_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not delete file:\n{e}")
+            self.jobs.submit(
+                f"Delete {os.path.basename(path)}",
+                core.delete_job([path], self.policy),
+                lambda job: self.on_job_finished(
+                    job, "Could not delete file", lambda: self.dir_cache.removed(path)),
+            )
 
-    def search_files(self, event=None):
+    def search_files(self, keep_scroll=False):
         query = self.search_var.get().lower()
-        if not self.all_items:
+        # Timed on its own when typed, as a phase when part of an open or sort
+        record = self.perf.begin(self.current_path, "search")
+        self.deep_search.cancel()
+        deep = query and self.deep_search_var.get()
+        if deep and (split_path(self.current_path) is not None or not self.index.covers(self.current_path)):
+            # Archive index or a walk of the subtree, read on a worker thread
+            path = self.current_path
+            self.display_items([])
+            self.deep_search.start(
+                lambda cancel_event: core.search(path, query, self.policy, cancel_event=cancel_event),
+                lambda found: self.on_deep_search_done(found, record))
             return
+        elif deep:
+            # Whole subtree, answered by the file index
+            with self.perf.phase("filter"):
+                found = self.index.search(query, under=self.current_path)
+            self.display_items(found)
+        else:
+            with self.perf.phase("filter"):
+                matches = self.name_filter.apply(query)
+            self.display_items(matches, keep_scroll)
+        if record is not None:
+            self.after_idle(self.perf.finish, record)
+
+    def on_deep_search_done(self, found, record):
+        self.display_items(found)
+        if record is not None:
+            self.perf.finish(record)
+
+    def index_current_folder(self):
+        """Add the current folder to the file index"""
+        if not self.current_path:
+            return
+        self.index.add_root(self.current_path)
+        messagebox.showinfo("Indexing", f"Indexing in the background:\n{self.current_path}")
+
+    def paste_here(self):
+        """Copy the clipboard items into the current folder in the background"""
+        if not self.clipboard:
+            messagebox.showwarning("Paste", "Nothing has been copied yet.")
+            return
+        if not self.current_path:
+            messagebox.showwarning("Error", "No current directory selected.")
+            return
+        sources = list(self.clipboard)
+        dest = self.current_path
+        if len(sources) == 1:
+            title = f"Paste {os.path.basename(sources[0])}"
+        else:
+            title = f"Paste {len(sources)} items"
+        try:
+            work = core.copy_job(sources, dest, self.policy)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not paste:\n{e}")
+            return
+        self.jobs.submit(
+            title,
+            work,
+            lambda job: self.on_job_finished(
+                job, "Could not paste", lambda: self.dir_cache.added_all(job.result)),
+        )
 
-        filtered_items = [item for item in self.all_items if query in item[0].lower()]
+    def toggle_treemap(self):
+        """Switch the canvas between the icon grid and the disk map of the current folder"""
+        if self.treemap.active:
+            self.close_treemap()
+        elif self.current_path and split_path(self.current_path) is not None:
+            messagebox.showinfo("Disk map", "The disk map is not available inside archives.")
+        elif self.current_path:
+            self.item_grid.suspend()
+            self.treemap.show(self.current_path)
+
+    def close_treemap(self):
+        if self.treemap.active:
+            self.treemap.hide()
+            self.item_grid.resume()
+            self.path_label.config(text=f"Current path: {self.current_path}")
+
+    def find_duplicates(self):
+        """Scan a chosen folder for duplicate files as a background job"""
+        root = filedialog.askdirectory(title="Find duplicates in", initialdir=self.current_path, parent=self)
+        if not root:
+            return
+        cache = shared_hash_cache()
+        self.jobs.submit(
+            f"Find duplicates in {os.path.basename(root) or root}",
+            core.duplicates_job(root, cache, self.policy),
+            lambda job: self.show_duplicates(job, root),
+        )
 
-        # Clear previous content
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+    def show_duplicates(self, job, root):
+        if job.state == "failed":
+            messagebox.showerror("Error", f"Could not scan for duplicates:\n{job.error}")
+        elif job.state == "done" and not job.result:
+            messagebox.showinfo("Duplicates", f"No duplicate files found in:\n{root}")
+        elif job.state == "done":
+            DuplicateWindow(self, root, job.result, self.jobs.submit, self.on_duplicates_changed,
+                            self.policy)
+
+    def on_duplicates_changed(self, paths):
+        """Duplicates were deleted or replaced by hard links"""
+        self.dir_cache.removed_all([p for p in paths if not os.path.lexists(p)])
+        if self.current_path:
+            self.load_folder(self.current_path, add_history=False)
 
-        self.display_items(filtered_items)
+    def on_job_finished(self, job, error_text, update_cache):
+        """Refresh the view once a queued file operation has ended"""
+        if job.state == "failed":
+            messagebox.showerror("Error", f"{error_text}:\n{job.error}")
+        elif job.state == "done":
+            update_cache()
+        if self.current_path:
+            self.load_folder(self.current_path, add_history=False)
 
     def open_file(self, filepath):
         try:
@@ -568,15 +998,14 @@ class FileExplorer(tk.Tk):
         if not self.current_path:
             messagebox.showwarning("Error", "No current directory selected.")
             return
-        new_folder_path = os.path.join(self.current_path, folder_name)
-        if os.path.exists(new_folder_path):
-            messagebox.showwarning("Exists", f"Folder '{folder_name}' already exists.")
-            return
         try:
-            os.makedirs(new_folder_path)
+            new_folder_path = core.create_folder(self.current_path, folder_name, self.policy)
+            self.dir_cache.added(new_folder_path)
             messagebox.showinfo("Success", f"Folder '{folder_name}' created successfully in current directory.")
             self.new_folder_var.set("")
             self.load_folder(self.current_path, add_history=False)
+        except FileExistsError:
+            messagebox.showwarning("Exists", f"Folder '{folder_name}' already exists.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not create folder:\n{e}")
 
@@ -588,16 +1017,14 @@ class FileExplorer(tk.Tk):
         if not self.current_path:
             messagebox.showwarning("Error", "No current directory selected.")
             return
-        new_file_path = os.path.join(self.current_path, file_name)
-        if os.path.exists(new_file_path):
-            messagebox.showwarning("Exists", f"File '{file_name}' already exists.")
-            return
         try:
-            with open(new_file_path, 'w') as f:
-                pass
+            new_file_path = core.create_file(self.current_path, file_name, self.policy)
+            self.dir_cache.added(new_file_path)
             messagebox.showinfo("Success", f"File '{file_name}' created successfully in current directory.")
             self.new_file_var.set("")
             self.load_folder(self.current_path, add_history=False)
+        except FileExistsError:
+            messagebox.showwarning("Exists", f"File '{file_name}' already exists.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not create file:\n{e}")
 
@@ -0,0 +1 @@
+"""Benchmarks of the explorer's hot paths; run with `python -m bench.run`."""
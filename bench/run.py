@@ -0,0 +1,312 @@
+"""Benchmark listing, sorting, filtering and grid drawing on synthetic trees.
+
+    python -m bench.run [--scale 0.1] [--repeat 7] [--output bench/results.json]
+                        [--baseline bench/baseline.json] [--save-baseline]
+                        [--tk auto|real|mock]
+
+The trees from bench.treegen are built in a temporary folder. Every
+benchmark runs --repeat times and reports p50 and p95 in milliseconds.
+One extra run under tracemalloc reports peak Python memory. The results
+are written as JSON, by default to bench/results.json. With --baseline, each p50 is compared against the
+stored one, and the exit status is 1 if any is slower than --threshold
+times the baseline.
+
+The grid is drawn on a real Tk canvas when a display is available,
+starting Xvfb if needed and installed. Otherwise a recording stand-in
+canvas is used. That still times the grid's own work per frame, but not
+Tk's.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench import treegen
+from navi.dirmodel import scan_dir
+from navi.gridview import VirtualGrid
+from navi.search import NameFilter
+from navi.sorting import SortColumns, SORT_KEYS
+
+REPEAT = 7
+THRESHOLD = 1.25
+SCROLL_PAGES = 20
+QUERIES = {"flat": "file12", "deep": "f3_1", "unicode": "naïve_日本"}
+
+
+class HeadlessCanvas:
+    """Just enough of tk.Canvas for VirtualGrid, recording item state"""
+
+    def __init__(self, height=700):
+        self.height = height
+        self.top = 0.0
+        self.scroll_height = 0
+        self.items = {}
+
+    def configure(self, **options):
+        region = options.get("scrollregion")
+        if region:
+            self.scroll_height = region[3]
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def _create(self, *coords, **options):
+        item = len(self.items) + 1
+        self.items[item] = [coords, options]
+        return item
+
+    create_rectangle = create_image = create_text = _create
+
+    def coords(self, item, *coords):
+        self.items[item][0] = coords
+
+    def itemconfigure(self, item, **options):
+        self.items[item][1].update(options)
+
+    def delete(self, *items):
+        for item in items:
+            self.items.pop(item, None)
+
+    def canvasx(self, x):
+        return x
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_height(self):
+        return self.height
+
+    def yview_moveto(self, fraction):
+        self.top = fraction * self.scroll_height
+
+    def update_idletasks(self):
+        pass
+
+
+class HeadlessScrollbar:
+    def set(self, first, last):
+        pass
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * fraction // 1))
+    return ordered[int(rank) - 1]
+
+
+def measure(name, run, repeat, setup=None):
+    """Time run(setup()) repeat times, plus one run under tracemalloc"""
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        run(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+    arg = setup() if setup else None
+    tracemalloc.start()
+    run(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "peak_kb": peak // 1024,
+        "n": repeat,
+    }
+    print(f"{name:32} p50 {result['p50_ms']:10.2f} ms   p95 {result['p95_ms']:10.2f} ms   "
+          f"peak {result['peak_kb']:8} KB", flush=True)
+    return result
+
+
+def walk_entries(root):
+    """Every Entry below root, listed the way the explorer lists a folder"""
+    entries = []
+    folders = [root]
+    while folders:
+        listing = scan_dir(folders.pop())
+        entries.extend(listing)
+        folders.extend(e.path for e in listing if e.is_dir)
+    return entries
+
+
+def start_xvfb():
+    """Start Xvfb on a free display and point DISPLAY at it; returns the process or None"""
+    read_fd, write_fd = os.pipe()
+    try:
+        # Xvfb picks the display and writes its number once it accepts clients
+        xvfb = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x800x24"],
+                                pass_fds=(write_fd,),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        number = pipe.readline().strip()
+    if not number:
+        xvfb.wait()
+        return None
+    os.environ["DISPLAY"] = ":" + number
+    return xvfb
+
+
+def open_canvas(mode):
+    """(canvas, scrollbar, cleanup, kind) for drawing the grid"""
+    if mode != "mock":
+        xvfb = None
+        if not os.environ.get("DISPLAY") and shutil.which("Xvfb"):
+            xvfb = start_xvfb()
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+            root.geometry("800x700")
+            canvas = tk.Canvas(root, width=800, height=700)
+            scrollbar = tk.Scrollbar(root, command=canvas.yview)
+            canvas.pack(side="left", fill="both", expand=True)
+            scrollbar.pack(side="right", fill="y")
+            root.update()
+
+            def cleanup():
+                root.destroy()
+                if xvfb is not None:
+                    xvfb.terminate()
+            return canvas, scrollbar, cleanup, "tk"
+        except Exception as e:
+            if xvfb is not None:
+                xvfb.terminate()
+            if mode == "real":
+                raise SystemExit(f"No usable Tk display: {e}")
+    return HeadlessCanvas(), HeadlessScrollbar(), lambda: None, "mock"
+
+
+def run_benchmarks(trees, repeat, canvas, scrollbar):
+    results = {}
+    for tree, top in trees.items():
+        # The deep tree is benchmarked as a whole, the others as one folder
+        if tree == "deep":
+            list_fn = walk_entries
+        else:
+            list_fn = scan_dir
+        results[f"list:{tree}"] = measure(f"list:{tree}", lambda _: list_fn(top), repeat)
+        entries = list_fn(top)
+
+        for key in SORT_KEYS:
+            for reverse in (False, True):
+                label = f"sort:{tree}:{key}{':desc' if reverse else ''}"
+                results[label] = measure(
+                    label, lambda _: SortColumns(entries).sorted(key, reverse), repeat)
+        columns = SortColumns(entries)
+        for key in SORT_KEYS:
+            columns.order(key)
+        results[f"sort:{tree}:switch-cached"] = measure(
+            f"sort:{tree}:switch-cached",
+            lambda _: [columns.sorted(key) for key in SORT_KEYS], repeat)
+
+        ordered = columns.sorted("name")
+        query = QUERIES[tree]
+
+        def type_query(name_filter):
+            for end in range(1, len(query) + 1):
+                name_filter.apply(query[:end])
+
+        def fresh_filter():
+            name_filter = NameFilter()
+            name_filter.reset(ordered)
+            return name_filter
+
+        results[f"filter:{tree}"] = measure(f"filter:{tree}", type_query, repeat, fresh_filter)
+
+        def draw(_):
+            grid = VirtualGrid(canvas, scrollbar, lambda entry: "", lambda event, entry: None)
+            grid.set_items(ordered)
+            canvas.update_idletasks()
+            rows = (len(ordered) + grid.columns - 1) // grid.columns
+            for page in range(1, SCROLL_PAGES + 1):
+                canvas.yview_moveto(min(1.0, page * 6 / max(rows, 1)))
+                grid.refresh()
+                canvas.update_idletasks()
+            canvas.delete(*[item for slot in grid.pool for item in slot])
+
+        results[f"render:{tree}"] = measure(f"render:{tree}", draw, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each p50 against the baseline; returns the regressions"""
+    regressions = []
+    print(f"\n{'benchmark':32} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None or not old["p50_ms"]:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:32} {old['p50_ms']:10.2f} {result['p50_ms']:10.2f} {ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="size of the trees, 1.0 = 100k files in the flat folder")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results.json"))
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--tk", choices=("auto", "real", "mock"), default="auto")
+    parser.add_argument("--keep", action="store_true", help="keep the generated trees")
+    args = parser.parse_args(argv)
+
+    base = tempfile.mkdtemp(prefix="navi-bench-")
+    canvas, scrollbar, close_canvas, canvas_kind = open_canvas(args.tk)
+    try:
+        started = time.perf_counter()
+        trees = treegen.generate(base, args.scale)
+        print(f"Generated trees in {time.perf_counter() - started:.1f}s under {base}", flush=True)
+        results = run_benchmarks(trees, args.repeat, canvas, scrollbar)
+    finally:
+        close_canvas()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "canvas": canvas_kind,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            print("Warning: the baseline was recorded at a different --scale")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Synthetic folder trees for the benchmarks.
+
+Every tree is generated from a fixed random seed, so two runs with the
+same scale see the same names, sizes and mtimes. File contents are
+sparse: sizes come from truncate(), so a "large" tree costs inodes, not
+disk space.
+"""
+import os
+import random
+
+SEED = 1234
+UNICODE_PARTS = ("résumé", "naïve", "日本語", "Ελληνικά", "emoji_🙂", "Straße", "данные", "ملف")
+EXTENSIONS = (".txt", ".py", ".jpg", ".png", ".pdf", ".tar.gz", ".md", "")
+
+
+def _touch(path, size, mtime):
+    with open(path, "wb") as f:
+        if size:
+            f.truncate(size)
+    os.utime(path, (mtime, mtime))
+
+
+def _size(rng):
+    # Mostly small files with a long tail, like a real home folder
+    if rng.random() < 0.95:
+        return min(int(rng.paretovariate(1.2) * 512), 1 << 20)
+    return rng.randrange(1 << 20, 1 << 28)
+
+
+def flat(root, files=100_000, seed=SEED):
+    """One folder with many files and a few sub-folders"""
+    rng = random.Random(seed)
+    os.makedirs(root)
+    for i in range(files // 1000 + 1):
+        os.mkdir(os.path.join(root, f"folder{i}"))
+    for i in range(files):
+        name = f"file{rng.randrange(files * 10)}_{i}{rng.choice(EXTENSIONS)}"
+        _touch(os.path.join(root, name), _size(rng), 1_600_000_000 + rng.randrange(100_000_000))
+    return root
+
+
+def deep(root, depth=8, fanout=3, files_per_folder=20, seed=SEED):
+    """A balanced tree: fanout sub-folders per level, depth levels"""
+    rng = random.Random(seed)
+    level = [root]
+    os.makedirs(root)
+    for d in range(depth):
+        next_level = []
+        for folder in level:
+            for i in range(files_per_folder):
+                name = f"f{d}_{i}{rng.choice(EXTENSIONS)}"
+                _touch(os.path.join(folder, name), _size(rng), 1_600_000_000 + rng.randrange(10**8))
+            if d < depth - 1:
+                for i in range(fanout):
+                    sub = os.path.join(folder, f"d{d}_{i}")
+                    os.mkdir(sub)
+                    next_level.append(sub)
+        level = next_level
+    return root
+
+
+def unicode_names(root, files=20_000, seed=SEED):
+    """Long names mixing scripts, accents and numbers"""
+    rng = random.Random(seed)
+    os.makedirs(root)
+    for i in range(files):
+        parts = [rng.choice(UNICODE_PARTS) for _ in range(rng.randrange(3, 9))]
+        name = "_".join(parts)[:180] + f"_{i}{rng.choice(EXTENSIONS)}"
+        _touch(os.path.join(root, name), _size(rng), 1_600_000_000 + rng.randrange(10**8))
+    return root
+
+
+def generate(base, scale=1.0):
+    """Build every tree under base; returns {tree name: path of its top folder}"""
+    return {
+        "flat": flat(os.path.join(base, "flat"), files=max(100, int(100_000 * scale))),
+        "deep": deep(os.path.join(base, "deep"), depth=max(2, round(8 * min(scale, 1) ** 0.25))),
+        "unicode": unicode_names(os.path.join(base, "unicode"), files=max(100, int(20_000 * scale))),
+    }
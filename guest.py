@@ -1,10 +1,28 @@
 import os
 import platform
 import subprocess
+from collections import deque
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from PIL import Image, ImageTk
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import sys
+from navi import assets
+from navi.gridview import VirtualGrid
+from navi.loader import FolderLoader
+from navi.archive import inside_archive, is_archive_name, split_path
+from navi.index import shared_index
+from navi.search import NameFilter, Debouncer, DeepSearch, SEARCH_DELAY_MS
+from navi.dircache import DirCache
+from navi.watcher import FolderWatcher, RESYNC
+from navi.thumbnails import ThumbnailLoader, IMAGE_EXTENSIONS
+from navi import core
+from navi.policy import GUEST, Denied
+from navi.jobpanel import JobPanel
+from navi.history import shared_history, BACK_LIMIT, FOLDER, FILE
+from navi.greppanel import GrepPanel
+from navi.sorting import SortColumns
+from navi.instrument import shared_recorder
+from navi.perfoverlay import PerfOverlay
+from navi.quickopen import QuickOpen
 
 # Define home directory
 HOME = os.path.expanduser("~")
@@ -17,24 +35,46 @@ SYSTEM_FOLDERS = {
     "Pictures": os.path.join(HOME, "Pictures"),
 }
 
-class FileExplorer(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("NAVI EXPLORER")
-        self.geometry("900x600")
-        self.configure(bg="#2c3e50")  
+class FileExplorer(tk.Frame):
+    def __init__(self, master=None, on_logout=None):
+        # Runs inside the login window when started from front.py
+        if master is None:
+            master = tk.Tk()
+        super().__init__(master, bg="#2c3e50")
+        self.pack(fill="both", expand=True)
+        self.on_logout = on_logout
+        window = self.winfo_toplevel()
+        window.title("NAVI EXPLORER")
+        window.geometry("900x600")
+        window.configure(bg="#2c3e50")  
 
   
-        self.folder_icon = ImageTk.PhotoImage(Image.open("images/folder_icon.png").resize((48, 48)))
-        self.document_icon = ImageTk.PhotoImage(Image.open("images/file_icon.png").resize((48, 48)))
-        self.application_icon = ImageTk.PhotoImage(Image.open("images/app_icon.png").resize((48, 48)))
-        self.unknown_icon = ImageTk.PhotoImage(Image.open("images/folder_icon.png").resize((48, 48)))
+        # Decoded and resized once per process, shared with the other views
+        self.folder_icon = assets.photo("folder_icon.png", (48, 48))
+        self.document_icon = assets.photo("file_icon.png", (48, 48))
+        self.application_icon = assets.photo("app_icon.png", (48, 48))
+        self.unknown_icon = self.folder_icon
 
         self.current_path = None
         self.all_items = [] 
-        self.clipboard = None  
-
-        self.history = []
+        self.sort_columns = None  # SortColumns of all_items
+        self.clipboard = []  # paths
+
+        self.history = deque(maxlen=BACK_LIMIT)
+        self.visits = shared_history()
+        self.loader = FolderLoader(self)
+        self.name_filter = NameFilter()
+        self.deep_search = DeepSearch(self)  # walks and archive searches, off the Tk thread
+        self.dir_cache = DirCache()
+        self.listing_mtime = None
+        self.watcher = FolderWatcher(self, self.on_folder_changed)
+        self.thumbnails = ThumbnailLoader(self, lambda: self.item_grid.redraw_icons())
+
+        # Recursive name index, kept up to date in the background
+        self.policy = GUEST  # what this view may do, checked by navi.core
+        self.perf = shared_recorder()  # phase timings, shown with F12
+        self.index = shared_index()
+        self.index.start([p for p in SYSTEM_FOLDERS.values() if os.path.isdir(p)])
 
         self.setup_ui()
 
@@ -43,10 +83,15 @@ class FileExplorer(tk.Tk):
             start_path = HOME
         self.load_folder(start_path)
 
-    def get_icon_for_file(self, filename, is_dir):
-        if is_dir:
+    def get_icon_for_file(self, entry):
+        if entry.is_dir:
             return self.folder_icon
-        ext = os.path.splitext(filename)[1].lower()
+        ext = entry.ext
+        if ext in IMAGE_EXTENSIONS:
+            # Real preview once it has been made, generic icon until then
+            thumbnail = self.thumbnails.get(entry)
+            if thumbnail is not None:
+                return thumbnail
         if ext in [".txt", ".pdf", ".doc", ".docx", ".odt"]:
             return self.document_icon
         elif ext in [".exe", ".app", ".sh", ".bat", ".webloc"]:
@@ -66,7 +111,56 @@ class FileExplorer(tk.Tk):
         search_entry = tk.Entry(sidebar, textvariable=self.search_var, font=("Segoe UI", 12),
                                 bg="#2c3e50", fg="white", insertbackground="white")
         search_entry.pack(pady=10, padx=10, fill="x")
-        search_entry.bind("<KeyRelease>", self.search_files)
+        # Only search once typing pauses, and only when the text really changed
+        self.search_debounce = Debouncer(self, SEARCH_DELAY_MS, self.search_files)
+        self.search_var.trace_add("write", lambda *args: self.search_debounce.trigger())
+
+        self.deep_search_var = tk.BooleanVar()
+        deep_search_check = tk.Checkbutton(
+            sidebar,
+            text="Search subfolders",
+            variable=self.deep_search_var,
+            bg="#34495e",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#34495e",
+            activeforeground="white",
+            font=("Segoe UI", 10),
+            command=self.search_files
+        )
+        deep_search_check.pack(padx=10, anchor="w")
+
+        index_btn = tk.Button(
+            sidebar,
+            text="Index This Folder",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+            command=self.index_current_folder
+        )
+        index_btn.pack(fill="x", pady=2, padx=10)
+        index_btn.bind("<Enter>", lambda e: index_btn.config(bg="#3d566e"))
+        index_btn.bind("<Leave>", lambda e: index_btn.config(bg="#4a6d8c"))
+
+        grep_btn = tk.Button(
+            sidebar,
+            text="Search in Files",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+            command=lambda: self.grep.toggle()
+        )
+        grep_btn.pack(fill="x", pady=2, padx=10)
+        grep_btn.bind("<Enter>", lambda e: grep_btn.config(bg="#3d566e"))
+        grep_btn.bind("<Leave>", lambda e: grep_btn.config(bg="#4a6d8c"))
 
         # Back button
         back_btn = tk.Button(
@@ -135,6 +229,39 @@ class FileExplorer(tk.Tk):
         create_file_btn.bind("<Enter>", lambda e: create_file_btn.config(bg="#3d566e"))
         create_file_btn.bind("<Leave>", lambda e: create_file_btn.config(bg="#4a6d8c"))
 
+        # Paste the copied file or folder into the current folder
+        paste_btn = tk.Button(
+            sidebar,
+            text="Paste Here",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=self.paste_here
+        )
+        paste_btn.pack(pady=(0, 10), padx=10, fill="x")
+        paste_btn.bind("<Enter>", lambda e: paste_btn.config(bg="#3d566e"))
+        paste_btn.bind("<Leave>", lambda e: paste_btn.config(bg="#4a6d8c"))
+
+        jobs_btn = tk.Button(
+            sidebar,
+            text="Jobs",
+            fg="black",
+            bg="#4a6d8c",
+            activebackground="#3d566e",
+            activeforeground="white",
+            bd=0,
+            font=("Segoe UI", 12, "bold"),
+            cursor="hand2",
+            command=lambda: self.jobs.toggle()
+        )
+        jobs_btn.pack(pady=(0, 10), padx=10, fill="x")
+        jobs_btn.bind("<Enter>", lambda e: jobs_btn.config(bg="#3d566e"))
+        jobs_btn.bind("<Leave>", lambda e: jobs_btn.config(bg="#4a6d8c"))
+
     
         back_login_btn = tk.Button(
             sidebar,
@@ -158,16 +285,16 @@ class FileExplorer(tk.Tk):
 
         self.canvas = tk.Canvas(self.main_frame, bg="#2c3e50", highlightthickness=0)
         self.scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg="#2c3e50")
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Items are drawn on the canvas itself, only for the rows in view
+        self.item_grid = VirtualGrid(
+            self.canvas,
+            self.scrollbar,
+            self.get_icon_for_file,
+            lambda e, entry: self.show_options_menu(e, entry.path, entry.is_dir),
+            columns=4,
         )
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
@@ -183,17 +310,46 @@ class FileExplorer(tk.Tk):
             pady=5,
         )
         self.path_label.pack(side="bottom", fill="x")
+
+        # Delete, rename and paste run as background jobs listed in this panel
+        self.jobs = JobPanel(self, before=self.main_frame)
+        self.grep = GrepPanel(self, self.main_frame, lambda: self.current_path, self.open_file)
+        self.perf_overlay = PerfOverlay(self.main_frame)
+        self.winfo_toplevel().bind("<F12>", lambda e: self.perf_overlay.toggle())
+        self.winfo_toplevel().bind("<Control-p>", lambda e: self.quick_open())
         
         
 
+    def quick_open(self):
+        """Palette that fuzzy-finds any visited or indexed path (Ctrl+P)"""
+        QuickOpen(self, self.open_path)
+
     def go_back(self):
         if self.history:
             previous_path = self.history.pop()
             self.load_folder(previous_path, add_history=False)
             
     def back_to_login(self):
-         subprocess.Popen([sys.executable, "front.py"])
-         self.destroy()
+        self.close()
+        if self.on_logout is not None:
+            self.on_logout()
+        else:
+            subprocess.Popen([sys.executable, "front.py"])
+            self.master.destroy()
+
+    def close(self):
+        """Stop background work and remove this view from the window"""
+        self.loader.cancel()
+        self.deep_search.cancel()
+        self.watcher.stop()
+        self.thumbnails.stop()
+        self.jobs.stop()
+        self.grep.stop()
+        self.perf_overlay.stop()
+        self.winfo_toplevel().unbind("<F12>")
+        self.winfo_toplevel().unbind("<Control-p>")
+        self.search_debounce.cancel()
+        self.destroy()
 
 
     def create_folder_buttons(self, parent, folder_dict, section_title):
@@ -219,100 +375,236 @@ class FileExplorer(tk.Tk):
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg="#34495e"))
 
     def load_folder(self, path, add_history=True):
-        if not os.path.exists(path):
+        self.loader.cancel()
+        self.watcher.stop()
+        record = self.perf.begin(path, "open")
+        try:
+            mtime = self.dir_cache.mtime_of(path)
+        except OSError:
+            self.perf.finish(record)
             messagebox.showerror("Error", f"Folder does not exist:\n{path}")
             return
 
         if self.current_path and add_history and self.current_path != path:
             self.history.append(self.current_path)
+        if path != self.current_path and not inside_archive(path):
+            self.visits.visit(path, FOLDER)
 
+        reload = path == self.current_path
         self.current_path = path
         self.path_label.config(text=f"Current path: {path}")
 
-        # Clear previous content
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        try:
-            items = os.listdir(path)
-        except PermissionError:
-            messagebox.showerror("Error", f"Permission denied:\n{path}")
+        with self.perf.phase("list"):
+            cached = self.dir_cache.get(path, mtime)
+        if cached is not None:
+            # Unchanged since it was last listed, no need to read it again
+            self.all_items = list(cached)
+            self.apply_sort(keep_scroll=reload)
+            self.watcher.watch(path, mtime, self.all_items)
+            self.after_idle(self.perf.finish, record)
             return
 
-        items.sort(key=lambda x: (not os.path.isdir(os.path.join(path, x)), x.lower()))
-
-        self.all_items = [(item, os.path.join(path, item)) for item in items]
-
-        self.display_items(self.all_items)
-
-    def display_items(self, items):
-        columns = 4
-        for index, (item, abs_path) in enumerate(items):
-            is_dir = os.path.isdir(abs_path)
-
-            icon = self.get_icon_for_file(item, is_dir)
-
-            frame = tk.Frame(self.scrollable_frame, bg="#2c3e50", padx=10, pady=10)
-            frame.grid(row=index // columns, column=index % columns, sticky="nw")
+        # Read the folder in the background, icons appear batch by batch
+        self.listing_mtime = mtime
+        self.all_items = []
+        self.name_filter.reset(self.all_items)
+        self.name_filter.apply(self.search_var.get())
+        self.display_items([])
+        self.loader.start(path, self.on_folder_batch, self.on_folder_loaded, self.on_folder_error)
+
+    def on_folder_batch(self, entries):
+        self.all_items.extend(entries)
+        matches = self.name_filter.add(entries)
+        if self.name_filter.query and self.deep_search_var.get():
+            return
+        self.item_grid.add_items(matches)
+
+    def on_folder_loaded(self):
+        self.perf.mark("list")
+        self.dir_cache.put(self.current_path, self.listing_mtime, self.all_items)
+        self.apply_sort(keep_scroll=True)
+        self.watcher.watch(self.current_path, self.listing_mtime, self.all_items)
+        self.after_idle(self.perf.finish, self.perf.current)
+
+    def apply_sort(self, keep_scroll=False):
+        """Display all_items folders first, then by name"""
+        with self.perf.phase("sort"):
+            if self.sort_columns is None or not self.sort_columns.matches(self.all_items):
+                self.sort_columns = SortColumns(self.all_items)
+            sorted_items = self.sort_columns.sorted("name")
+        self.name_filter.reset(sorted_items)
+        self.search_files(keep_scroll)
+
+    def on_folder_changed(self, mtime, changes):
+        """Apply changes made to the open folder by other programs"""
+        if changes is RESYNC:
+            self.load_folder(self.current_path, add_history=False)
+            return
+        self.all_items = [e for e in self.all_items if e.name not in changes]
+        self.all_items.extend(e for e in changes.values() if e is not None)
+        self.dir_cache.put(self.current_path, mtime, self.all_items)
+        self.apply_sort(keep_scroll=True)
+
+    def on_folder_error(self, error):
+        self.perf.finish(self.perf.current)
+        if isinstance(error, PermissionError):
+            messagebox.showerror("Error", f"Permission denied:\n{self.current_path}")
+        else:
+            messagebox.showerror("Error", f"Could not read folder:\n{error}")
 
-            btn = tk.Button(
-                frame,
-                image=icon,
-                bd=0,
-                bg="#2c3e50",
-                activebackground="#34495e",
-                cursor="hand2",
-            )
-            btn.image = icon  
-            btn.pack()
-            frame.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
-            btn.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
-
-            label = tk.Label(
-                frame,
-                text=item,
-                bg="#2c3e50",
-                fg="white",
-                wraplength=120,
-                justify="center",
-                font=("Segoe UI", 10),
-            )
-            label.pack()
-            label.bind("<Button-1>", lambda e, p=abs_path, isd=is_dir: self.show_options_menu(e, p, isd))
+    def display_items(self, items, keep_scroll=False):
+        with self.perf.phase("render"):
+            self.item_grid.set_items(items, keep_scroll)
 
     def show_options_menu(self, event, path, is_dir):
         menu = tk.Menu(self, tearoff=0)
-        menu.add_command(label="Open", command=lambda: self.open_path(path, is_dir))
-        menu.add_command(label="Copy", command=lambda: self.copy_path(path))
+        selected = self.item_grid.selection()
+        if inside_archive(path):
+            # Archives are read-only, their members can only be copied out
+            paths = [e.path for e in selected] if any(e.path == path for e in selected) else [path]
+            if len(paths) == 1:
+                menu.add_command(label="Open", command=lambda: self.open_path(path, is_dir))
+            menu.add_command(label="Extract to..." if len(paths) == 1 else f"Extract {len(paths)} items to...",
+                             command=lambda: self.extract_paths(paths))
+        elif len(selected) > 1 and any(e.path == path for e in selected):
+            menu.add_command(label=f"Copy {len(selected)} items",
+                             command=lambda: self.copy_selection(selected))
+        else:
+            menu.add_command(label="Open", command=lambda: self.open_path(path, is_dir))
+            menu.add_command(label="Copy", command=lambda: self.copy_path(path))
         try:
             menu.tk_popup(event.x_root, event.y_root)
         finally:
             menu.grab_release()
 
     def open_path(self, path, is_dir):
-        if is_dir:
+        if is_dir or (is_archive_name(path) and os.path.isfile(path)):
+            # A zip or tar opens as a folder
             self.load_folder(path)
+        elif inside_archive(path):
+            self.open_archive_member(path)
         else:
             self.open_file(path)
+            self.visits.visit(path, FILE)
+
+    def open_archive_member(self, path):
+        """Extract one file of an archive in the background, then open it"""
+        self.jobs.submit(
+            f"Extract {os.path.basename(path)}",
+            core.open_member_job(path, self.policy),
+            self.on_member_extracted,
+        )
 
+    def on_member_extracted(self, job):
+        if job.state == "failed":
+            messagebox.showerror("Error", f"Could not extract file:\n{job.error}")
+        elif job.state == "done":
+            self.open_file(job.result)
+
+    def extract_paths(self, paths):
+        """Copy archive members out into a chosen folder in the background"""
+        dest = filedialog.askdirectory(title="Extract to", parent=self)
+        if not dest:
+            return
+        try:
+            work = core.extract_job(paths, dest, self.policy)
+        except Denied as e:
+            messagebox.showerror("Not allowed", str(e))
+            return
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not extract:\n{e}")
+            return
+        self.jobs.submit(
+            f"Extract {len(paths)} items" if len(paths) > 1 else f"Extract {os.path.basename(paths[0])}",
+            work,
+            lambda job: self.on_job_finished(
+                job, "Could not extract", lambda: self.dir_cache.added_all(job.result)),
+        )
 
     def copy_path(self, path):
-        self.clipboard = path
+        self.clipboard = [path]
         messagebox.showinfo("Copied", f"Copied to clipboard:\n{os.path.basename(path)}")
 
+    def copy_selection(self, entries):
+        self.clipboard = [e.path for e in entries]
+        messagebox.showinfo("Copied", f"Copied {len(entries)} items to clipboard")
+
 
-    def search_files(self, event=None):
+    def search_files(self, keep_scroll=False):
         query = self.search_var.get().lower()
-        if not self.all_items:
+        # Timed on its own when typed, as a phase when part of an open or sort
+        record = self.perf.begin(self.current_path, "search")
+        self.deep_search.cancel()
+        deep = query and self.deep_search_var.get()
+        if deep and (split_path(self.current_path) is not None or not self.index.covers(self.current_path)):
+            # Archive index or a walk of the subtree, read on a worker thread
+            path = self.current_path
+            self.display_items([])
+            self.deep_search.start(
+                lambda cancel_event: core.search(path, query, self.policy, cancel_event=cancel_event),
+                lambda found: self.on_deep_search_done(found, record))
             return
+        elif deep:
+            # Whole subtree, answered by the file index
+            with self.perf.phase("filter"):
+                found = self.index.search(query, under=self.current_path)
+            self.display_items(found)
+        else:
+            with self.perf.phase("filter"):
+                matches = self.name_filter.apply(query)
+            self.display_items(matches, keep_scroll)
+        if record is not None:
+            self.after_idle(self.perf.finish, record)
+
+    def on_deep_search_done(self, found, record):
+        self.display_items(found)
+        if record is not None:
+            self.perf.finish(record)
+
+    def index_current_folder(self):
+        """Add the current folder to the file index"""
+        if not self.current_path:
+            return
+        self.index.add_root(self.current_path)
+        messagebox.showinfo("Indexing", f"Indexing in the background:\n{self.current_path}")
 
-        filtered_items = [item for item in self.all_items if query in item[0].lower()]
-
-        # Clear previous content
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+    def paste_here(self):
+        """Copy the clipboard items into the current folder in the background"""
+        if not self.clipboard:
+            messagebox.showwarning("Paste", "Nothing has been copied yet.")
+            return
+        if not self.current_path:
+            messagebox.showwarning("Error", "No current directory selected.")
+            return
+        sources = list(self.clipboard)
+        dest = self.current_path
+        if len(sources) == 1:
+            title = f"Paste {os.path.basename(sources[0])}"
+        else:
+            title = f"Paste {len(sources)} items"
+        try:
+            work = core.copy_job(sources, dest, self.policy)
+        except Denied as e:
+            messagebox.showerror("Not allowed", str(e))
+            return
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not paste:\n{e}")
+            return
+        self.jobs.submit(
+            title,
+            work,
+            lambda job: self.on_job_finished(
+                job, "Could not paste", lambda: self.dir_cache.added_all(job.result)),
+        )
 
-        self.display_items(filtered_items)
+    def on_job_finished(self, job, error_text, update_cache):
+        """Refresh the view once a queued file operation has ended"""
+        if job.state == "failed":
+            messagebox.showerror("Error", f"{error_text}:\n{job.error}")
+        elif job.state == "done":
+            update_cache()
+        if self.current_path:
+            self.load_folder(self.current_path, add_history=False)
 
     def open_file(self, filepath):
         try:
@@ -333,15 +625,14 @@ class FileExplorer(tk.Tk):
         if not self.current_path:
             messagebox.showwarning("Error", "No current directory selected.")
             return
-        new_folder_path = os.path.join(self.current_path, folder_name)
-        if os.path.exists(new_folder_path):
-            messagebox.showwarning("Exists", f"Folder '{folder_name}' already exists.")
-            return
         try:
-            os.makedirs(new_folder_path)
+            new_folder_path = core.create_folder(self.current_path, folder_name, self.policy)
+            self.dir_cache.added(new_folder_path)
             messagebox.showinfo("Success", f"Folder '{folder_name}' created successfully in current directory.")
             self.new_folder_var.set("")
             self.load_folder(self.current_path, add_history=False)
+        except FileExistsError:
+            messagebox.showwarning("Exists", f"Folder '{folder_name}' already exists.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not create folder:\n{e}")
 
@@ -353,16 +644,14 @@ class FileExplorer(tk.Tk):
         if not self.current_path:
             messagebox.showwarning("Error", "No current directory selected.")
             return
-        new_file_path = os.path.join(self.current_path, file_name)
-        if os.path.exists(new_file_path):
-            messagebox.showwarning("Exists", f"File '{file_name}' already exists.")
-            return
         try:
-            with open(new_file_path, 'w') as f:
-                pass
+            new_file_path = core.create_file(self.current_path, file_name, self.policy)
+            self.dir_cache.added(new_file_path)
             messagebox.showinfo("Success", f"File '{file_name}' created successfully in current directory.")
             self.new_file_var.set("")
             self.load_folder(self.current_path, add_history=False)
+        except FileExistsError:
+            messagebox.showwarning("Exists", f"File '{file_name}' already exists.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not create file:\n{e}")
 
@@ -0,0 +1 @@
+"""Shared code used by the admin and guest explorers."""
@@ -0,0 +1,375 @@
+"""Zip and tar archives browsed as read-only folders.
+
+A path inside an archive is the archive's own path followed by the
+member's path, e.g. /logs/2024.zip/server/app.log, so the explorers'
+history, Back button and path label work unchanged. split_path tells
+where the archive part of such a path ends.
+
+Listing an archive reads only its index: the central directory at the
+end of a zip, or the member headers of a tar, seeking over the data in
+between. A compressed tar has no index and cannot be seeked, so it is
+decompressed once from start to end, keeping nothing but the headers.
+The listing of every folder in the archive is built from that one pass,
+folder sizes included, and kept in ArchiveCache until the archive's size
+or mtime changes.
+
+Members are never unpacked as a whole. extract copies one member, or
+the members below one folder, to a real folder in CHUNK pieces read
+straight from the archive stream. A member opened with another program
+is extracted to a folder of the user's own in the data folder.
+"""
+import functools
+import hashlib
+import os
+import stat
+import tarfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+from navi.copier import claim_name, create_empty, remove_path
+from navi.dirmodel import Entry
+from navi.jobs import Cancelled
+from navi.settings import data_path
+from navi.shared import process_wide
+
+ZIP_SUFFIXES = (".zip", ".jar", ".whl")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+CHUNK = 1024 * 1024
+MAX_CACHED_MEMBERS = 2_000_000  # members of all cached archive listings together
+CANCEL_CHECK = 1000             # tar headers read between looks at the cancel event
+KEEP_OPENED = 7 * 24 * 3600     # seconds an unused extracted copy is kept
+
+
+def is_archive_name(name):
+    return name.lower().endswith(SUFFIXES)
+
+
+def split_path(path):
+    """(archive, member) if path is an archive or lies inside one, else None.
+
+    member uses "/" like the archive itself and is "" for the archive.
+    """
+    lowered = path.lower()
+    if not any(suffix in lowered for suffix in SUFFIXES):
+        return None  # the common case, answered without a stat
+    head = path.rstrip(os.sep) or path
+    tail = []
+    while True:
+        if is_archive_name(head) and os.path.isfile(head):
+            return head, "/".join(reversed(tail))
+        parent, name = os.path.split(head)
+        if not name or parent == head:
+            return None
+        tail.append(name)
+        head = parent
+
+
+def inside_archive(path):
+    """True for a path below an archive, which exists only in the archive's index"""
+    split = split_path(path)
+    return split is not None and split[1] != ""
+
+
+def _size(info):
+    return info.file_size if isinstance(info, zipfile.ZipInfo) else info.size
+
+
+@functools.lru_cache(maxsize=4096)
+def _local_time(date_time):
+    try:
+        return time.mktime(date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
+
+
+def _zip_mtime(info):
+    # Zips store local time to two seconds, so many members share a stamp
+    return _local_time(info.date_time)
+
+
+def _clean_member(name):
+    """Member name without "./", leading or trailing "/" or ".." steps"""
+    return "/".join(part for part in name.replace("\\", "/").split("/") if part not in ("", ".", ".."))
+
+
+class ArchiveListing:
+    """Index of one archive: the entries of each of its folders"""
+
+    def __init__(self, path):
+        self.path = path
+        self.folders = {"": {}}   # member folder -> {name: Entry}
+        self.members = {}         # member path -> ZipInfo or TarInfo
+        self.count = 0
+
+    def _add(self, member, is_dir, size, mtime, info):
+        folder, _, name = member.rpartition("/")
+        children = self.folders.get(folder)
+        if children is None:
+            children = self._add_folder(folder, mtime)
+        if name not in children:
+            self.count += 1
+        children[name] = Entry(name, self.path + os.sep + member.replace("/", os.sep), is_dir,
+                               0 if is_dir else size, mtime)
+        if is_dir:
+            self.folders.setdefault(member, {})
+        else:
+            self.members[member] = info
+
+    def _add_folder(self, folder, mtime):
+        """Create a folder a member lies in, which the archive need not list itself"""
+        parent, _, name = folder.rpartition("/")
+        siblings = self.folders.get(parent)
+        if siblings is None:
+            siblings = self._add_folder(parent, mtime)
+        if name not in siblings:
+            self.count += 1
+            siblings[name] = Entry(name, self.path + os.sep + folder.replace("/", os.sep), True, 0, mtime)
+        return self.folders.setdefault(folder, {})
+
+    def _sum_sizes(self):
+        """Give every folder the total size of the files below it"""
+        for folder in sorted(self.folders, key=lambda f: f.count("/"), reverse=True):
+            if not folder:
+                continue
+            parent, _, name = folder.rpartition("/")
+            entry = self.folders[parent].get(name)
+            if entry is not None:
+                entry.size = sum(e.size for e in self.folders[folder].values())
+
+    @classmethod
+    def read(cls, path, cancel_event=None):
+        """Read the index of the archive at path; raises OSError if it is not one"""
+        listing = cls(path)
+        try:
+            if path.lower().endswith(ZIP_SUFFIXES):
+                with zipfile.ZipFile(path) as archive:
+                    for info in archive.infolist():
+                        member = _clean_member(info.filename)
+                        if member:
+                            listing._add(member, info.is_dir(), info.file_size, _zip_mtime(info), info)
+            else:
+                with tarfile.open(path, "r:*") as archive:
+                    for number, info in enumerate(archive):
+                        if number % CANCEL_CHECK == 0 and cancel_event is not None \
+                                and cancel_event.is_set():
+                            raise Cancelled()
+                        member = _clean_member(info.name)
+                        # Links and devices are left out, they have no data to show
+                        if member and (info.isdir() or info.isreg()):
+                            listing._add(member, info.isdir(), info.size, info.mtime, info)
+                        archive.members = []  # TarFile keeps every header otherwise
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, ValueError) as e:
+            raise OSError(f"Not a readable archive: {e}") from e
+        listing._sum_sizes()
+        return listing
+
+    def folder(self, member):
+        """Entries of a folder of the archive; "" is its top level"""
+        children = self.folders.get(member)
+        if children is None:
+            raise NotADirectoryError(f"No folder {member!r} in {self.path}")
+        return list(children.values())
+
+    def search(self, member, query, limit=500):
+        """Entries below a folder of the archive whose name contains query"""
+        prefix = member + "/" if member else ""
+        found = []
+        for folder, children in self.folders.items():
+            if folder == member or folder.startswith(prefix):
+                found.extend(e for e in children.values() if query in e.lname)
+                if len(found) >= limit:
+                    break
+        return found[:limit]
+
+    def files_below(self, member):
+        """(member path, info) of the file member itself, or of every file below that folder"""
+        if member in self.members:
+            return [(member, self.members[member])]
+        prefix = member + "/" if member else ""
+        return [(m, info) for m, info in self.members.items() if m.startswith(prefix)]
+
+
+class ArchiveCache:
+    """LRU map of archive path to its listing, checked against the archive's size and mtime"""
+
+    def __init__(self, max_members=MAX_CACHED_MEMBERS):
+        self.max_members = max_members
+        self.listings = OrderedDict()  # path -> ((size, mtime_ns), ArchiveListing)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def listing(self, archive, cancel_event=None):
+        """The ArchiveListing of archive, read if it is not cached or has changed"""
+        st = os.stat(archive)
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            cached = self.listings.get(archive)
+            if cached is not None and cached[0] == stamp:
+                self.listings.move_to_end(archive)
+                return cached[1]
+        listing = ArchiveListing.read(archive, cancel_event)
+        with self.lock:
+            old = self.listings.pop(archive, None)
+            if old is not None:
+                self.total -= old[1].count
+            if listing.count <= self.max_members:
+                self.listings[archive] = (stamp, listing)
+                self.total += listing.count
+                while self.total > self.max_members:
+                    _, (_, dropped) = self.listings.popitem(last=False)
+                    self.total -= dropped.count
+        return listing
+
+    def list_folder(self, path, cancel_event=None):
+        """Entries of an archive, or of a folder inside one, given as one path"""
+        split = split_path(path)
+        if split is None:
+            raise NotADirectoryError(f"Not inside an archive: {path}")
+        archive, member = split
+        return self.listing(archive, cancel_event).folder(member)
+
+    def search(self, path, query, limit=500, cancel_event=None):
+        archive, member = split_path(path)
+        return self.listing(archive, cancel_event).search(member, query, limit)
+
+    def extract(self, paths, dest_dir, progress, cancel_event):
+        """Copy archive members, files or whole folders, into dest_dir; returns the new paths.
+
+        Like a paste: names already taken get a " (copy)" suffix, and
+        whatever was written is removed again on cancel or error.
+        """
+        plans = []
+        for path in paths:
+            archive, member = split_path(path)
+            listing = self.listing(archive)
+            files = listing.files_below(member)
+            if not files and member not in listing.folders:
+                raise FileNotFoundError(f"No member {member!r} in {archive}")
+            basename = os.path.basename(path.rstrip(os.sep))
+            plans.append((archive, member, member in listing.members, basename, files))
+            progress.total += sum(_size(info) for _, info in files)
+        progress.started = time.monotonic()
+        created = []
+        try:
+            for archive, member, is_file, basename, files in plans:
+                # Claimed before anything is written, so cleanup only removes our own items
+                target = claim_name(dest_dir, basename, create_empty if is_file else os.mkdir)
+                created.append(target)
+                with _open(archive) as opened:
+                    for name, info in files:
+                        relative = name[len(member):].lstrip("/")
+                        dst = os.path.join(target, *relative.split("/")) if relative else target
+                        os.makedirs(os.path.dirname(dst), exist_ok=True)
+                        progress.current = os.path.basename(dst)
+                        _copy_member(opened, info, dst, progress, cancel_event, claimed=dst == target)
+        except BaseException:
+            for target in created:
+                remove_path(target)
+            raise
+        return created
+
+    def extract_for_opening(self, path, progress, cancel_event):
+        """Extract one member to a private folder, for opening with another program.
+
+        The copy is reused while the archive is unchanged and the copy
+        still has the size and mtime it was extracted with, i.e. nobody
+        saved over it.
+        """
+        archive, member = split_path(path)
+        listing = self.listing(archive)
+        info = listing.members.get(member)
+        if info is None:
+            raise FileNotFoundError(f"No file {member!r} in {archive}")
+        st = os.stat(archive)
+        stamp = hashlib.sha1(f"{archive}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8", "surrogatepass"))
+        top = os.path.join(_private_folder(), stamp.hexdigest()[:16])
+        folder = os.path.join(top, *member.split("/")[:-1])
+        dst = os.path.join(folder, member.rsplit("/", 1)[-1])
+        size = _size(info)
+        mtime_ns = int(_member_mtime(info) * 1_000_000_000)
+        try:
+            cached = os.lstat(dst)
+            if stat.S_ISREG(cached.st_mode) and cached.st_size == size and cached.st_mtime_ns == mtime_ns:
+                os.utime(top)  # still in use, see _prune
+                return dst
+        except OSError:
+            pass
+        _prune(os.path.dirname(top))
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+        progress.total = size
+        partial = dst + ".part"
+        remove_path(partial)  # left over from an extraction that was cut short
+        try:
+            with _open(archive) as opened:
+                _copy_member(opened, info, partial, progress, cancel_event)
+            os.utime(partial, ns=(mtime_ns, mtime_ns))
+            os.replace(partial, dst)
+        except BaseException:
+            remove_path(partial)
+            raise
+        return dst
+
+
+def _private_folder():
+    """Folder for extracted copies that only the current user can get at"""
+    folder = data_path("opened")
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    st = os.lstat(folder)
+    if not stat.S_ISDIR(st.st_mode) or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+        raise PermissionError(f"{folder} is not a folder of the current user")
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        os.chmod(folder, 0o700)
+    return folder
+
+
+def _prune(folder):
+    """Remove the copies of archives that were not opened for KEEP_OPENED seconds"""
+    limit = time.time() - KEEP_OPENED
+    try:
+        with os.scandir(folder) as it:
+            old = [de.path for de in it if de.stat(follow_symlinks=False).st_mtime < limit]
+    except OSError:
+        return
+    for path in old:
+        remove_path(path)
+
+
+def _member_mtime(info):
+    return _zip_mtime(info) if isinstance(info, zipfile.ZipInfo) else info.mtime
+
+
+def _open(archive):
+    if archive.lower().endswith(ZIP_SUFFIXES):
+        return zipfile.ZipFile(archive)
+    return tarfile.open(archive, "r:*")
+
+
+def _copy_member(opened, info, dst, progress, cancel_event, claimed=False):
+    """Stream one member from an open archive to dst, which must not exist yet.
+
+    With claimed, dst is an empty file created for it by the caller.
+    """
+    if isinstance(opened, zipfile.ZipFile):
+        source = opened.open(info)
+    else:
+        source = opened.extractfile(info)
+        if source is None:
+            raise OSError(f"Cannot extract {info.name}: not a regular file")
+    with source, open(dst, "r+b" if claimed else "xb") as target:
+        while True:
+            if cancel_event.is_set():
+                raise Cancelled()
+            data = source.read(CHUNK)
+            if not data:
+                break
+            target.write(data)
+            progress.add(len(data))
+
+
+@process_wide
+def shared_archives():
+    """Process-wide ArchiveCache, shared by the folder loader and the views"""
+    return ArchiveCache()
@@ -0,0 +1,50 @@
+"""Icons and pictures from the images folder.
+
+Resized copies are saved in the data folder the first time they are made,
+so later starts open a small PNG instead of decoding and resizing the
+original. Within one process every image is loaded once and its
+PhotoImage is shared by the login, guest and admin views.
+"""
+import os
+
+from PIL import Image, ImageTk
+
+from navi.settings import data_path
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+
+_images = {}
+_photos = {}
+
+
+def load_image(name, size):
+    """PIL image of images/<name> resized to size"""
+    key = (name, size)
+    image = _images.get(key)
+    if image is not None:
+        return image
+    source = os.path.join(IMAGES_DIR, name)
+    stem = os.path.splitext(name)[0]
+    cache_dir = data_path("assets")
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = os.path.join(cache_dir, f"{stem}_{size[0]}x{size[1]}_{int(os.stat(source).st_mtime)}.png")
+    try:
+        image = Image.open(cached)
+        image.load()
+    except OSError:
+        image = Image.open(source).resize(size)
+        try:
+            image.save(cached, "PNG")
+        except OSError:
+            pass
+    _images[key] = image
+    return image
+
+
+def photo(name, size):
+    """Shared PhotoImage of images/<name> at size"""
+    key = (name, size)
+    image = _photos.get(key)
+    if image is None:
+        image = _photos[key] = ImageTk.PhotoImage(load_image(name, size))
+    return image
@@ -0,0 +1,178 @@
+"""Operations on several selected items at once: move and pattern rename.
+
+A batch runs as a single job. Moves within one filesystem are a single
+rename per item. Moves to another filesystem fall back to a copy
+followed by a delete. Renames never replace an existing item, even one
+that appeared after the batch was checked.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import stat
+import string
+import sys
+import time
+
+from navi.copier import claim_name, paste
+from navi.deleter import delete_paths
+from navi.jobs import Cancelled, Progress
+
+PATTERN_FIELDS = {"name", "ext", "n"}
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+
+def load_renameat2():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return libc.renameat2  # glibc 2.28 and later
+    except (OSError, AttributeError):
+        return None
+
+
+RENAMEAT2 = load_renameat2()
+
+
+def rename_no_replace(src, dst):
+    """os.rename that raises FileExistsError instead of replacing dst.
+
+    Uses renameat2(RENAME_NOREPLACE) where the kernel and filesystem have
+    it, else a hard link and unlink for files, and for anything else a
+    check just before the rename, which leaves a short window.
+    """
+    if RENAMEAT2 is not None:
+        if RENAMEAT2(AT_FDCWD, os.fsencode(src), AT_FDCWD, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS):  # EINVAL: not supported by this filesystem
+            raise OSError(err, os.strerror(err), src, None, dst)
+    if stat.S_ISREG(os.lstat(src).st_mode):
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            raise
+        except OSError:
+            pass  # no hard links here
+        else:
+            os.unlink(src)
+            return
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+    os.rename(src, dst)
+
+
+def move(sources, dest_dir, progress=None, cancel_event=None):
+    """Move every path in sources into dest_dir. Returns (old, new) pairs."""
+    progress = progress or Progress()
+    progress.unit = "items"
+    progress.total = len(sources)
+    progress.started = time.monotonic()
+    for src in sources:
+        if os.path.isdir(src) and (dest_dir + os.sep).startswith(src.rstrip(os.sep) + os.sep):
+            raise OSError(errno.EINVAL, "Cannot move a folder into itself", src)
+
+    moved = []
+    for src in sources:
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        if os.path.dirname(src.rstrip(os.sep)) == dest_dir.rstrip(os.sep):
+            progress.add(1)
+            continue  # already there
+        progress.current = os.path.basename(src)
+        try:
+            # A name taken after free_name() chose it moves on to the next one
+            dst = claim_name(dest_dir, os.path.basename(src.rstrip(os.sep)),
+                             lambda path: rename_no_replace(src, path))
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Another filesystem: copy, then delete the original
+            dst = paste([src], dest_dir, Progress(), cancel_event)[0]
+            delete_paths([src], Progress(), cancel_event)
+        moved.append((src, dst))
+        progress.add(1)
+    return moved
+
+
+def expand_pattern(entries, pattern):
+    """New names for entries from a pattern like "holiday_{n:03}{ext}".
+
+    {name} is the old name without its extension, {ext} the extension with
+    its dot and {n} a counter starting at 1. Raises ValueError for a bad
+    pattern or if the names would clash.
+    """
+    for _, field, _, _ in string.Formatter().parse(pattern):
+        if field is not None and field not in PATTERN_FIELDS:
+            raise ValueError("Unknown field {%s} in pattern" % field)
+
+    names = []
+    for n, entry in enumerate(entries, 1):
+        stem, ext = os.path.splitext(entry.name)
+        if entry.is_dir:
+            stem, ext = entry.name, ""
+        name = pattern.format(name=stem, ext=ext, n=n)
+        if not name or name in (".", "..") or os.sep in name:
+            raise ValueError("Invalid name: %r" % name)
+        names.append(name)
+
+    if len(set(names)) != len(names):
+        raise ValueError("The pattern gives several items the same name")
+    moving = {e.path for e in entries}
+    pairs = []
+    for entry, name in zip(entries, names):
+        new_path = os.path.join(os.path.dirname(entry.path), name)
+        if new_path not in moving and os.path.lexists(new_path):
+            raise ValueError("%s already exists" % name)
+        pairs.append((entry.path, new_path))
+    return pairs
+
+
+def rename_all(pairs, progress=None, cancel_event=None):
+    """Rename (old, new) pairs. Names may be swapped or shifted among themselves.
+
+    Every item first gets a temporary name, then its final one, so a pair
+    never overwrites another item of the batch. A new name taken by
+    something else fails the batch, and the items already renamed are put
+    back. An item whose old name was taken meanwhile keeps the name it has
+    rather than replace anything.
+    """
+    progress = progress or Progress()
+    pairs = [(old, new) for old, new in pairs if old != new]
+    progress.unit = "items"
+    progress.total = len(pairs)
+    progress.started = time.monotonic()
+    staged = []
+    done = []
+    try:
+        for i, (old, new) in enumerate(pairs):
+            if cancel_event is not None and cancel_event.is_set():
+                raise Cancelled()
+            temp = os.path.join(os.path.dirname(old), ".navi-rename-%d-%d" % (os.getpid(), i))
+            rename_no_replace(old, temp)
+            staged.append((old, temp, new))
+        for old, temp, new in staged:
+            progress.current = os.path.basename(new)
+            try:
+                rename_no_replace(temp, new)
+            except FileExistsError:
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), new) from None
+            done.append((old, temp, new))
+            progress.add(1)
+    except BaseException:
+        stuck = set()
+        for old, temp, new in done:
+            try:
+                rename_no_replace(new, temp)
+            except OSError:
+                stuck.add(temp)
+        for old, temp, new in staged:
+            if temp not in stuck:
+                try:
+                    rename_no_replace(temp, old)
+                except OSError:
+                    pass
+        raise
+    return pairs
@@ -0,0 +1,225 @@
+"""Command line front end of navi.core, for scripts and bulk operations.
+
+    python -m navi [--role admin|guest] COMMAND ...
+
+Every command runs with the rights of --role, exactly as the explorer
+window of that role would. A refused action exits with status 2.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+from navi import core
+from navi.archive import inside_archive
+from navi.jobs import Progress
+from navi.dirmodel import entry_from_path
+from navi.du import human_size, shared_disk_usage
+from navi.dupes import shared_hash_cache
+from navi.history import FILE, FOLDER, shared_history
+from navi.policy import POLICIES, Denied
+
+PROGRESS_EVERY = 0.5  # seconds between progress lines on stderr
+
+
+def print_entries(entries, long):
+    for entry in entries:
+        name = entry.name + (os.sep if entry.is_dir else "")
+        if long:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.mtime))
+            size = "-" if entry.is_dir else human_size(entry.size)
+            print(f"{size:>8}  {stamp}  {name}")
+        else:
+            print(name)
+
+
+def run(work, quiet):
+    """Run a job here, reporting its progress on stderr unless quiet"""
+    progress = Progress()
+    if quiet or not sys.stderr.isatty():
+        return core.run_job(work, progress)
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = core.run_job(work, progress)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    while thread.is_alive():
+        thread.join(PROGRESS_EVERY)
+        if progress.total:
+            sys.stderr.write(f"\r{progress.fraction() * 100:5.1f}%  {progress.current[-60:]:60}")
+            sys.stderr.flush()
+    sys.stderr.write("\r" + " " * 68 + "\r")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def cmd_ls(args, policy):
+    for path in args.paths:
+        entries = core.list_dir(path, policy)
+        if args.filter:
+            entries = core.filter_entries(entries, args.filter)
+        then = ("name",) if args.sort != "name" else ()
+        print_entries(core.sort_entries(entries, args.sort, args.reverse, then), args.long)
+
+
+def cmd_find(args, policy):
+    print_entries(core.search(args.root, args.query, policy, limit=args.limit), args.long)
+
+
+def cmd_grep(args, policy):
+    for path, line_no, preview in core.grep(args.root, args.text, regex=args.regex,
+                                            ignore_case=args.ignore_case, policy=policy):
+        print(f"{path}:{line_no}: {preview}")
+
+
+def cmd_mkdir(args, policy):
+    for path in args.paths:
+        print(core.create_folder(os.path.dirname(os.path.abspath(path)), os.path.basename(path), policy))
+
+
+def cmd_touch(args, policy):
+    for path in args.paths:
+        print(core.create_file(os.path.dirname(os.path.abspath(path)), os.path.basename(path), policy))
+
+
+def cmd_cp(args, policy):
+    if all(inside_archive(path) for path in args.sources):
+        work = core.extract_job(args.sources, args.dest, policy)
+    else:
+        work = core.copy_job(args.sources, args.dest, policy)
+    for path in run(work, args.quiet):
+        print(path)
+
+
+def cmd_mv(args, policy):
+    for old, new in run(core.move_job(args.sources, args.dest, policy), args.quiet):
+        print(f"{old} -> {new}")
+
+
+def cmd_rm(args, policy):
+    run(core.delete_job(args.paths, policy), args.quiet)
+
+
+def cmd_rename(args, policy):
+    if args.pattern:
+        entries = [entry_from_path(os.path.abspath(p)) for p in args.paths]
+        for old, new in run(core.rename_job(entries, args.pattern, policy), args.quiet):
+            print(f"{old} -> {new}")
+    else:
+        if len(args.paths) != 2:
+            raise SystemExit("rename: give PATH NEW_NAME, or --pattern with any number of paths")
+        print(core.rename(args.paths[0], args.paths[1], policy))
+
+
+def cmd_du(args, policy):
+    disk_usage = shared_disk_usage()
+    totals = run(core.folder_sizes_job(args.root, disk_usage, policy), args.quiet)
+    disk_usage.save()
+    children = sorted((p for p in totals if p != args.root), key=totals.get, reverse=True)
+    for path in children[:args.top]:
+        print(f"{human_size(totals[path]):>8}  {path}")
+    print(f"{human_size(totals[args.root]):>8}  {args.root}")
+
+
+def cmd_dupes(args, policy):
+    cache = shared_hash_cache()
+    sets = run(core.duplicates_job(args.root, cache, policy), args.quiet)
+    for dup in sets:
+        print(f"{len(dup.paths)} x {human_size(dup.size)}, {human_size(dup.reclaimable())} reclaimable")
+        for path in dup.paths:
+            print(f"  {path}")
+    print(f"{len(sets)} sets, {human_size(sum(d.reclaimable() for d in sets))} reclaimable")
+
+
+def cmd_recent(args, policy):
+    for visit in shared_history().jump(" ".join(args.query), kind=args.kind, limit=args.limit):
+        print(visit.path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m navi", description=__doc__.splitlines()[0])
+    parser.add_argument("--role", choices=sorted(POLICIES), default="guest",
+                        help="rights to run with (default: guest)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("ls", help="list folders")
+    p.add_argument("paths", nargs="*", default=["."])
+    p.add_argument("-l", "--long", action="store_true", help="also print size and date")
+    p.add_argument("-s", "--sort", choices=core.SORT_KEYS, default="name")
+    p.add_argument("-r", "--reverse", action="store_true")
+    p.add_argument("-f", "--filter", help="only names containing this text")
+    p.set_defaults(func=cmd_ls)
+
+    p = commands.add_parser("find", help="find names containing text below a folder")
+    p.add_argument("query")
+    p.add_argument("root", nargs="?", default=".")
+    p.add_argument("-l", "--long", action="store_true")
+    p.add_argument("-n", "--limit", type=int, default=500)
+    p.set_defaults(func=cmd_find)
+
+    p = commands.add_parser("grep", help="search file contents below a folder")
+    p.add_argument("text")
+    p.add_argument("root", nargs="?", default=".")
+    p.add_argument("-E", "--regex", action="store_true")
+    p.add_argument("-s", "--case-sensitive", dest="ignore_case", action="store_false")
+    p.set_defaults(func=cmd_grep)
+
+    for name, func, what in (("mkdir", cmd_mkdir, "folders"), ("touch", cmd_touch, "empty files")):
+        p = commands.add_parser(name, help=f"create {what}")
+        p.add_argument("paths", nargs="+")
+        p.set_defaults(func=func)
+
+    for name, func, what in (("cp", cmd_cp, "copy"), ("mv", cmd_mv, "move")):
+        p = commands.add_parser(name, help=f"{what} items into a folder")
+        p.add_argument("sources", nargs="+")
+        p.add_argument("dest")
+        p.set_defaults(func=func)
+
+    p = commands.add_parser("rm", help="delete files and folders")
+    p.add_argument("paths", nargs="+")
+    p.set_defaults(func=cmd_rm)
+
+    p = commands.add_parser("rename", help="rename one item, or many with --pattern")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("-p", "--pattern", help='e.g. "{name}_{n:03}{ext}"')
+    p.set_defaults(func=cmd_rename)
+
+    p = commands.add_parser("du", help="folder sizes, largest first")
+    p.add_argument("root", nargs="?", default=".")
+    p.add_argument("-n", "--top", type=int, default=20)
+    p.set_defaults(func=cmd_du)
+
+    p = commands.add_parser("dupes", help="find duplicate files")
+    p.add_argument("root", nargs="?", default=".")
+    p.set_defaults(func=cmd_dupes)
+
+    p = commands.add_parser("recent", help="visited folders and opened files, most frecent first")
+    p.add_argument("query", nargs="*", help="words the path must contain, in order")
+    p.add_argument("-d", "--folders", dest="kind", action="store_const", const=FOLDER)
+    p.add_argument("-f", "--files", dest="kind", action="store_const", const=FILE)
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p.set_defaults(func=cmd_recent)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args, POLICIES[args.role])
+    except Denied as e:
+        print(f"navi: not allowed: {e.args[0]}", file=sys.stderr)
+        return 2
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        print(f"navi: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
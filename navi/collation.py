@@ -0,0 +1,80 @@
+"""Collation keys for ordering file names the way people read them.
+
+A name's key is one plain string, so sorting compares keys in C and never
+calls back into Python. It is built once per Entry (Entry.collation_key),
+and every view, the GUI, the terminal browser and the command line, sorts
+with the same keys, so they list a folder in the same order.
+
+The key is the name, Unicode-normalized (NFKC) and casefolded, with every
+run of digits replaced by its value zero-padded to WIDTH places, so
+"img2" comes before "img10". Accents are set aside at first: "école"
+sorts with the e's. For names that differ only in accents, the key ends
+with a NUL and the accented spelling. NUL never occurs in a file name,
+so this suffix cannot change the order of names that differ earlier.
+Names with equal keys, like "Readme" and "README", are ordered by the
+name itself by the caller.
+
+When NAVI_COLLATION=locale is set (see navi.settings), the padded string
+goes through locale.strxfrm instead, and the user's LC_COLLATE rules
+apply. Everything that reads the same environment sorts the same way.
+"""
+import locale
+import re
+import unicodedata
+
+from navi.settings import COLLATION
+
+WIDTH = 20  # digit runs up to this many significant digits compare by value
+
+_ZEROS = "0" * WIDTH
+_DIGITS = re.compile(r"\d+")
+# Combining marks left over after NFKD: accents on Latin, Greek and Cyrillic
+_MARKS = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]+")
+
+
+def _pad(match):
+    run = match.group()
+    if not run.isascii():
+        run = str(int(run))  # digits of other scripts
+    if len(run) > WIDTH:
+        run = run.lstrip("0")
+        if len(run) > WIDTH:
+            # After every shorter number, ordered by length then value
+            return "9" * WIDTH + f"{len(run):04d}" + run
+    return _ZEROS[len(run):] + run
+
+
+def fold(name):
+    """The name normalized and casefolded, accents kept"""
+    if name.isascii():
+        return name.lower()
+    return unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", name).casefold())
+
+
+def natural_key(name):
+    """Collation key of name without the locale: natural numbers, casefolded, accents last"""
+    folded = fold(name)
+    if folded.isascii():
+        return _DIGITS.sub(_pad, folded)
+    base = _MARKS.sub("", unicodedata.normalize("NFKD", folded))
+    key = _DIGITS.sub(_pad, base)
+    return key if base == folded else key + "\0" + folded
+
+
+def locale_key(name):
+    """Collation key of name under the LC_COLLATE locale, numbers still natural"""
+    padded = _DIGITS.sub(_pad, fold(name))
+    try:
+        return locale.strxfrm(padded)
+    except (ValueError, OSError):
+        return padded  # undecodable bytes kept as surrogates
+
+
+if COLLATION == "locale":
+    try:
+        locale.setlocale(locale.LC_COLLATE, "")
+        collation_key = locale_key
+    except locale.Error:
+        collation_key = natural_key
+else:
+    collation_key = natural_key
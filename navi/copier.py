@@ -0,0 +1,279 @@
+"""Copying files and folders for Paste.
+
+File data is moved by the kernel where possible. The order of attempts
+is: a reflink clone on copy-on-write filesystems (btrfs, XFS), then
+os.copy_file_range, then os.sendfile, and finally plain reads and writes
+in large chunks. Folder trees are copied with a small pool of threads.
+
+Progress is counted in bytes for throughput and ETA. Copies can be
+cancelled between chunks. Whatever a cancelled or failed paste already
+created is removed again.
+
+Named pipes, sockets and devices are not copied: reading one may block
+forever or never end. Pasting one raises shutil.SpecialFileError, and
+inside a folder being pasted they are left out.
+"""
+import errno
+import os
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from navi.jobs import Cancelled, Progress
+
+CHUNK = 8 * 1024 * 1024
+WORKERS = 4
+MAX_IN_FLIGHT = 64
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from <linux/fs.h>
+
+# errors meaning "this syscall cannot do it here, try the next method"
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+               errno.ENOTSUP, errno.EBADF, errno.ETXTBSY, errno.EPERM}
+
+
+def try_reflink(src_fd, dst_fd):
+    """Share the data blocks of src with dst on CoW filesystems"""
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def copy_data(src_fd, dst_fd, size, progress, cancel_event):
+    """Copy the content of one open file into another"""
+    if size and try_reflink(src_fd, dst_fd):
+        progress.add(size)
+        return
+
+    copied = 0
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            while True:
+                if cancel_event.is_set():
+                    raise Cancelled()
+                if method == "copy_file_range":
+                    n = os.copy_file_range(src_fd, dst_fd, CHUNK)
+                else:
+                    n = os.sendfile(dst_fd, src_fd, copied, CHUNK)
+                if n == 0:
+                    return
+                copied += n
+                progress.add(n)
+        except OSError as e:
+            if copied or e.errno not in UNSUPPORTED:
+                raise
+        os.lseek(src_fd, 0, os.SEEK_SET)
+        os.lseek(dst_fd, 0, os.SEEK_SET)
+
+    buffer = bytearray(CHUNK)
+    view = memoryview(buffer)
+    with open(src_fd, "rb", buffering=0, closefd=False) as reader:
+        while True:
+            if cancel_event.is_set():
+                raise Cancelled()
+            n = reader.readinto(buffer)
+            if not n:
+                return
+            written = 0
+            while written < n:
+                written += os.write(dst_fd, view[written:n])
+            progress.add(n)
+
+
+def copy_file(src, dst, progress, cancel_event, claimed=False):
+    """Copy one regular file to a path that must not exist yet.
+
+    With claimed, dst is an empty file this paste already created for it.
+    """
+    # O_NONBLOCK so that a pipe put in place of the file cannot hang the open
+    src_fd = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_NONBLOCK", 0))
+    try:
+        st = os.fstat(src_fd)
+        if not stat.S_ISREG(st.st_mode):
+            raise shutil.SpecialFileError(f"{src} is a named pipe, socket or device")
+        flags = os.O_WRONLY | getattr(os, "O_BINARY", 0)
+        flags |= os.O_TRUNC if claimed else os.O_CREAT | os.O_EXCL
+        dst_fd = os.open(dst, flags, stat.S_IMODE(st.st_mode) | stat.S_IWUSR)
+        try:
+            copy_data(src_fd, dst_fd, st.st_size, progress, cancel_event)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src, dst)
+
+
+def free_name(dest_dir, name):
+    """name, or 'name (copy)', 'name (copy 2)'... if it is taken in dest_dir"""
+    candidate = os.path.join(dest_dir, name)
+    if not os.path.lexists(candidate):
+        return candidate
+    stem, ext = os.path.splitext(name)
+    if os.path.isdir(candidate):
+        stem, ext = name, ""
+    number = 1
+    while True:
+        suffix = " (copy)" if number == 1 else f" (copy {number})"
+        candidate = os.path.join(dest_dir, stem + suffix + ext)
+        if not os.path.lexists(candidate):
+            return candidate
+        number += 1
+
+
+def claim_name(dest_dir, name, create):
+    """Run create(path) on the first free name for name in dest_dir; returns the path.
+
+    create must raise FileExistsError if path exists, e.g. os.mkdir. If
+    something else takes the name first, the next free name is tried.
+    """
+    while True:
+        path = free_name(dest_dir, name)
+        try:
+            create(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+def create_empty(path):
+    """Create path as an empty file, failing with FileExistsError if it is taken"""
+    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+
+
+def plan_copy(src, dst, progress):
+    """List of (kind, src, dst) steps to copy src to dst, counting bytes"""
+    st = os.lstat(src)
+    if stat.S_ISLNK(st.st_mode):
+        return [("link", src, dst)]
+    if stat.S_ISREG(st.st_mode):
+        progress.total += st.st_size
+        return [("file", src, dst)]
+    if not stat.S_ISDIR(st.st_mode):
+        raise shutil.SpecialFileError(f"{src} is a named pipe, socket or device")
+    steps = [("dir", src, dst)]
+    for folder, dirs, files in os.walk(src):
+        target = os.path.join(dst, os.path.relpath(folder, src))
+        for name in list(dirs):
+            path = os.path.join(folder, name)
+            if os.path.islink(path):
+                steps.append(("link", path, os.path.join(target, name)))
+                dirs.remove(name)  # os.walk would not enter it anyway
+            else:
+                steps.append(("dir", path, os.path.join(target, name)))
+        for name in files:
+            path = os.path.join(folder, name)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                st = None  # vanished or unreadable, the copy reports it
+            if st is not None and stat.S_ISLNK(st.st_mode):
+                steps.append(("link", path, os.path.join(target, name)))
+            elif st is None or stat.S_ISREG(st.st_mode):
+                if st is not None:
+                    progress.total += st.st_size
+                steps.append(("file", path, os.path.join(target, name)))
+    return steps
+
+
+def remove_path(path):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def paste(sources, dest_dir, progress=None, cancel_event=None, workers=WORKERS):
+    """Copy every path in sources into dest_dir and return the new paths.
+
+    Raises Cancelled if cancel_event gets set, or the first OSError. Either
+    way nothing this call created is left behind. Each top-level item is
+    created under a free name before anything is copied into it, so a
+    paste running at the same time cannot make this one take over, or
+    later remove, an item that is not its own.
+    """
+    progress = progress or Progress()
+    cancel_event = cancel_event or threading.Event()
+    plans = []
+    for src in sources:
+        name = os.path.basename(src.rstrip(os.sep))
+        if os.path.isdir(src) and (dest_dir + os.sep).startswith(src.rstrip(os.sep) + os.sep):
+            raise OSError(errno.EINVAL, "Cannot paste a folder into itself", src)
+        # Planned under the bare name, moved to the claimed one below
+        plans.append((name, plan_copy(src, os.path.join(dest_dir, name), progress)))
+    progress.started = time.monotonic()
+
+    created = []
+    try:
+        with ThreadPoolExecutor(workers) as pool:
+            try:
+                in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+                futures = []
+
+                def run(src, dst, claimed):
+                    try:
+                        progress.current = os.path.basename(src)
+                        copy_file(src, dst, progress, cancel_event, claimed)
+                    finally:
+                        in_flight.release()
+
+                for i, (name, steps) in enumerate(plans):
+                    if cancel_event.is_set():
+                        raise Cancelled()
+                    kind, src, planned = steps[0]
+                    if kind == "dir":
+                        target = claim_name(dest_dir, name, os.mkdir)
+                    elif kind == "link":
+                        target = claim_name(dest_dir, name, lambda path: os.symlink(os.readlink(src), path))
+                    else:
+                        target = claim_name(dest_dir, name, create_empty)
+                    created.append(target)
+                    steps = [(k, s, target + d[len(planned):]) for k, s, d in steps]
+                    plans[i] = (name, steps)
+                    for kind, src, dst in steps:
+                        if cancel_event.is_set():
+                            raise Cancelled()
+                        if dst == target and kind != "file":
+                            continue  # created by the claim
+                        if kind == "dir":
+                            os.mkdir(dst)
+                        elif kind == "link":
+                            os.symlink(os.readlink(src), dst)
+                        else:
+                            in_flight.acquire()
+                            futures.append(pool.submit(run, src, dst, dst == target))
+                            # Surface errors early instead of after the whole tree
+                            if len(futures) >= MAX_IN_FLIGHT * 4:
+                                for future in futures:
+                                    if future.done():
+                                        future.result()
+                                futures = [f for f in futures if not f.done()]
+                # The first failure ends the paste, not the last copy before it
+                for future in wait(futures, return_when=FIRST_EXCEPTION).done:
+                    future.result()
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop the copies still queued or running before the pool is waited for
+                cancel_event.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+        # Folders get their times and modes last, after their content
+        for _, steps in plans:
+            for kind, src, dst in reversed(steps):
+                if kind == "dir":
+                    shutil.copystat(src, dst)
+    except BaseException:
+        cancel_event.set()
+        for target in created:
+            remove_path(target)
+        raise
+    return created
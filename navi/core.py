@@ -0,0 +1,252 @@
+"""The explorer without a window: listing, sorting, searching and file operations.
+
+The admin and guest explorers, the command line (python -m navi) and
+scripts all go through these functions. Each one checks a Policy first,
+so it runs with the rights of a role.
+
+Long operations come in two halves. A *_job function checks the policy
+and returns work(progress, control), which the GUIs queue on their
+JobQueue. run_job runs the same work in the calling thread, which is
+what the command line and scripts do.
+
+Zip and tar archives can be listed and searched like folders, with paths
+such as logs.zip/app/server.log (navi.archive). They are read-only:
+their members are copied out with extract_job.
+"""
+import errno
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from navi.archive import shared_archives, split_path
+from navi.batch import expand_pattern, move, rename_all
+from navi.copier import paste
+from navi.deleter import delete_paths
+from navi.dirmodel import Entry, entry_from_dirent, scan_dir
+from navi.du import DiskUsage
+from navi.dupes import DuplicateSet, HashCache, delete_duplicates, find_duplicates, link_duplicates
+from navi.grep import DEFAULT_IGNORES, MAX_DEPTH, MAX_FILE_SIZE, compile_pattern, grep_file, walk_files
+from navi.jobs import Cancelled, Progress
+from navi.policy import ADMIN, COPY, CREATE, DELETE, LINK, LIST, MOVE, READ, RENAME, SCAN, Policy
+from navi.sorting import SORT_KEYS, SortColumns
+
+Work = Callable[[Progress, threading.Event], Any]
+Match = Tuple[str, int, str]
+
+__all__ = [
+    "Entry", "Policy", "Work", "SORT_KEYS",
+    "list_dir", "iter_dir", "sort_entries", "filter_entries", "search", "grep",
+    "create_folder", "create_file", "rename",
+    "copy_job", "move_job", "delete_job", "rename_job", "link_job", "delete_duplicates_job",
+    "extract_job", "open_member_job",
+    "folder_sizes_job", "duplicates_job", "run_job",
+]
+
+
+def list_dir(path: str, policy: Policy = ADMIN) -> List[Entry]:
+    """Every entry of a folder, or of an archive or a folder inside one"""
+    policy.check(LIST, path)
+    if split_path(path) is not None:
+        return shared_archives().list_folder(path)
+    return scan_dir(path)
+
+
+def iter_dir(path: str, chunk: int = 1000, policy: Policy = ADMIN) -> Iterator[List[Entry]]:
+    """A folder's entries in chunks, read lazily as the caller asks for them"""
+    policy.check(LIST, path)
+    if split_path(path) is not None:
+        entries = shared_archives().list_folder(path)
+        for start in range(0, len(entries), chunk):
+            yield entries[start:start + chunk]
+        return
+    batch = []
+    with os.scandir(path) as it:
+        for de in it:
+            batch.append(entry_from_dirent(de))
+            if len(batch) >= chunk:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def sort_entries(entries: Sequence[Entry], key: str = "name", reverse: bool = False,
+                 then: Sequence[str] = ()) -> List[Entry]:
+    """Folders first, then by key ("name", "date", "size" or "type").
+
+    then lists secondary keys, a leading "-" sorting one descending. Names
+    compare naturally, so file2 comes before file10.
+    """
+    return SortColumns(list(entries)).sorted((key,) + tuple(then), reverse)
+
+
+def filter_entries(entries: Sequence[Entry], query: str) -> List[Entry]:
+    """Entries whose name contains query, ignoring case"""
+    query = query.lower()
+    return [e for e in entries if query in e.lname]
+
+
+def search(root: str, query: str, policy: Policy = ADMIN, limit: int = 500,
+           index: Any = None, cancel_event: Optional[threading.Event] = None) -> List[Entry]:
+    """Entries below root whose name contains query.
+
+    A FileIndex that already covers root answers from its database;
+    otherwise the tree is walked. Raises Cancelled once cancel_event is set.
+    """
+    policy.check(LIST, root)
+    if split_path(root) is not None:
+        return shared_archives().search(root, query.lower(), limit, cancel_event)
+    if index is not None and index.covers(root):
+        return index.search(query, under=root, limit=limit)
+    query = query.lower()
+    found = []
+    folders = [root]
+    while folders and len(found) < limit:
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        try:
+            listing = scan_dir(folders.pop())
+        except OSError:
+            continue
+        for entry in listing:
+            if query in entry.lname:
+                found.append(entry)
+            if entry.is_dir and not os.path.islink(entry.path):
+                folders.append(entry.path)
+    return found[:limit]
+
+
+def grep(root: str, text: str, regex: bool = False, ignore_case: bool = True,
+         max_size: int = MAX_FILE_SIZE, max_depth: int = MAX_DEPTH,
+         ignores: Sequence[str] = DEFAULT_IGNORES, policy: Policy = ADMIN) -> Iterator[Match]:
+    """(path, line, preview) of every line below root containing text, in one thread"""
+    policy.check(READ, root)
+    pattern = compile_pattern(text, regex, ignore_case)
+    for path in walk_files(root, ignores, max_size, max_depth):
+        for line_no, preview in grep_file(path, pattern):
+            yield path, line_no, preview
+
+
+def _check_writable(folder: str) -> None:
+    if split_path(folder) is not None:
+        raise OSError(errno.EROFS, "Archives are read-only", folder)
+
+
+def _new_path(parent: str, name: str) -> str:
+    _check_writable(parent)
+    name = name.strip()
+    if not name or name in (".", "..") or os.sep in name:
+        raise ValueError(f"Invalid name: {name!r}")
+    path = os.path.join(parent, name)
+    if os.path.lexists(path):
+        raise FileExistsError(f"'{name}' already exists")
+    return path
+
+
+def create_folder(parent: str, name: str, policy: Policy = ADMIN) -> str:
+    policy.check(CREATE, parent)
+    path = _new_path(parent, name)
+    os.mkdir(path)
+    return path
+
+
+def create_file(parent: str, name: str, policy: Policy = ADMIN) -> str:
+    policy.check(CREATE, parent)
+    path = _new_path(parent, name)
+    with open(path, "x"):
+        pass
+    return path
+
+
+def rename(path: str, new_name: str, policy: Policy = ADMIN) -> str:
+    """Rename path within its folder; returns the new path"""
+    policy.check(RENAME, path)
+    new_path = _new_path(os.path.dirname(path), new_name)
+    os.rename(path, new_path)
+    return new_path
+
+
+def copy_job(sources: Sequence[str], dest_dir: str, policy: Policy = ADMIN) -> Work:
+    """Work that pastes copies of sources into dest_dir and returns the new paths"""
+    policy.check(COPY, dest_dir)
+    policy.check(LIST, *sources)
+    _check_writable(dest_dir)
+    sources = list(sources)
+    return lambda progress, control: paste(sources, dest_dir, progress, control)
+
+
+def move_job(sources: Sequence[str], dest_dir: str, policy: Policy = ADMIN) -> Work:
+    """Work that moves sources into dest_dir and returns (old, new) pairs"""
+    policy.check(MOVE, dest_dir, *sources)
+    sources = list(sources)
+    return lambda progress, control: move(sources, dest_dir, progress, control)
+
+
+def delete_job(paths: Sequence[str], policy: Policy = ADMIN) -> Work:
+    policy.check(DELETE, *paths)
+    paths = list(paths)
+    return lambda progress, control: delete_paths(paths, progress, control)
+
+
+def rename_job(entries: Sequence[Entry], pattern: str, policy: Policy = ADMIN) -> Work:
+    """Work renaming entries by a pattern such as "{name}_{n:03}{ext}".
+
+    The pattern is checked right away; ValueError means it is unusable.
+    """
+    policy.check(RENAME, *(e.path for e in entries))
+    pairs = expand_pattern(list(entries), pattern)
+    return lambda progress, control: rename_all(pairs, progress, control)
+
+
+def link_job(pairs: Sequence[Tuple[str, str]], keys: Dict[str, tuple], policy: Policy = ADMIN) -> Work:
+    """Work replacing each duplicate by a hard link to its kept copy; pairs are (keep, duplicate).
+
+    keys are the scan-time keys of the DuplicateSets; a pair that changed
+    since is skipped. The work returns (linked, skipped).
+    """
+    policy.check(LINK, *(duplicate for _, duplicate in pairs))
+    pairs = list(pairs)
+    return lambda progress, control: link_duplicates(pairs, keys, progress, control)
+
+
+def delete_duplicates_job(pairs: Sequence[Tuple[str, str]], keys: Dict[str, tuple],
+                          policy: Policy = ADMIN) -> Work:
+    """Work deleting duplicates after checking them against their kept copies, like link_job"""
+    policy.check(DELETE, *(duplicate for _, duplicate in pairs))
+    pairs = list(pairs)
+    return lambda progress, control: delete_duplicates(pairs, keys, progress, control)
+
+
+def extract_job(sources: Sequence[str], dest_dir: str, policy: Policy = ADMIN) -> Work:
+    """Work copying archive members, files or folders, into dest_dir; returns the new paths"""
+    policy.check(COPY, dest_dir)
+    policy.check(LIST, *sources)
+    _check_writable(dest_dir)
+    sources = list(sources)
+    return lambda progress, control: shared_archives().extract(sources, dest_dir, progress, control)
+
+
+def open_member_job(path: str, policy: Policy = ADMIN) -> Work:
+    """Work extracting one archive member to a temporary file, for opening it; returns that file"""
+    policy.check(READ, path)
+    return lambda progress, control: shared_archives().extract_for_opening(path, progress, control)
+
+
+def folder_sizes_job(root: str, disk_usage: Optional[DiskUsage] = None,
+                     policy: Policy = ADMIN) -> Work:
+    """Work returning {child folder: bytes, root: total} like du -sx"""
+    policy.check(SCAN, root)
+    disk_usage = disk_usage or DiskUsage()
+    return lambda progress, control: disk_usage.measure(root, cancel_event=control)
+
+
+def duplicates_job(root: str, cache: Optional[HashCache] = None,
+                   policy: Policy = ADMIN) -> Callable[[Progress, threading.Event], List[DuplicateSet]]:
+    policy.check(SCAN, root)
+    return lambda progress, control: find_duplicates(root, progress, control, cache)
+
+
+def run_job(work: Work, progress: Optional[Progress] = None,
+            control: Optional[threading.Event] = None) -> Any:
+    """Run work in this thread and return its result"""
+    return work(progress or Progress(), control or threading.Event())
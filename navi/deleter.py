@@ -0,0 +1,66 @@
+"""Deleting files and folder trees in parallel.
+
+The tree is walked once. Then files are unlinked by a pool of threads in
+chunks, and folders are removed level by level, deepest first, so every
+folder is already empty when its turn comes. Progress counts items.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from navi.jobs import Cancelled
+
+WORKERS = 8
+CHUNK = 256
+
+
+def plan_delete(paths):
+    """Files to unlink and {depth: [folders]} to remove afterwards"""
+    files = []
+    folders = {}
+    for path in paths:
+        if os.path.islink(path) or not os.path.isdir(path):
+            files.append(path)
+            continue
+        base = path.rstrip(os.sep).count(os.sep)
+        for folder, dirs, names in os.walk(path):
+            depth = folder.count(os.sep) - base
+            folders.setdefault(depth, []).append(folder)
+            for name in names:
+                files.append(os.path.join(folder, name))
+            for name in list(dirs):
+                sub = os.path.join(folder, name)
+                if os.path.islink(sub):
+                    files.append(sub)  # a link to a folder is removed, never followed
+                    dirs.remove(name)
+    return files, folders
+
+
+def delete_paths(paths, progress, cancel_event, workers=WORKERS):
+    """Delete files and whole folder trees. Raises Cancelled or OSError."""
+    progress.unit = "items"
+    progress.current = "Scanning..."
+    files, folders = plan_delete(paths)
+    progress.total = len(files) + sum(len(f) for f in folders.values())
+
+    def unlink_chunk(chunk):
+        for path in chunk:
+            if cancel_event.is_set():
+                raise Cancelled()
+            os.remove(path)
+        progress.add(len(chunk))
+
+    def remove_folder(path):
+        if cancel_event.is_set():
+            raise Cancelled()
+        os.rmdir(path)
+        progress.add(1)
+
+    with ThreadPoolExecutor(workers) as pool:
+        progress.current = "Removing files"
+        chunks = [files[i:i + CHUNK] for i in range(0, len(files), CHUNK)]
+        for _ in pool.map(unlink_chunk, chunks):
+            pass
+        progress.current = "Removing folders"
+        for depth in sorted(folders, reverse=True):
+            for _ in pool.map(remove_folder, folders[depth]):
+                pass
@@ -0,0 +1,145 @@
+"""Cache of recently listed folders.
+
+Each snapshot remembers the folder's own mtime from just before it was
+listed. Reopening the folder costs one stat: if the mtime still matches,
+the cached entries are used as they are. The cache is bounded by the total
+number of entries and evicts the least recently used folder first.
+
+Changes made from inside the explorer patch the snapshot of the affected
+folder instead of dropping it.
+"""
+import os
+from collections import OrderedDict
+
+from navi.archive import split_path
+from navi.dirmodel import entry_from_path
+from navi.instrument import count
+
+MAX_CACHED_ENTRIES = 500_000
+
+
+class DirCache:
+    """LRU map of folder path to (mtime_ns, entries)"""
+
+    def __init__(self, max_entries=MAX_CACHED_ENTRIES):
+        self.max_entries = max_entries
+        self.snapshots = OrderedDict()
+        self.total = 0
+
+    def mtime_of(self, path):
+        """Current mtime of a folder; raises OSError if it is gone.
+
+        A folder inside an archive has the mtime of the archive.
+        """
+        count("stat")
+        try:
+            return os.stat(path).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            split = split_path(path)
+            if split is None:
+                raise
+            return os.stat(split[0]).st_mtime_ns
+
+    def get(self, path, mtime):
+        """Cached entries of path if they are still valid for mtime, else None"""
+        snapshot = self.snapshots.get(path)
+        if snapshot is None:
+            return None
+        if snapshot[0] != mtime:
+            self._drop(path)
+            return None
+        self.snapshots.move_to_end(path)
+        return snapshot[1]
+
+    def put(self, path, mtime, entries):
+        """Store a listing of path taken when its mtime was mtime"""
+        self._drop(path)
+        if len(entries) > self.max_entries:
+            return
+        self.snapshots[path] = (mtime, list(entries))
+        self.total += len(entries)
+        while self.total > self.max_entries:
+            oldest = next(iter(self.snapshots))
+            self._drop(oldest)
+
+    def _drop(self, path):
+        snapshot = self.snapshots.pop(path, None)
+        if snapshot is not None:
+            self.total -= len(snapshot[1])
+
+    def forget_subtree(self, path):
+        """Drop path and every folder below it"""
+        prefix = path.rstrip(os.sep) + os.sep
+        for cached in [p for p in self.snapshots if p == path or p.startswith(prefix)]:
+            self._drop(cached)
+
+    def _parent_snapshot(self, path):
+        parent = os.path.dirname(path)
+        snapshot = self.snapshots.get(parent)
+        if snapshot is None:
+            return parent, None
+        return parent, snapshot[1]
+
+    def _touch(self, parent, entries):
+        """Record the parent's new mtime after an in-app change"""
+        try:
+            self.snapshots[parent] = (self.mtime_of(parent), entries)
+        except OSError:
+            self._drop(parent)
+
+    def added(self, path):
+        """path was just created inside a cached folder"""
+        parent, entries = self._parent_snapshot(path)
+        if entries is None:
+            return
+        entries.append(entry_from_path(path))
+        self.total += 1
+        self._touch(parent, entries)
+
+    def removed(self, path):
+        """path was just deleted"""
+        self.forget_subtree(path)
+        parent, entries = self._parent_snapshot(path)
+        if entries is None:
+            return
+        kept = [e for e in entries if e.path != path]
+        self.total -= len(entries) - len(kept)
+        self._touch(parent, kept)
+
+    def renamed(self, old_path, new_path):
+        """old_path was just renamed to new_path"""
+        self.removed(old_path)
+        self.added(new_path)
+
+    def added_all(self, paths):
+        """Several paths were just created; each parent is touched once"""
+        by_parent = {}
+        for path in paths:
+            by_parent.setdefault(os.path.dirname(path), []).append(path)
+        for parent, children in by_parent.items():
+            snapshot = self.snapshots.get(parent)
+            if snapshot is None:
+                continue
+            entries = snapshot[1]
+            entries.extend(entry_from_path(p) for p in children)
+            self.total += len(children)
+            self._touch(parent, entries)
+
+    def removed_all(self, paths):
+        """Several paths were just deleted; each parent is touched once"""
+        by_parent = {}
+        for path in paths:
+            self.forget_subtree(path)
+            by_parent.setdefault(os.path.dirname(path), set()).add(path)
+        for parent, gone in by_parent.items():
+            snapshot = self.snapshots.get(parent)
+            if snapshot is None:
+                continue
+            kept = [e for e in snapshot[1] if e.path not in gone]
+            self.total -= len(snapshot[1]) - len(kept)
+            self._touch(parent, kept)
+
+    def moved_all(self, pairs):
+        """(old, new) pairs were just renamed or moved"""
+        self.removed_all([old for old, _ in pairs])
+        self.added_all([new for _, new in pairs])
@@ -0,0 +1,65 @@
+"""Directory model shared by the admin and guest explorers.
+
+A folder is read once with os.scandir and every entry is stored as a small
+Entry record. Sorting, filtering and drawing read from these records and
+never go back to the filesystem.
+"""
+import os
+import stat
+
+from navi.collation import collation_key
+from navi.instrument import count, count_entries
+
+
+class Entry:
+    """One item of a listed folder"""
+
+    __slots__ = ("name", "lname", "collation_key", "path", "is_dir", "size", "mtime", "ext")
+
+    def __init__(self, name, path, is_dir, size=0, mtime=0.0):
+        self.name = name
+        self.lname = name.lower()  # lowercased once, used by search
+        self.collation_key = collation_key(name)  # built once, used by every name sort
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.ext = "" if is_dir else os.path.splitext(name)[1].lower()
+
+    def __repr__(self):
+        return f"Entry({self.name!r}, is_dir={self.is_dir})"
+
+
+def entry_from_dirent(de):
+    """Build an Entry from an os.DirEntry with at most one stat call"""
+    try:
+        is_dir = de.is_dir()
+    except OSError:
+        is_dir = False
+    try:
+        st = de.stat()
+    except OSError:
+        # Broken symlink or vanished file, keep it listed without metadata
+        return Entry(de.name, de.path, is_dir)
+    return Entry(de.name, de.path, is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+
+
+def entry_from_path(path):
+    """Build an Entry for a single path, e.g. one just created in the app"""
+    name = os.path.basename(path)
+    count("stat")
+    try:
+        st = os.stat(path)
+    except OSError:
+        return Entry(name, path, False)
+    is_dir = stat.S_ISDIR(st.st_mode)
+    return Entry(name, path, is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+
+
+def scan_dir(path):
+    """Return a list of Entry records for every item in path"""
+    count("scandir")
+    with os.scandir(path) as it:
+        entries = [entry_from_dirent(de) for de in it]
+    count_entries(len(entries))
+    return entries
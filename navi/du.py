@@ -0,0 +1,214 @@
+"""Recursive folder sizes, like `du -x`.
+
+Hard-linked files are counted once and mount points are not crossed.
+Symlinks are not followed.
+
+Can also be run from the command line:
+
+    python -m navi.du [-b] [-H] [-c] PATH...
+"""
+import argparse
+import os
+import pickle
+import stat
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from navi.settings import data_path
+from navi.shared import process_wide
+
+WORKERS = 8
+PROGRESS_INTERVAL = 0.3
+
+
+def usage_of(st):
+    """(apparent size, disk usage) of one stat result"""
+    blocks = getattr(st, "st_blocks", None)
+    return st.st_size, (blocks * 512 if blocks is not None else st.st_size)
+
+
+class FolderRecord:
+    """Cached own totals of one folder"""
+
+    __slots__ = ("mtime", "apparent", "disk", "links", "subdirs")
+
+    def __init__(self, mtime, apparent, disk, links, subdirs):
+        self.mtime = mtime
+        self.apparent = apparent
+        self.disk = disk
+        self.links = links      # (dev, ino, apparent, disk) of files with st_nlink > 1
+        self.subdirs = subdirs  # names of sub-folders on the same device
+
+
+class DiskUsage:
+    """Computes recursive folder sizes, caching each folder's own totals until its mtime changes"""
+
+    def __init__(self, cache_file=None, workers=WORKERS):
+        self.cache_file = cache_file
+        self.workers = workers
+        self.records = {}
+        self.dirty = False
+        self.loaded = not cache_file
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Read the saved cache; done lazily by the first measure()"""
+        self.loaded = True
+        try:
+            with open(self.cache_file, "rb") as f:
+                self.records = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            self.records = {}
+
+    def save(self):
+        if not self.cache_file or not self.dirty:
+            return
+        tmp = self.cache_file + ".tmp"
+        with self.lock:
+            with open(tmp, "wb") as f:
+                pickle.dump(self.records, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.dirty = False
+        os.replace(tmp, self.cache_file)
+
+    def _record(self, path, st):
+        """Own totals of a folder, from the cache when its mtime matches"""
+        key = (st.st_dev, st.st_ino)
+        record = self.records.get(key)
+        if record is not None and record.mtime == st.st_mtime_ns:
+            return record
+
+        apparent, disk = usage_of(st)
+        links = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for de in it:
+                    try:
+                        child = de.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if de.is_dir(follow_symlinks=False):
+                        if child.st_dev == st.st_dev:
+                            subdirs.append(de.name)
+                        continue
+                    size, used = usage_of(child)
+                    if child.st_nlink > 1:
+                        links.append((child.st_dev, child.st_ino, size, used))
+                    else:
+                        apparent += size
+                        disk += used
+        except OSError:
+            pass
+        record = FolderRecord(st.st_mtime_ns, apparent, disk, links, subdirs)
+        with self.lock:
+            self.records[key] = record
+            self.dirty = True
+        return record
+
+    def _visit(self, path, st):
+        """Own totals of a folder plus the stat of each sub-folder to visit"""
+        record = self._record(path, st)
+        children = []
+        for name in record.subdirs:
+            child_path = os.path.join(path, name)
+            try:
+                child = os.stat(child_path, follow_symlinks=False)
+            except OSError:
+                continue
+            if child.st_dev == st.st_dev and stat.S_ISDIR(child.st_mode):
+                children.append((child_path, child))
+        return record, children
+
+    def measure(self, root, apparent=True, on_progress=None, cancel_event=None):
+        """Sizes below root, grouped by root's direct children.
+
+        Returns {path: bytes} with an entry for every sub-folder of root and
+        one for root itself holding the grand total. on_progress, if given,
+        gets the partial dict from time to time while the scan runs.
+        """
+        with self.lock:
+            if not self.loaded:
+                self.load()
+        root_st = os.stat(root)
+        pick = 0 if apparent else 1
+        totals = defaultdict(int)
+        seen_links = set()
+        grand = 0
+        last_progress = time.monotonic()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            pending = {pool.submit(self._visit, root, root_st): None}
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                    return None
+                done, _ = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    group = pending.pop(future)
+                    record, children = future.result()
+                    size = (record.apparent, record.disk)[pick]
+                    for link in record.links:
+                        if link[:2] not in seen_links:
+                            seen_links.add(link[:2])
+                            size += link[2 + pick]
+                    grand += size
+                    if group is not None:
+                        totals[group] += size
+                    for child_path, child_st in children:
+                        # Direct children of root start their own group
+                        child_group = child_path if group is None else group
+                        pending[pool.submit(self._visit, child_path, child_st)] = child_group
+                if on_progress is not None and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    on_progress(dict(totals))
+                    last_progress = time.monotonic()
+
+        totals[root] = grand
+        return dict(totals)
+
+
+@process_wide
+def shared_disk_usage():
+    """Process-wide DiskUsage with the cache kept in the explorer's data folder"""
+    return DiskUsage(cache_file=data_path("du_cache.pickle"))
+
+
+def human_size(size):
+    for unit in ("B", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m navi.du",
+                                     description="Folder sizes, like du -x, with a persistent cache")
+    parser.add_argument("paths", nargs="*", default=["."])
+    parser.add_argument("-b", "--apparent-size", action="store_true",
+                        help="count bytes of file content instead of disk usage")
+    parser.add_argument("-H", "--human-readable", action="store_true",
+                        help="print sizes like 1.5K, 23M, 2.0G")
+    parser.add_argument("-c", "--children", action="store_true",
+                        help="also print each sub-folder, largest first")
+    args = parser.parse_args(argv)
+
+    fmt = human_size if args.human_readable else str
+    du = shared_disk_usage()
+    for path in args.paths:
+        try:
+            totals = du.measure(path, apparent=args.apparent_size)
+        except OSError as e:
+            print(f"du: {path}: {e.strerror}")
+            continue
+        if args.children:
+            children = sorted((p for p in totals if p != path), key=totals.get, reverse=True)
+            for child in children:
+                print(f"{fmt(totals[child])}\t{child}")
+        print(f"{fmt(totals[path])}\t{path}")
+    du.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Finding duplicate files below a folder, and deleting or hard-linking them"""
+import hashlib
+import os
+import pickle
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from navi.jobs import Cancelled
+from navi.settings import data_path
+from navi.shared import process_wide
+
+EDGE = 64 * 1024
+CHUNK = 1024 * 1024
+WORKERS = 4
+MIN_SIZE = 1
+MAX_CACHED_HASHES = 1_000_000
+
+
+class DuplicateSet:
+    """Paths with identical content; the first one is kept by default"""
+
+    __slots__ = ("size", "paths", "keys")
+
+    def __init__(self, size, paths, keys=None):
+        self.size = size
+        self.paths = paths
+        self.keys = keys or {}  # path -> (dev, ino, size, mtime_ns) at scan time
+
+    def reclaimable(self):
+        return self.size * (len(self.paths) - 1)
+
+
+class HashCache:
+    """Partial and full hashes keyed by (dev, ino, size, mtime_ns), pickled to disk"""
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self.hashes = {}  # (kind, dev, ino, size, mtime_ns) -> digest
+        self.dirty = False
+        self.loaded = not cache_file
+        self.lock = threading.Lock()
+
+    def load(self):
+        self.loaded = True
+        try:
+            with open(self.cache_file, "rb") as f:
+                self.hashes = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            self.hashes = {}
+
+    def get(self, kind, key):
+        return self.hashes.get((kind,) + key)
+
+    def put(self, kind, key, digest):
+        with self.lock:
+            self.hashes[(kind,) + key] = digest
+            self.dirty = True
+
+    def save(self):
+        if not self.cache_file or not self.dirty:
+            return
+        with self.lock:
+            # Dicts keep insertion order, so the oldest hashes go first
+            while len(self.hashes) > MAX_CACHED_HASHES:
+                del self.hashes[next(iter(self.hashes))]
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(self.hashes, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.dirty = False
+        os.replace(tmp, self.cache_file)
+
+
+def collect_files(root, min_size=MIN_SIZE, cancel_event=None):
+    """{size: [(path, key)]} of the regular files below root, one path per inode"""
+    root_dev = os.stat(root).st_dev
+    by_size = {}
+    seen = set()
+    stack = [root]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for de in entries:
+            try:
+                st = de.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if st.st_dev == root_dev:
+                    stack.append(de.path)
+            elif stat.S_ISREG(st.st_mode) and st.st_size >= min_size:
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                by_size.setdefault(st.st_size, []).append((de.path, key))
+    return by_size
+
+
+def partial_hash(path, size):
+    """Hash of the first and last EDGE bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        digest.update(f.read(EDGE))
+        if size > EDGE:
+            f.seek(max(EDGE, size - EDGE))
+            digest.update(f.read(EDGE))
+    return digest.digest()
+
+
+def full_hash(path, cancel_event=None):
+    digest = hashlib.blake2b(digest_size=20)
+    buffer = bytearray(CHUNK)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise Cancelled()
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.digest()
+
+
+def _group(files, hash_one, kind, cache, progress):
+    """Split files into groups of two or more with the same hash"""
+    groups = {}
+    for path, key in files:
+        digest = cache.get(kind, key)
+        if digest is None:
+            try:
+                digest = hash_one(path, key[2])
+            except OSError:
+                progress.add(1)
+                continue  # unreadable or gone
+            cache.put(kind, key, digest)
+        progress.add(1)
+        groups.setdefault(digest, []).append((path, key))
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(root, progress, cancel_event, cache=None, min_size=MIN_SIZE, workers=WORKERS):
+    """Duplicate sets below root, the most reclaimable first.
+
+    Files sharing a size are compared by a hash of their first and last
+    EDGE bytes, and those still equal by a full hash on a thread pool.
+    progress counts the files hashed. Raises Cancelled if cancel_event
+    gets set.
+    """
+    cache = cache or HashCache()
+    with cache.lock:
+        if not cache.loaded:
+            cache.load()
+    progress.unit = "items"
+    progress.current = "Listing files"
+    progress.started = time.monotonic()
+    by_size = collect_files(root, min_size, cancel_event)
+    candidates = [files for files in by_size.values() if len(files) > 1]
+    progress.total = sum(len(files) for files in candidates)
+
+    progress.current = "Comparing the start and end of files"
+    same_edges = []
+    for files in candidates:
+        if cancel_event.is_set():
+            raise Cancelled()
+        same_edges.extend(_group(files, partial_hash, "edges", cache, progress))
+
+    # Files up to 2 * EDGE were read whole by the partial hash already
+    sets = [group for group in same_edges if group[0][1][2] <= 2 * EDGE]
+    to_hash = [group for group in same_edges if group[0][1][2] > 2 * EDGE]
+    progress.total += sum(len(group) for group in to_hash)
+    progress.current = "Comparing whole files"
+
+    def hash_group(group):
+        return _group(group, lambda path, size: full_hash(path, cancel_event), "full", cache, progress)
+
+    try:
+        with ThreadPoolExecutor(workers) as pool:
+            for groups in pool.map(hash_group, to_hash):
+                sets.extend(groups)
+    finally:
+        cache.save()
+    if cancel_event.is_set():
+        raise Cancelled()
+
+    result = [DuplicateSet(group[0][1][2], sorted(path for path, _ in group), dict(group))
+              for group in sets]
+    result.sort(key=lambda s: s.reclaimable(), reverse=True)
+    return result
+
+
+def unchanged(path, key):
+    """True if path is still the regular file the scan saw under key"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) == key
+
+
+class _Verifier:
+    """Checks pairs again right before they are changed, hashing each kept copy once"""
+
+    def __init__(self, keys, cancel_event):
+        self.keys = keys
+        self.cancel_event = cancel_event
+        self.kept = {}  # keep path -> full hash
+
+    def still_duplicates(self, keep, duplicate):
+        if keep not in self.keys or duplicate not in self.keys:
+            return False
+        if not (unchanged(keep, self.keys[keep]) and unchanged(duplicate, self.keys[duplicate])):
+            return False
+        try:
+            if keep not in self.kept:
+                self.kept[keep] = full_hash(keep, self.cancel_event)
+            same = full_hash(duplicate, self.cancel_event) == self.kept[keep]
+        except OSError:
+            return False
+        # Written to while it was being hashed?
+        return same and unchanged(keep, self.keys[keep]) and unchanged(duplicate, self.keys[duplicate])
+
+
+def replace_with_link(keep, duplicate):
+    """Make duplicate a hard link to keep, atomically"""
+    tmp = os.path.join(os.path.dirname(duplicate), f".navi-link-{os.getpid()}-{threading.get_ident()}")
+    os.link(keep, tmp)
+    try:
+        os.replace(tmp, duplicate)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+def _each_verified(pairs, keys, progress, cancel_event, action):
+    """action(keep, duplicate) for every pair that still holds; returns (done, skipped)"""
+    progress.unit = "items"
+    progress.total = len(pairs)
+    progress.started = time.monotonic()
+    verifier = _Verifier(keys, cancel_event)
+    done = []
+    skipped = []
+    for keep, duplicate in pairs:
+        if cancel_event.is_set():
+            raise Cancelled()
+        progress.current = os.path.basename(duplicate)
+        if verifier.still_duplicates(keep, duplicate):
+            action(keep, duplicate)
+            done.append(duplicate)
+        else:
+            skipped.append(duplicate)
+        progress.add(1)
+    return done, skipped
+
+
+def link_duplicates(pairs, keys, progress, cancel_event):
+    """Replace each duplicate with a hard link to its kept copy; pairs are (keep, duplicate).
+
+    keys maps paths to their scan-time keys (DuplicateSet.keys). Returns
+    (linked, skipped), skipped being the duplicates that changed since.
+    """
+    return _each_verified(pairs, keys, progress, cancel_event, replace_with_link)
+
+
+def delete_duplicates(pairs, keys, progress, cancel_event):
+    """Delete each duplicate of (keep, duplicate) pairs; returns (deleted, skipped) like link_duplicates"""
+    return _each_verified(pairs, keys, progress, cancel_event, lambda keep, duplicate: os.unlink(duplicate))
+
+
+@process_wide
+def shared_hash_cache():
+    """Process-wide HashCache kept in the explorer's data folder"""
+    return HashCache(cache_file=data_path("hash_cache.pickle"))
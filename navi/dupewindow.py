@@ -0,0 +1,150 @@
+"""Window listing duplicate sets, with batch delete and hard-link actions"""
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from navi.du import human_size
+from navi import core
+
+PANEL_BG = "#34495e"
+
+
+class DuplicateWindow:
+    """Duplicate sets as a tree: one parent row per set, one child row per copy.
+
+    Selected copies are deleted or replaced by hard links to the first
+    unselected copy of their set. A set is never emptied completely, and
+    copies that changed since the scan are left alone and reported.
+    """
+
+    def __init__(self, parent, root, sets, submit, on_changed, policy):
+        self.sets = sets
+        self.submit = submit  # the view's JobPanel.submit
+        self.on_changed = on_changed  # on_changed(paths) after copies were removed or linked
+        self.policy = policy
+        self.set_of = {}  # child row id -> DuplicateSet
+        self.path_of = {}  # child row id -> path
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Duplicates in {root}")
+        self.window.geometry("900x520")
+        self.window.configure(bg=PANEL_BG)
+
+        self.summary = tk.Label(self.window, text="", bg=PANEL_BG, fg="white", anchor="w",
+                                font=("Segoe UI", 11, "bold"))
+        self.summary.pack(fill="x", padx=10, pady=(10, 5))
+
+        table = tk.Frame(self.window, bg=PANEL_BG)
+        table.pack(fill="both", expand=True, padx=10)
+        self.tree = ttk.Treeview(table, columns=("size",), selectmode="extended")
+        self.tree.heading("#0", text="File")
+        self.tree.heading("size", text="Size")
+        self.tree.column("#0", width=720)
+        self.tree.column("size", width=100, anchor="e", stretch=False)
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        buttons = tk.Frame(self.window, bg=PANEL_BG)
+        buttons.pack(fill="x", padx=10, pady=10)
+        for text, command, color in (("Select duplicates", self.select_duplicates, "#4a6d8c"),
+                                     ("Hard-link selected", self.link_selected, "#4a6d8c"),
+                                     ("Delete selected", self.delete_selected, "#e74c3c")):
+            tk.Button(buttons, text=text, command=command, bd=0, bg=color, fg="black",
+                      font=("Segoe UI", 10, "bold"), cursor="hand2").pack(side="left", padx=(0, 8))
+
+        self.fill()
+
+    def fill(self):
+        self.tree.delete(*self.tree.get_children())
+        self.set_of = {}
+        self.path_of = {}
+        for dup in self.sets:
+            if len(dup.paths) < 2:
+                continue
+            group = self.tree.insert(
+                "", "end", open=True, values=(human_size(dup.size),),
+                text=f"{len(dup.paths)} copies, {human_size(dup.reclaimable())} reclaimable")
+            for path in dup.paths:
+                row = self.tree.insert(group, "end", text=path, values=(human_size(dup.size),))
+                self.set_of[row] = dup
+                self.path_of[row] = path
+        self.sets = [dup for dup in self.sets if len(dup.paths) > 1]
+        total = sum(dup.reclaimable() for dup in self.sets)
+        self.summary.config(text=f"{len(self.sets):,} duplicate sets, {human_size(total)} reclaimable")
+
+    def select_duplicates(self):
+        """Select every copy but the first of each set"""
+        rows = [row for row, path in self.path_of.items() if path != self.set_of[row].paths[0]]
+        self.tree.selection_set(rows)
+
+    def _selected_by_set(self):
+        """{DuplicateSet: [selected paths]}, or None if a set would lose every copy"""
+        chosen = {}
+        for row in self.tree.selection():
+            if row in self.path_of:
+                chosen.setdefault(self.set_of[row], []).append(self.path_of[row])
+        for dup, paths in chosen.items():
+            if len(paths) >= len(dup.paths):
+                messagebox.showerror("Duplicates", "Leave at least one copy of every set unselected.",
+                                     parent=self.window)
+                return None
+        return chosen
+
+    @staticmethod
+    def _pairs(chosen):
+        """(keep, duplicate) pairs and the scan keys of their paths"""
+        pairs = []
+        keys = {}
+        for dup, selected in chosen.items():
+            keep = next(path for path in dup.paths if path not in selected)
+            pairs.extend((keep, path) for path in selected)
+            keys.update(dup.keys)
+        return pairs, keys
+
+    def delete_selected(self):
+        chosen = self._selected_by_set()
+        if not chosen:
+            return
+        pairs, keys = self._pairs(chosen)
+        if not messagebox.askyesno("Delete", f"Permanently delete {len(pairs)} duplicate files?",
+                                   parent=self.window):
+            return
+        self.submit(f"Delete {len(pairs)} duplicates",
+                    core.delete_duplicates_job(pairs, keys, self.policy),
+                    lambda job: self._finished(job, chosen))
+
+    def link_selected(self):
+        chosen = self._selected_by_set()
+        if not chosen:
+            return
+        pairs, keys = self._pairs(chosen)
+        self.submit(f"Hard-link {len(pairs)} duplicates",
+                    core.link_job(pairs, keys, self.policy),
+                    lambda job: self._finished(job, chosen))
+
+    def _finished(self, job, chosen):
+        skipped = []
+        if job.state == "done":
+            handled, skipped = job.result
+            handled = set(handled)
+        else:
+            # A failed or cancelled job may have handled only some of them
+            handled = {p for selected in chosen.values() for p in selected if not os.path.lexists(p)}
+        if job.state == "failed":
+            messagebox.showerror("Error", f"Could not finish:\n{job.error}", parent=self.window)
+        elif skipped:
+            shown = "\n".join(skipped[:10]) + ("\n..." if len(skipped) > 10 else "")
+            messagebox.showwarning("Duplicates", f"{len(skipped)} files changed since the scan "
+                                   f"and were left alone:\n{shown}", parent=self.window)
+        changed = []
+        for dup, selected in chosen.items():
+            done = [p for p in selected if p in handled]
+            dup.paths = [p for p in dup.paths if p not in done]
+            changed.extend(done)
+        self.on_changed(changed)
+        try:
+            self.fill()
+        except tk.TclError:
+            pass  # the window was closed meanwhile
@@ -0,0 +1,145 @@
+"""Fuzzy matching of typed fragments against paths, for the quick-open palette.
+
+A path matches when the query's characters appear in it in order, ignoring
+case. Its score adds points for every matched character, and bonuses
+when the character starts a word (after a separator or at a camelCase
+hump) or directly follows the previous match. Each gap between matches
+costs a few points. A match that lies entirely in the last path
+component scores higher than one spread over the folders.
+
+The alignment is found the way fzf's fast path does it: the first
+occurrence of each character going forward fixes where the match ends,
+then a backward pass from there finds the shortest window. That costs a
+few str.find calls per path, not a full dynamic program.
+
+Matcher narrows incrementally. When the new query extends the last
+completed one, only the paths that matched before are looked at again.
+"""
+import heapq
+import os
+import re
+from itertools import compress
+
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CAMEL = 7
+BONUS_CONSECUTIVE = 5
+BONUS_FIRST = 2       # the first query character's word bonus counts this many times
+BONUS_BASENAME = 24
+PENALTY_GAP = 3
+PENALTY_GAP_EXTENSION = 1
+SEPARATORS = frozenset("/\\_-. ")
+TOP = 50
+FIRST_CHUNK = 5_000
+CHUNK = 50_000
+
+
+def subsequence_pattern(query):
+    """Regex that finds query as a subsequence, used to reject paths in C.
+
+    "abc" becomes a[^b]*b[^c]*c, which never backtracks.
+    """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        parts.append(f"[^{re.escape(char)}]*{re.escape(char)}")
+    return re.compile("".join(parts))
+
+
+def score(query, folded, path):
+    """Score of folded (path casefolded) for a casefolded query, or None if it does not match"""
+    # Forward: where the earliest complete match ends
+    position = -1
+    for char in query:
+        position = folded.find(char, position + 1)
+        if position < 0:
+            return None
+    # The offsets below index folded. They index path too only when casefold
+    # kept the length ("ß" becomes "ss"); otherwise the camelCase bonus,
+    # which needs the original case, is left out
+    if len(path) != len(folded):
+        path = folded
+    # Backward: the tightest window ending there
+    positions = [0] * len(query)
+    position += 1
+    for i in range(len(query) - 1, -1, -1):
+        position = folded.rfind(query[i], 0, position)
+        positions[i] = position
+
+    total = 0
+    previous = -2
+    for i, p in enumerate(positions):
+        total += SCORE_MATCH
+        before = path[p - 1] if p > 0 else "/"
+        if before in SEPARATORS:
+            bonus = BONUS_BOUNDARY
+        elif before.islower() and path[p].isupper():
+            bonus = BONUS_CAMEL
+        else:
+            bonus = 0
+        if i == 0:
+            bonus *= BONUS_FIRST
+        if p == previous + 1:
+            bonus = max(bonus, BONUS_CONSECUTIVE)
+        elif i > 0:
+            total -= PENALTY_GAP + PENALTY_GAP_EXTENSION * (p - previous - 2)
+        total += bonus
+        previous = p
+    if positions[0] > path.rfind(os.sep, 0, len(path) - 1):
+        total += BONUS_BASENAME
+    return total
+
+
+class Matcher:
+    """Ranks a fixed list of paths against a query that changes as the user types"""
+
+    def __init__(self, paths, folded, boosts=None):
+        self.paths = paths      # original paths
+        self.folded = folded    # the same, casefolded
+        self.boosts = boosts or {}  # row -> extra points, e.g. for frecent paths
+        # (query, rows that matched it) of the last pass that completed. Set
+        # as one tuple, as a cancelled pass may still be finishing on its thread
+        self.last = (None, None)
+
+    def candidates(self, query):
+        """Rows worth scoring for query: the last matches if query extends the last query"""
+        last_query, matched = self.last
+        if last_query and query.startswith(last_query):
+            return matched
+        return range(len(self.paths))
+
+    def run(self, query, cancel_event=None):
+        """Yield the TOP best (score, row) pairs so far after every chunk of rows.
+
+        The first chunk is small, so the first results come quickly from
+        the front of the list, where the caller keeps the likeliest paths.
+        The last list yielded is the final result, unless cancel_event was
+        set, in which case the generator just stops.
+        """
+        query = query.casefold()
+        if not query:
+            yield []
+            return
+        rows = self.candidates(query)
+        search = subsequence_pattern(query).search
+        folded, paths, boosts = self.folded, self.paths, self.boosts
+        matched = []
+        best = []
+        start = 0
+        chunk = FIRST_CHUNK
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            block = rows[start:start + chunk]
+            # The regex runs over the whole block in C; only survivors reach score()
+            hits = list(compress(block, map(search, map(folded.__getitem__, block))))
+            matched.extend(hits)
+            # Ties go to the shorter path
+            scored = [(score(query, folded[row], paths[row]) + boosts.get(row, 0), -len(paths[row]), row)
+                      for row in hits]
+            best = heapq.nlargest(TOP, best + scored)
+            yield [(s, row) for s, _, row in best]
+            start += chunk
+            if start >= len(rows):
+                break
+            chunk = CHUNK
+        self.last = (query, matched)
@@ -0,0 +1,267 @@
+"""Searching file contents below a folder.
+
+A walker thread lists the tree with os.scandir and skips ignored names,
+files over the size limit and folders below the depth limit. It hands
+the files to a process pool in small batches, so the matching runs on
+every core. Each worker maps its file with mmap and runs a bytes regex
+over it. A file whose first block contains a NUL byte is treated as
+binary and skipped. Matches come back to the Tk thread through a queue
+as soon as each batch is done.
+
+Ignore patterns are fnmatch patterns matched against names, plus the
+lines of any .gitignore found on the way. Patterns containing a slash
+are matched against the path relative to that .gitignore. Negations
+and the other finer points of gitignore are not supported.
+"""
+import fnmatch
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_IGNORES = (".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+                   ".tox", ".mypy_cache", "*.pyc", "*.o", "*.so")
+MAX_FILE_SIZE = 20 * 1024 * 1024
+MAX_DEPTH = 32
+MAX_MATCHES_PER_FILE = 100
+MAX_RESULTS = 10_000
+PREVIEW_CHARS = 200
+BINARY_PROBE = 8192
+FILES_PER_BATCH = 64
+MAX_BATCHES_IN_FLIGHT = 32
+POLL_MS = 50
+
+
+def compile_pattern(text, regex=False, ignore_case=True):
+    """Bytes regex for a search string; raises re.error for a bad regex"""
+    source = text.encode("utf-8", "surrogateescape")
+    if not regex:
+        source = re.escape(source)
+    return re.compile(source, re.IGNORECASE if ignore_case else 0)
+
+
+def read_gitignore(folder):
+    """Patterns of folder/.gitignore, or an empty list"""
+    try:
+        with open(os.path.join(folder, ".gitignore"), encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    patterns = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(("#", "!")):
+            patterns.append((folder, line.rstrip("/")))
+    return patterns
+
+
+def is_ignored(path, name, patterns):
+    for base, pattern in patterns:
+        if "/" in pattern:
+            relative = os.path.relpath(path, base).replace(os.sep, "/")
+            if fnmatch.fnmatch(relative, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def walk_files(root, ignores=DEFAULT_IGNORES, max_size=MAX_FILE_SIZE, max_depth=MAX_DEPTH,
+               cancel_event=None):
+    """Yield the paths of the regular files to search below root"""
+    base = [(root, pattern) for pattern in ignores]
+    stack = [(root, 0, base + read_gitignore(root))]
+    while stack:
+        folder, depth, patterns = stack.pop()
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subfolders = []
+        for de in entries:
+            if is_ignored(de.path, de.name, patterns):
+                continue
+            try:
+                if de.is_dir(follow_symlinks=False):
+                    if depth < max_depth:
+                        subfolders.append(de.path)
+                elif de.is_file(follow_symlinks=False) and 0 < de.stat().st_size <= max_size:
+                    yield de.path
+            except OSError:
+                continue
+        for sub in reversed(subfolders):
+            stack.append((sub, depth + 1, patterns + read_gitignore(sub)))
+
+
+def grep_file(path, pattern, max_matches=MAX_MATCHES_PER_FILE):
+    """(line number, preview) of the matching lines of one file"""
+    matches = []
+    try:
+        with open(path, "rb") as f:
+            if b"\0" in f.read(BINARY_PROBE):
+                return matches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                line_no = 1
+                counted = 0  # line_no is the line number at this offset
+                last_line = -1
+                for match in pattern.finditer(data):
+                    start = match.start()
+                    line_no += data[counted:start].count(b"\n")
+                    counted = start
+                    if line_no == last_line:
+                        continue
+                    last_line = line_no
+                    line_start = data.rfind(b"\n", 0, start) + 1
+                    line_end = data.find(b"\n", start)
+                    if line_end < 0:
+                        line_end = len(data)
+                    line_end = min(line_end, line_start + PREVIEW_CHARS * 4)
+                    preview = data[line_start:line_end].decode("utf-8", "replace").strip()
+                    matches.append((line_no, preview[:PREVIEW_CHARS]))
+                    if len(matches) >= max_matches:
+                        break
+    except (OSError, ValueError):
+        pass  # unreadable, or emptied since it was listed
+    return matches
+
+
+def grep_batch(paths, pattern):
+    """Worker: search a batch of files, returning (path, line, preview) tuples"""
+    results = []
+    for path in paths:
+        for line_no, preview in grep_file(path, pattern):
+            results.append((path, line_no, preview))
+    return results
+
+
+def pool_context():
+    # The Tk process has threads running, so workers are not forked from it
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ContentSearch:
+    """Runs one content search at a time and streams its matches to the UI"""
+
+    def __init__(self, widget, workers=None):
+        self.widget = widget
+        self.workers = workers or os.cpu_count() or 2
+        self.pool = None
+        self.cancel_event = None
+        self.results = None
+        self.poll_job = None
+        self.callbacks = None
+        self.files_searched = 0
+
+    def start(self, root, pattern, on_matches, on_done, max_size=MAX_FILE_SIZE,
+              max_depth=MAX_DEPTH, ignores=DEFAULT_IGNORES):
+        """Search the files below root for a compiled bytes pattern.
+
+        on_matches(list of (path, line, preview)) is called as batches
+        finish, then on_done(files_searched, truncated) once.
+        """
+        self.cancel()
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=pool_context())
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
+        self.callbacks = (on_matches, on_done)
+        self.files_searched = 0
+        threading.Thread(
+            target=self._walk,
+            args=(root, pattern, max_size, max_depth, ignores, self.pool, self.results, self.cancel_event),
+            daemon=True,
+        ).start()
+        self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        """Stop the search in progress; matches not yet shown are dropped"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.results = None
+
+    def busy(self):
+        return self.results is not None
+
+    def stop(self):
+        """Cancel and shut the worker processes down"""
+        self.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def _walk(self, root, pattern, max_size, max_depth, ignores, pool, results, cancel_event):
+        # pool is passed in: stop() may drop self.pool, or a later start() replace it
+        in_flight = threading.BoundedSemaphore(MAX_BATCHES_IN_FLIGHT)
+        pending = []
+        found = [0]
+
+        def finished(future):
+            in_flight.release()
+            if future.cancelled() or future.exception() is not None:
+                return
+            matches = future.result()
+            if matches and not cancel_event.is_set():
+                found[0] += len(matches)
+                results.put(("matches", matches))
+            if found[0] >= MAX_RESULTS:
+                cancel_event.set()
+
+        def submit(batch):
+            in_flight.acquire()
+            if cancel_event.is_set():
+                in_flight.release()
+                return
+            future = pool.submit(grep_batch, batch, pattern)
+            future.add_done_callback(finished)
+            pending.append(future)
+            results.put(("count", len(batch)))
+
+        try:
+            batch = []
+            for path in walk_files(root, ignores, max_size, max_depth, cancel_event):
+                batch.append(path)
+                if len(batch) >= FILES_PER_BATCH:
+                    submit(batch)
+                    batch = []
+            if batch and not cancel_event.is_set():
+                submit(batch)
+            for future in pending:
+                if cancel_event.is_set():
+                    future.cancel()
+            for future in pending:
+                if not future.cancelled():
+                    future.exception()  # wait; errors inside a batch are dropped
+        except RuntimeError:
+            return  # the pool was shut down while the view closed
+        results.put(("done", found[0] >= MAX_RESULTS))
+
+    def _poll(self):
+        self.poll_job = None
+        results = self.results
+        on_matches, on_done = self.callbacks
+        while results is self.results:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                self.poll_job = self.widget.after(POLL_MS, self._poll)
+                return
+            if kind == "matches":
+                on_matches(payload)
+            elif kind == "count":
+                self.files_searched += payload
+            else:
+                self.results = None
+                self.cancel_event = None
+                on_done(self.files_searched, payload)
+                return
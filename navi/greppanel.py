@@ -0,0 +1,141 @@
+"""Panel below the grid for searching file contents under the current folder"""
+import os
+import re
+import tkinter as tk
+from tkinter import ttk
+
+from navi.grep import ContentSearch, compile_pattern, MAX_DEPTH, MAX_FILE_SIZE
+
+PANEL_BG = "#34495e"
+
+
+class GrepPanel:
+    """Search box, limits and a streaming list of (file, line, preview) matches"""
+
+    def __init__(self, parent, before, get_root, on_open):
+        self.get_root = get_root
+        self.on_open = on_open  # on_open(path) when a match is double-clicked
+        self.search = ContentSearch(parent)
+        self.visible = False
+        self.before = before
+        self.root = None
+        self.match_count = 0
+        self.paths = {}  # tree row id -> path
+
+        self.frame = tk.Frame(parent, bg=PANEL_BG, height=260)
+        self.frame.pack_propagate(False)
+        controls = tk.Frame(self.frame, bg=PANEL_BG)
+        controls.pack(fill="x", padx=10, pady=(8, 4))
+        tk.Label(controls, text="Search in files", bg=PANEL_BG, fg="white",
+                 font=("Segoe UI", 12, "bold")).pack(side="left")
+        self.pattern_var = tk.StringVar()
+        pattern_entry = tk.Entry(controls, textvariable=self.pattern_var, font=("Segoe UI", 11),
+                                 bg="#2c3e50", fg="white", insertbackground="white", width=30)
+        pattern_entry.pack(side="left", padx=8)
+        pattern_entry.bind("<Return>", lambda e: self.start())
+        self.regex_var = tk.BooleanVar()
+        self.case_var = tk.BooleanVar()
+        for text, var in (("Regex", self.regex_var), ("Match case", self.case_var)):
+            tk.Checkbutton(controls, text=text, variable=var, bg=PANEL_BG, fg="white",
+                           selectcolor="#2c3e50", activebackground=PANEL_BG,
+                           activeforeground="white", font=("Segoe UI", 10)).pack(side="left")
+        tk.Label(controls, text="Max MB", bg=PANEL_BG, fg="white",
+                 font=("Segoe UI", 10)).pack(side="left", padx=(8, 2))
+        self.size_var = tk.StringVar(value=str(MAX_FILE_SIZE // (1024 * 1024)))
+        tk.Spinbox(controls, from_=1, to=4096, width=5, textvariable=self.size_var).pack(side="left")
+        tk.Label(controls, text="Depth", bg=PANEL_BG, fg="white",
+                 font=("Segoe UI", 10)).pack(side="left", padx=(8, 2))
+        self.depth_var = tk.StringVar(value=str(MAX_DEPTH))
+        tk.Spinbox(controls, from_=0, to=256, width=4, textvariable=self.depth_var).pack(side="left")
+        tk.Button(controls, text="Hide", command=self.hide, bd=0, bg="#4a6d8c", fg="black",
+                  font=("Segoe UI", 9, "bold"), cursor="hand2").pack(side="right")
+        self.stop_btn = tk.Button(controls, text="Stop", command=self.cancel, bd=0, bg="#e74c3c",
+                                  fg="black", font=("Segoe UI", 9, "bold"), cursor="hand2")
+        self.stop_btn.pack(side="right", padx=5)
+        tk.Button(controls, text="Search", command=self.start, bd=0, bg="#4a6d8c", fg="black",
+                  font=("Segoe UI", 9, "bold"), cursor="hand2").pack(side="right")
+
+        self.status = tk.Label(self.frame, text="", bg=PANEL_BG, fg="white", anchor="w",
+                               font=("Segoe UI", 9))
+        self.status.pack(fill="x", padx=10)
+
+        table = tk.Frame(self.frame, bg=PANEL_BG)
+        table.pack(fill="both", expand=True, padx=10, pady=(2, 8))
+        self.tree = ttk.Treeview(table, columns=("line", "preview"), selectmode="browse")
+        self.tree.heading("#0", text="File")
+        self.tree.heading("line", text="Line")
+        self.tree.heading("preview", text="Preview")
+        self.tree.column("#0", width=260)
+        self.tree.column("line", width=60, anchor="e", stretch=False)
+        self.tree.column("preview", width=500)
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+    def show(self):
+        if not self.visible:
+            self.frame.pack(side="bottom", fill="x", before=self.before)
+            self.visible = True
+
+    def hide(self):
+        self.cancel()
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def start(self):
+        text = self.pattern_var.get()
+        self.root = self.get_root()
+        if not text or not self.root:
+            return
+        try:
+            pattern = compile_pattern(text, self.regex_var.get(), not self.case_var.get())
+            max_size = int(float(self.size_var.get()) * 1024 * 1024)
+            max_depth = int(self.depth_var.get())
+        except re.error as e:
+            self.status.config(text=f"Invalid pattern: {e}")
+            return
+        except ValueError:
+            self.status.config(text="Max MB and Depth must be numbers")
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.paths = {}
+        self.match_count = 0
+        self.status.config(text=f"Searching {self.root} ...")
+        self.search.start(self.root, pattern, self._on_matches, self._on_done,
+                          max_size=max_size, max_depth=max_depth)
+
+    def cancel(self):
+        if self.search.busy():
+            self.search.cancel()
+            self.status.config(text=f"Stopped, {self.match_count:,} matches")
+
+    def stop(self):
+        """Shut the search workers down when the view closes"""
+        self.search.stop()
+
+    def _on_matches(self, matches):
+        for path, line_no, preview in matches:
+            shown = os.path.relpath(path, self.root)
+            row = self.tree.insert("", "end", text=shown, values=(line_no, preview))
+            self.paths[row] = path
+        self.match_count += len(matches)
+        self.status.config(text=f"Searching... {self.match_count:,} matches "
+                                f"in {self.search.files_searched:,} files")
+
+    def _on_done(self, files_searched, truncated):
+        note = " (stopped at the result limit)" if truncated else ""
+        self.status.config(text=f"{self.match_count:,} matches in {files_searched:,} files{note}")
+
+    def _on_double_click(self, event):
+        row = self.tree.focus()
+        if row in self.paths:
+            self.on_open(self.paths[row])
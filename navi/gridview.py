@@ -0,0 +1,270 @@
+"""Virtualized icon grid drawn straight onto a tk.Canvas.
+
+Only the rows currently in view get canvas items. The items are kept in a
+pool and reused as the user scrolls, so drawing cost and memory depend on
+the size of the window and not on the number of entries in the folder.
+
+Items can be selected with ctrl-click (toggle), shift-click (range) or by
+dragging a rubber band. The selection is kept as a set of paths.
+"""
+
+BG_COLOR = "#2c3e50"
+TEXT_COLOR = "white"
+SELECTED_COLOR = "#3d566e"
+SELECTED_OUTLINE = "#5dade2"
+FONT = ("Segoe UI", 10)
+MAX_LABEL_CHARS = 40
+DRAG_THRESHOLD = 5
+
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+
+def shorten(name, limit=MAX_LABEL_CHARS):
+    """Cut long names so a label never spills into the next row"""
+    if len(name) <= limit:
+        return name
+    return name[:limit - 1] + "…"
+
+
+class VirtualGrid:
+    """Recycling grid of icon + label cells on a canvas"""
+
+    def __init__(self, canvas, scrollbar, get_icon, on_click,
+                 columns=4, cell_width=150, cell_height=120, icon_size=48):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.get_icon = get_icon
+        self.on_click = on_click
+        self.columns = columns
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.icon_size = icon_size
+
+        self.items = []
+        self.pool = []  # (highlight_id, image_id, text_id) reused between rows
+        self.drawn = []  # (entry, index, selected) shown by each pool slot, None if hidden
+        self.window = None  # (start, end) indices currently drawn
+
+        self.selected = set()  # paths
+        self.anchor = None  # index shift-click ranges start from
+        self.press = None  # (x, y, index, state) of the current button press
+        self.band_base = None  # selection before the rubber band started
+        self.band_id = None
+        self.active = True  # False while another view (the treemap) owns the canvas
+
+        canvas.configure(yscrollcommand=self._on_scroll)
+        canvas.bind("<Configure>", lambda e: self.refresh())
+        canvas.bind("<ButtonPress-1>", self._on_press)
+        canvas.bind("<B1-Motion>", self._on_drag)
+        canvas.bind("<ButtonRelease-1>", self._on_release)
+
+    def set_items(self, items, keep_scroll=False):
+        """Show a new list of entries, scrolled back to the top unless keep_scroll"""
+        self.items = list(items)
+        self.window = None
+        self.anchor = None
+        if self.selected:
+            self.selected &= {e.path for e in self.items}
+        self._update_scrollregion()
+        if not keep_scroll:
+            self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def add_items(self, entries):
+        """Append entries while a folder is still being read"""
+        self.items.extend(entries)
+        self.window = None
+        self._update_scrollregion()
+        self.refresh()
+
+    def _update_scrollregion(self):
+        if not self.active:
+            return
+        rows = (len(self.items) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_width,
+                                            rows * self.cell_height))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def visible_range(self):
+        """Indices of the first and one-past-last entry in view"""
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_height)
+        first_row = max(0, int(top // self.cell_height))
+        last_row = int((top + height) // self.cell_height)
+        start = first_row * self.columns
+        end = min(len(self.items), (last_row + 1) * self.columns)
+        return start, max(start, end)
+
+    def refresh(self):
+        """Point the pooled cells at the entries in view"""
+        if not self.active:
+            return
+        start, end = self.visible_range()
+        if (start, end) == self.window:
+            return
+        self.window = (start, end)
+
+        needed = end - start
+        while len(self.pool) < needed:
+            highlight_id = self.canvas.create_rectangle(0, 0, 0, 0, fill=SELECTED_COLOR,
+                                                        outline=SELECTED_OUTLINE, state="hidden")
+            image_id = self.canvas.create_image(0, 0, anchor="n")
+            text_id = self.canvas.create_text(0, 0, anchor="n", fill=TEXT_COLOR, font=FONT,
+                                              width=self.cell_width - 30, justify="center")
+            self.pool.append((highlight_id, image_id, text_id))
+            self.drawn.append(None)
+
+        for slot, index in enumerate(range(start, end)):
+            entry = self.items[index]
+            selected = entry.path in self.selected
+            drawn = self.drawn[slot]
+            if drawn is not None and drawn[0] is entry and drawn[1] == index and drawn[2] == selected:
+                continue  # cell already shows this entry
+            self.drawn[slot] = (entry, index, selected)
+            highlight_id, image_id, text_id = self.pool[slot]
+            left = (index % self.columns) * self.cell_width
+            top = (index // self.columns) * self.cell_height
+            x = left + self.cell_width // 2
+            y = top + 10
+            self.canvas.coords(highlight_id, left + 5, top + 4,
+                               left + self.cell_width - 5, top + self.cell_height - 4)
+            self.canvas.itemconfigure(highlight_id, state="normal" if selected else "hidden")
+            self.canvas.coords(image_id, x, y)
+            self.canvas.itemconfigure(image_id, image=self.get_icon(entry), state="normal")
+            self.canvas.coords(text_id, x, y + self.icon_size + 4)
+            self.canvas.itemconfigure(text_id, text=shorten(entry.name), state="normal")
+
+        for slot in range(needed, len(self.pool)):
+            if self.drawn[slot] is None:
+                continue
+            self.drawn[slot] = None
+            for item_id in self.pool[slot]:
+                self.canvas.itemconfigure(item_id, state="hidden")
+
+    def suspend(self):
+        """Hide every cell and ignore input until resume()"""
+        self.active = False
+        self.press = None
+        for slot, drawn in enumerate(self.drawn):
+            if drawn is not None:
+                self.drawn[slot] = None
+                for item_id in self.pool[slot]:
+                    self.canvas.itemconfigure(item_id, state="hidden")
+        self.window = None
+
+    def resume(self):
+        self.active = True
+        self._update_scrollregion()
+        self.redraw()
+
+    def redraw(self):
+        """Draw the cells in view again, e.g. after the selection changed"""
+        self.window = None
+        self.refresh()
+
+    def redraw_icons(self):
+        """Ask get_icon again for every cell in view, e.g. once thumbnails are ready"""
+        for slot, drawn in enumerate(self.drawn):
+            if drawn is not None:
+                self.canvas.itemconfigure(self.pool[slot][1], image=self.get_icon(drawn[0]))
+
+    def index_at(self, x, y):
+        """Entry index under a canvas-relative point, or None"""
+        cx = self.canvas.canvasx(x)
+        cy = self.canvas.canvasy(y)
+        column = int(cx // self.cell_width)
+        if cx < 0 or cy < 0 or column >= self.columns:
+            return None
+        index = int(cy // self.cell_height) * self.columns + column
+        if index >= len(self.items):
+            return None
+        return index
+
+    def selection(self):
+        """Selected entries in display order"""
+        if not self.selected:
+            return []
+        return [e for e in self.items if e.path in self.selected]
+
+    def clear_selection(self):
+        if self.selected:
+            self.selected = set()
+            self.redraw()
+
+    def select_only(self, index):
+        self.selected = {self.items[index].path}
+        self.anchor = index
+        self.redraw()
+
+    def _on_press(self, event):
+        if not self.active:
+            return
+        self.press = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y),
+                      self.index_at(event.x, event.y), event.state)
+
+    def _on_drag(self, event):
+        if self.press is None:
+            return
+        x0, y0, _, state = self.press
+        x1, y1 = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        if self.band_base is None:
+            if abs(x1 - x0) < DRAG_THRESHOLD and abs(y1 - y0) < DRAG_THRESHOLD:
+                return
+            # Ctrl-drag adds to the selection, a plain drag replaces it
+            self.band_base = set(self.selected) if state & CONTROL_MASK else set()
+            self.band_id = self.canvas.create_rectangle(x0, y0, x1, y1, outline=SELECTED_OUTLINE,
+                                                        dash=(3, 2))
+        self.canvas.coords(self.band_id, x0, y0, x1, y1)
+        self.selected = self.band_base | self._paths_in_box(x0, y0, x1, y1)
+        self.redraw()
+
+    def _paths_in_box(self, x0, y0, x1, y1):
+        left, right = sorted((x0, x1))
+        top, bottom = sorted((y0, y1))
+        first_col = max(0, int(left // self.cell_width))
+        last_col = min(self.columns - 1, int(right // self.cell_width))
+        first_row = max(0, int(top // self.cell_height))
+        last_row = int(bottom // self.cell_height)
+        paths = set()
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                index = row * self.columns + col
+                if index < len(self.items):
+                    paths.add(self.items[index].path)
+        return paths
+
+    def _on_release(self, event):
+        press = self.press
+        self.press = None
+        if self.band_base is not None:
+            self.band_base = None
+            self.canvas.delete(self.band_id)
+            self.band_id = None
+            return
+        if press is None:
+            return
+        index, state = press[2], press[3]
+        if index is None:
+            self.clear_selection()
+            return
+        entry = self.items[index]
+        if state & SHIFT_MASK and self.anchor is not None:
+            low, high = sorted((self.anchor, index))
+            if not state & CONTROL_MASK:
+                self.selected = set()
+            self.selected.update(e.path for e in self.items[low:high + 1])
+            self.redraw()
+        elif state & CONTROL_MASK:
+            self.selected ^= {entry.path}
+            self.anchor = index
+            self.redraw()
+        else:
+            # A plain click keeps a multi-selection it lands in, so the
+            # menu can act on all of it
+            if entry.path not in self.selected:
+                self.select_only(index)
+            self.on_click(event, entry)
@@ -0,0 +1,272 @@
+"""Visited folders and opened files, kept between runs and ranked by frecency.
+
+Every visit is first appended as one JSON line to history.log and
+flushed, so a crash loses at most the line being written. Every
+COMPACT_EVERY visits, and at start-up and exit, the log is folded into
+the SQLite database history.db and then truncated. The database
+remembers the time of the last record it took in, so a log that
+survived a crash between the two steps is not counted twice. Several
+processes, like the GUI and `python -m navi recent`, may share the log:
+appends and compactions hold an flock on it, and a compaction first
+takes in the lines other processes appended.
+
+A path's frecency is a count of visits that decays exponentially with a
+half-life of HALF_LIFE. Only the decayed score and the time of the last
+visit need to be stored, and a visit is an O(1) update. All entries are
+also kept in memory, so a ranked or fuzzy query scans a list of tens of
+thousands of paths and does not touch the disk.
+
+Whether a path still exists is checked on a background thread after
+loading, most frecent first. Paths found missing are hidden from
+results but kept, because an unmounted drive may come back. A path
+visited again is shown again.
+"""
+import atexit
+import heapq
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: processes sharing the log are not coordinated
+    fcntl = None
+
+from navi.settings import data_path
+from navi.shared import process_wide
+
+FOLDER = "folder"
+FILE = "file"
+
+HALF_LIFE = 7 * 24 * 3600   # seconds for a visit to count half as much
+COMPACT_EVERY = 200         # log lines before they are folded into the database
+MAX_ENTRIES = 50_000        # least frecent entries beyond this are dropped on compaction
+BACK_LIMIT = 100            # folders the Back button remembers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    score REAL NOT NULL,
+    last REAL NOT NULL,
+    count INTEGER NOT NULL,
+    missing INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL);
+"""
+
+
+class Visit:
+    """Frecency of one path"""
+
+    __slots__ = ("path", "folded", "kind", "score", "last", "count", "missing", "order")
+
+    def __init__(self, path, kind, score=0.0, last=0.0, count=0, missing=False):
+        self.path = path
+        self.folded = path.casefold()
+        self.kind = kind
+        self.score = score
+        self.last = last
+        self.count = count
+        self.missing = missing
+        self.order = self._order()
+
+    def _order(self):
+        # log2 of the rank at time 0. Every rank decays at the same rate,
+        # so this orders visits like their rank at any time, without pow()
+        return math.log2(self.score) + self.last / HALF_LIFE if self.score > 0 else -math.inf
+
+    def rank(self, now):
+        return self.score * 0.5 ** ((now - self.last) / HALF_LIFE)
+
+    def add(self, when):
+        self.score = self.rank(when) + 1.0
+        self.last = max(self.last, when)
+        self.count += 1
+        self.missing = False
+        self.order = self._order()
+
+
+def fuzzy_match(folded_path, terms):
+    """0 if the terms do not appear in order in the path, 2 if the last one is
+    in the final path component, else 1"""
+    position = 0
+    for term in terms:
+        found = folded_path.find(term, position)
+        if found < 0:
+            return 0
+        position = found + len(term)
+    return 2 if terms[-1] in folded_path[folded_path.rfind(os.sep) + 1:] else 1
+
+
+def by_order(visit):
+    return visit.order
+
+
+class HistoryStore:
+    """Persistent, ranked history of folders and files"""
+
+    def __init__(self, db_path=None, log_path=None):
+        self.db_path = db_path or data_path("history.db")
+        self.log_path = log_path or data_path("history.log")
+        self.lock = threading.Lock()
+        self.visits = {}  # path -> Visit
+        self.dirty = set()  # paths changed since the last compaction
+        self.writer = os.urandom(6).hex()  # marks this store's own log lines
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'applied'").fetchone()
+        self.applied = row[0] if row else 0.0
+        for path, kind, score, last, count, missing in self.conn.execute("SELECT * FROM visits"):
+            self.visits[path] = Visit(path, kind, score, last, count, bool(missing))
+        self.log = open(self.log_path, "a", encoding="utf-8")
+        self.compact()
+        self.checked = threading.Event()
+        threading.Thread(target=self._check_existence, daemon=True).start()
+
+    @contextmanager
+    def _locked_log(self):
+        """Hold the log's flock, so no other process appends or compacts meanwhile"""
+        if fcntl is not None:
+            fcntl.flock(self.log.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.log.fileno(), fcntl.LOCK_UN)
+
+    def _replay(self):
+        """Apply log lines of other stores the database has not taken in"""
+        try:
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        when, kind, path = record["t"], record["kind"], record["path"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # a line cut short by a crash
+                    if when > self.applied and record.get("by") != self.writer:
+                        self._apply(path, kind, when)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, path, kind, when):
+        with self.lock:
+            visit = self.visits.get(path)
+            if visit is None:
+                visit = self.visits[path] = Visit(path, kind)
+            visit.kind = kind
+            visit.add(when)
+            self.dirty.add(path)
+
+    def visit(self, path, kind=FOLDER):
+        """Record that a folder was opened or a file was launched"""
+        path = os.path.abspath(path)
+        when = time.time()
+        self._apply(path, kind, when)
+        with self._locked_log():
+            self.log.write(json.dumps({"t": when, "kind": kind, "path": path, "by": self.writer}) + "\n")
+            self.log.flush()
+        self.pending += 1
+        if self.pending >= COMPACT_EVERY:
+            self.compact()
+
+    def mark_missing(self, path):
+        """Hide a path found gone, e.g. when it was picked from a list"""
+        with self.lock:
+            visit = self.visits.get(path)
+            if visit is not None:
+                visit.missing = True
+                self.dirty.add(path)
+
+    def compact(self):
+        """Fold the log into the database and empty it"""
+        with self._locked_log():
+            self._replay()
+            self._compact()
+        self.pending = 0
+
+    def _compact(self):
+        with self.lock:
+            dropped = []
+            if len(self.visits) > MAX_ENTRIES:
+                ordered = sorted(self.visits.values(), key=by_order, reverse=True)
+                dropped = [(v.path,) for v in ordered[MAX_ENTRIES:]]
+                for (path,) in dropped:
+                    del self.visits[path]
+            changed = [self.visits[p] for p in self.dirty if p in self.visits]
+            self.dirty = set()
+        rows = [(v.path, v.kind, v.score, v.last, v.count, int(v.missing)) for v in changed]
+        with self.conn:
+            self.conn.executemany("DELETE FROM visits WHERE path = ?", dropped)
+            self.conn.executemany("INSERT OR REPLACE INTO visits VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.applied = max([self.applied] + [v.last for v in changed])
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('applied', ?)", (self.applied,))
+        # Only now is it safe to lose the log
+        self.log.truncate(0)
+        self.log.seek(0)
+
+    def close(self):
+        if self.log.closed:
+            return
+        self.compact()
+        self.log.close()
+        self.conn.close()
+
+    def _check_existence(self):
+        with self.lock:
+            ordered = sorted(self.visits.values(), key=by_order, reverse=True)
+        for visit in ordered:
+            missing = not os.path.exists(visit.path)
+            if missing != visit.missing:
+                with self.lock:
+                    visit.missing = missing
+                    self.dirty.add(visit.path)
+        self.checked.set()
+
+    def ranked(self, kind=None, limit=50):
+        """Most frecent paths of a kind (or of both), missing ones left out"""
+        with self.lock:
+            visits = [v for v in self.visits.values()
+                      if not v.missing and (kind is None or v.kind == kind)]
+        return heapq.nlargest(limit, visits, key=by_order)
+
+    def jump(self, query, kind=None, limit=50):
+        """Paths containing the words of query in order, most frecent first.
+
+        Matches with the last word in the final path component come
+        before the others, so "doc rep" finds ~/Documents/reports first.
+        """
+        terms = query.casefold().split()
+        if not terms:
+            return self.ranked(kind, limit)
+        longest = max(terms, key=len)
+        with self.lock:
+            # A plain substring test on the longest word drops most paths cheaply
+            visits = [v for v in self.visits.values() if longest in v.folded]
+        matches = []
+        for v in visits:
+            if v.missing or (kind is not None and v.kind != kind):
+                continue
+            quality = fuzzy_match(v.folded, terms)
+            if quality:
+                matches.append((quality, v.order, v))
+        return [v for _, _, v in heapq.nlargest(limit, matches, key=lambda m: (m[0], m[1]))]
+
+    def paths(self):
+        """Every known path that is not missing"""
+        with self.lock:
+            return [v.path for v in self.visits.values() if not v.missing]
+
+
+@process_wide
+def shared_history():
+    """Process-wide HistoryStore, folded into its database at exit"""
+    store = HistoryStore()
+    atexit.register(store.close)
+    return store
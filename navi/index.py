@@ -0,0 +1,254 @@
+"""Persistent recursive filename index.
+
+Folders are crawled on a background thread and every name below them is
+stored in a SQLite database with an FTS5 trigram table, which answers
+substring queries over millions of paths without scanning them all.
+
+Each indexed folder remembers its own mtime. A folder's mtime changes when
+an entry is added, removed or renamed in it, so on the next crawl folders
+with an unchanged mtime are not listed again; only their sub-folders are
+visited. A restart therefore costs one stat per folder instead of a full
+rescan. Size and date of a file are refreshed when its folder changes.
+
+Only the crawler thread writes to the database. The connection of the
+UI thread is read-only, so a search never waits on the crawl's locks.
+"""
+import os
+import queue
+import sqlite3
+import threading
+
+from navi.dirmodel import Entry
+from navi.settings import data_path
+from navi.shared import process_wide
+
+# Kernel pseudo filesystems, never worth indexing
+SKIP_DIRS = {"/proc", "/sys", "/dev", "/run"}
+COMMIT_EVERY = 200  # folders per transaction while crawling
+PATH_END = "\U0010ffff"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    path TEXT NOT NULL UNIQUE,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_name ON files(name);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names
+    USING fts5(name, content='files', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+def subtree_range(path):
+    """Bounds of every path strictly below path, for range queries"""
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix + PATH_END
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+        has_fts = True
+    except sqlite3.OperationalError:
+        # SQLite older than 3.34 has no trigram tokenizer, fall back to LIKE
+        has_fts = False
+    conn.commit()
+    return conn, has_fts
+
+
+class FileIndex:
+    """On-disk index of names under a set of root folders"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or data_path("index.db")
+        self.conn, self.has_fts = connect(self.db_path)
+        self.conn.execute("PRAGMA query_only=1")
+        self.roots = [r for (r,) in self.conn.execute("SELECT path FROM roots")]
+        self.jobs = queue.Queue()  # (root, remember) for the crawler, None to stop
+        self.stop_event = threading.Event()
+        self.worker = None
+
+    def start(self, roots=()):
+        """Crawl every remembered root and the given ones once in the background.
+
+        The given roots are indexed for this run only; add_root remembers one.
+        """
+        for root in roots:
+            root = os.path.abspath(root)
+            if root not in self.roots:
+                self.roots.append(root)
+        for root in self.top_roots():
+            self.jobs.put((root, False))
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+
+    def add_root(self, path):
+        """Index a folder chosen by the user, and again on later runs"""
+        path = os.path.abspath(path)
+        if not self.covers(path):
+            self.roots.append(path)
+            # Stored by the crawler, the UI thread does not write to the database
+            self.jobs.put((path, True))
+        if self.worker is None:
+            self.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.jobs.put(None)
+
+    def covers(self, path):
+        """True if path is inside one of the indexed roots"""
+        path = os.path.abspath(path)
+        return any(path == r or path.startswith(r.rstrip(os.sep) + os.sep) for r in self.roots)
+
+    def top_roots(self):
+        """Roots that are not inside another root"""
+        return [r for r in self.roots
+                if not any(o != r and r.startswith(o.rstrip(os.sep) + os.sep) for o in self.roots)]
+
+    def paths(self):
+        """Every indexed path. Uses its own connection, so any thread may call it"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [path for (path,) in conn.execute("SELECT path FROM files")]
+        finally:
+            conn.close()
+
+    def search(self, query, under=None, prefix=False, limit=500):
+        """Entries whose name contains query (or starts with it if prefix)
+
+        Results can be limited to the subtree of under.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        sql = "SELECT f.name, f.path, f.is_dir, f.size, f.mtime FROM files f"
+        where = []
+        params = []
+        if prefix:
+            where.append("f.name LIKE ? ESCAPE '\\'")
+            params.append(escape_like(query) + "%")
+        elif self.has_fts and len(query) >= 3:
+            sql += " JOIN names ON names.rowid = f.id"
+            where.append("names MATCH ?")
+            params.append('"' + query.replace('"', '""') + '"')
+        else:
+            where.append("f.name LIKE ? ESCAPE '\\'")
+            params.append("%" + escape_like(query) + "%")
+        if under:
+            low, high = subtree_range(os.path.abspath(under))
+            where.append("f.path >= ? AND f.path < ?")
+            params.extend((low, high))
+        sql += " WHERE " + " AND ".join(where) + " LIMIT ?"
+        params.append(limit)
+        return [Entry(name, path, bool(is_dir), size, mtime)
+                for name, path, is_dir, size, mtime in self.conn.execute(sql, params)]
+
+    def _run(self):
+        conn, _ = connect(self.db_path)
+        while not self.stop_event.is_set():
+            job = self.jobs.get()
+            if job is None:
+                break
+            root, remember = job
+            try:
+                if remember:
+                    conn.execute("INSERT OR IGNORE INTO roots(path) VALUES (?)", (root,))
+                self._crawl(conn, root)
+            except sqlite3.Error:
+                conn.rollback()
+            conn.commit()
+
+    def _crawl(self, conn, root):
+        stack = [root]
+        pending = 0
+        while stack:
+            if self.stop_event.is_set():
+                return
+            folder = stack.pop()
+            if folder in SKIP_DIRS:
+                continue
+            try:
+                mtime = os.stat(folder).st_mtime
+            except OSError:
+                forget_subtree(conn, folder)
+                continue
+            row = conn.execute("SELECT mtime FROM dirs WHERE path = ?", (folder,)).fetchone()
+            if row is not None and row[0] == mtime:
+                # Unchanged since the last crawl, only look at its sub-folders
+                stack.extend(p for (p,) in conn.execute(
+                    "SELECT path FROM files WHERE dir = ? AND is_dir = 1", (folder,)))
+            else:
+                stack.extend(reindex_folder(conn, folder, mtime))
+            pending += 1
+            if pending >= COMMIT_EVERY:
+                conn.commit()
+                pending = 0
+
+
+@process_wide
+def shared_index():
+    """Process-wide FileIndex, so switching views does not restart the crawl"""
+    return FileIndex()
+
+
+def escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def forget_subtree(conn, folder):
+    """Drop a folder and everything below it from the index"""
+    low, high = subtree_range(folder)
+    conn.execute("DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)", (folder, low, high))
+    conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (folder, low, high))
+
+
+def reindex_folder(conn, folder, mtime):
+    """List one folder again and return its sub-folders"""
+    rows = []
+    subdirs = []
+    try:
+        with os.scandir(folder) as it:
+            for de in it:
+                try:
+                    is_dir = de.is_dir(follow_symlinks=False)
+                    st = de.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    subdirs.append(de.path)
+                rows.append((folder, de.name, de.path, int(is_dir),
+                             0 if is_dir else st.st_size, st.st_mtime))
+    except OSError:
+        return []
+
+    old_dirs = {p for (p,) in conn.execute(
+        "SELECT path FROM files WHERE dir = ? AND is_dir = 1", (folder,))}
+    for gone in old_dirs.difference(subdirs):
+        forget_subtree(conn, gone)
+    conn.execute("DELETE FROM files WHERE dir = ?", (folder,))
+    conn.executemany(
+        "INSERT INTO files(dir, name, path, is_dir, size, mtime) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("INSERT OR REPLACE INTO dirs(path, mtime) VALUES (?, ?)", (folder, mtime))
+    return subdirs
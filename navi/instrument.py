@@ -0,0 +1,214 @@
+"""Timing of folder opens, sorts and searches, for finding slow spots.
+
+Each user action is one record: the folder, the kind of action (open,
+sort or search) and the time spent in its phases:
+
+  list    reading the folder, or taking it from the cache
+  sort    building the sort order
+  filter  applying the search text
+  render  handing the result to the grid
+  total   from the click until Tk was idle again
+
+While recording is enabled, every record also counts the folder reads
+(scandir), stat calls and directory entries of navi's own listing code:
+scan_dir, entry_from_path, the folder loader and the folder cache. The
+os module itself is left alone, so calls made elsewhere are not counted.
+The counters are process-wide, so a listing running in the background
+at the same time is included.
+
+Records are appended to a rotating JSONL file in the explorer's data
+folder. Recording is off by default. It is turned on by setting NAVI_PERF=1
+or by showing the overlay (F12). With NAVI_PROFILE=1, every action also
+runs under cProfile and tracemalloc. The profile and the top memory
+allocations of the slowest action so far are saved as slowest.prof and
+slowest_memory.txt.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+from navi.settings import data_path
+from navi.shared import process_wide
+
+HISTORY = 20
+LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+COUNTED = ("scandir", "stat", "entries")
+MEMORY_TOP = 25
+
+_counts = dict.fromkeys(COUNTED, 0)
+_counts_lock = threading.Lock()
+_counting = False
+
+
+def count(name, amount=1):
+    """Add to one of the COUNTED counters; a no-op while recording is off"""
+    if _counting:
+        with _counts_lock:
+            _counts[name] += amount
+
+
+def count_entries(amount):
+    """Count directory entries read through entry_from_dirent, one stat each"""
+    if _counting:
+        with _counts_lock:
+            _counts["entries"] += amount
+            _counts["stat"] += amount
+
+
+def _start_counting():
+    global _counting
+    _counting = True
+
+
+def call_counts():
+    with _counts_lock:
+        return dict(_counts)
+
+
+class Record:
+    """Phases of one user action"""
+
+    __slots__ = ("path", "kind", "started", "phases", "calls", "profile", "peak", "superseded")
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.calls = call_counts()
+        self.profile = None
+        self.peak = 0
+        self.superseded = False
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def total(self):
+        return self.phases.get("total", time.perf_counter() - self.started)
+
+    def as_dict(self):
+        return {
+            "time": time.time(),
+            "path": self.path,
+            "kind": self.kind,
+            "ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "calls": self.calls,
+            "peak_kb": self.peak // 1024,
+            "superseded": self.superseded,
+        }
+
+
+class Recorder:
+    """Collects records, logs them and keeps the last HISTORY for the overlay"""
+
+    def __init__(self):
+        self.enabled = False
+        self.profiling = False
+        self.current = None
+        self.history = deque(maxlen=HISTORY)
+        self.listeners = []  # listener(record) after each finished record
+        self.slowest = 0.0
+        self.log = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        _start_counting()
+        self.log = logging.getLogger("navi.perf")
+        self.log.propagate = False
+        if not self.log.handlers:
+            handler = RotatingFileHandler(data_path("perf.jsonl"), maxBytes=LOG_BYTES,
+                                          backupCount=LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+        if os.environ.get("NAVI_PROFILE"):
+            self.profiling = True
+            tracemalloc.start()
+
+    def begin(self, path, kind="open"):
+        """Start recording an action; returns its record, or None.
+
+        A sort or search that is part of a running open is timed as a
+        phase of that open instead. A new open supersedes the running one.
+        """
+        if not self.enabled:
+            return None
+        if self.current is not None:
+            if kind != "open":
+                return None
+            self.current.superseded = True
+            self.finish(self.current)
+        record = Record(path, kind)
+        if self.profiling:
+            tracemalloc.reset_peak()
+            record.profile = cProfile.Profile()
+            record.profile.enable()
+        self.current = record
+        return record
+
+    def phase(self, name):
+        """Context manager timing a phase of the current record"""
+        if self.current is None:
+            return nullcontext()
+        return self._timed(self.current, name)
+
+    @contextmanager
+    def _timed(self, record, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record.add(name, time.perf_counter() - started)
+
+    def mark(self, name):
+        """Record the time since the current record began as a phase"""
+        if self.current is not None:
+            self.current.add(name, time.perf_counter() - self.current.started)
+
+    def finish(self, record):
+        """End a record; does nothing if it is not the current one"""
+        if record is None or record is not self.current:
+            return
+        self.current = None
+        record.phases["total"] = time.perf_counter() - record.started
+        now = call_counts()
+        record.calls = {name: now[name] - count for name, count in record.calls.items()}
+        if record.profile is not None:
+            record.profile.disable()
+            record.peak = tracemalloc.get_traced_memory()[1]
+            if record.total() > self.slowest and not record.superseded:
+                self.slowest = record.total()
+                self._dump(record)
+            record.profile = None
+        self.history.append(record)
+        self.log.info(json.dumps(record.as_dict()))
+        for listener in list(self.listeners):
+            listener(record)
+
+    def _dump(self, record):
+        record.profile.dump_stats(data_path("slowest.prof"))
+        lines = [f"{record.kind} {record.path}: {record.total() * 1000:.1f} ms, "
+                 f"peak {record.peak // 1024} KB traced"]
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:MEMORY_TOP]:
+            lines.append(str(stat))
+        with open(data_path("slowest_memory.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+@process_wide
+def shared_recorder():
+    """Process-wide Recorder, enabled from the start if NAVI_PERF or NAVI_PROFILE is set"""
+    recorder = Recorder()
+    if os.environ.get("NAVI_PERF") or os.environ.get("NAVI_PROFILE"):
+        recorder.enable()
+    return recorder
@@ -0,0 +1,147 @@
+"""Side panel listing queued, running and finished file operations"""
+import tkinter as tk
+from tkinter import ttk
+
+from navi.du import human_size
+from navi.jobs import shared_jobs
+
+POLL_MS = 200
+PANEL_BG = "#34495e"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "estimating..."
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d} left"
+    return f"{minutes}:{seconds:02d} left"
+
+
+def describe(job):
+    """One line of progress, e.g. '1.2G of 4.0G, 180.3M/s, 0:15 left'"""
+    status = job.status()
+    progress = job.progress
+    if status == "failed":
+        return f"Failed: {job.error}"
+    if status in ("done", "cancelled", "queued", "paused"):
+        return status.capitalize()
+    if progress.unit == "items":
+        done = f"{progress.done:,} of {progress.total:,} items"
+        rate = f"{progress.rate():,.0f}/s"
+    else:
+        done = f"{human_size(progress.done)} of {human_size(progress.total)}"
+        rate = f"{human_size(progress.rate())}/s"
+    return f"{done}, {rate}, {format_eta(progress.eta())}"
+
+
+class JobRow:
+    """Title, progress bar, status and buttons of one job"""
+
+    def __init__(self, parent, job):
+        self.job = job
+        self.frame = tk.Frame(parent, bg=PANEL_BG, pady=5)
+        self.frame.pack(fill="x", padx=8)
+        tk.Label(self.frame, text=job.title, bg=PANEL_BG, fg="white", anchor="w",
+                 font=("Segoe UI", 10, "bold"), wraplength=220, justify="left").pack(fill="x")
+        self.bar = ttk.Progressbar(self.frame, maximum=1.0, length=220)
+        self.bar.pack(fill="x", pady=2)
+        self.status = tk.Label(self.frame, text="", bg=PANEL_BG, fg="white", anchor="w",
+                               font=("Segoe UI", 9), wraplength=220, justify="left")
+        self.status.pack(fill="x")
+        buttons = tk.Frame(self.frame, bg=PANEL_BG)
+        buttons.pack(fill="x")
+        self.pause_btn = tk.Button(buttons, text="Pause", command=self.toggle_pause, bd=0,
+                                   bg="#4a6d8c", fg="black", font=("Segoe UI", 9, "bold"), cursor="hand2")
+        self.pause_btn.pack(side="left", padx=(0, 5))
+        self.cancel_btn = tk.Button(buttons, text="Cancel", command=job.cancel, bd=0,
+                                    bg="#e74c3c", fg="black", font=("Segoe UI", 9, "bold"), cursor="hand2")
+        self.cancel_btn.pack(side="left")
+
+    def toggle_pause(self):
+        if self.job.control.paused():
+            self.job.resume()
+        else:
+            self.job.pause()
+
+    def update(self):
+        job = self.job
+        self.bar["value"] = 1.0 if job.state == "done" else job.progress.fraction()
+        self.status.config(text=describe(job))
+        if job.finished():
+            self.pause_btn.pack_forget()
+            self.cancel_btn.pack_forget()
+        else:
+            self.pause_btn.config(text="Resume" if job.control.paused() else "Pause")
+
+
+class JobPanel:
+    """Shows the shared job queue next to the grid and reports finished jobs"""
+
+    def __init__(self, parent, before):
+        self.queue = shared_jobs()
+        self.callbacks = {}  # job -> on_done(job), only for jobs started from this view
+        self.rows = {}
+        self.visible = False
+        self.poll_job = None
+
+        self.frame = tk.Frame(parent, bg=PANEL_BG, width=260)
+        self.before = before
+        header = tk.Frame(self.frame, bg=PANEL_BG)
+        header.pack(fill="x", pady=(10, 5))
+        tk.Label(header, text="Jobs", bg=PANEL_BG, fg="white",
+                 font=("Segoe UI", 12, "bold")).pack(side="left", padx=10)
+        tk.Button(header, text="Hide", command=self.hide, bd=0, bg="#4a6d8c", fg="black",
+                  font=("Segoe UI", 9, "bold"), cursor="hand2").pack(side="right", padx=5)
+        tk.Button(header, text="Clear finished", command=self.clear_finished, bd=0, bg="#4a6d8c",
+                  fg="black", font=("Segoe UI", 9, "bold"), cursor="hand2").pack(side="right")
+        self.list_frame = tk.Frame(self.frame, bg=PANEL_BG)
+        self.list_frame.pack(fill="both", expand=True)
+        self._poll()
+
+    def submit(self, title, work, on_done=None):
+        """Queue work(progress, control); on_done(job) runs on the Tk thread after it ends"""
+        job = self.queue.submit(title, work)
+        if on_done is not None:
+            self.callbacks[job] = on_done
+        self.show()
+        return job
+
+    def show(self):
+        if not self.visible:
+            self.frame.pack(side="right", fill="y", before=self.before)
+            self.visible = True
+
+    def hide(self):
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def clear_finished(self):
+        self.queue.clear_finished()
+        for job in list(self.rows):
+            if job.finished():
+                self.rows.pop(job).frame.destroy()
+
+    def stop(self):
+        if self.poll_job is not None:
+            self.frame.after_cancel(self.poll_job)
+            self.poll_job = None
+
+    def _poll(self):
+        for job in self.queue.jobs:
+            if job not in self.rows:
+                self.rows[job] = JobRow(self.list_frame, job)
+        if self.visible:
+            for row in self.rows.values():
+                row.update()
+        for job in [j for j in self.callbacks if j.finished()]:
+            self.callbacks.pop(job)(job)
+        self.poll_job = self.frame.after(POLL_MS, self._poll)
@@ -0,0 +1,152 @@
+"""Background queue for file operations.
+
+Delete, rename and paste run as jobs on a couple of worker threads, so the
+window never waits on the disk. Every job has a Progress and a JobControl.
+The control stands in for the threading.Event the copy and delete code
+check between steps, and adds pausing: while a job is paused, its next
+check blocks.
+"""
+import queue
+import threading
+import time
+
+from navi.shared import process_wide
+
+WORKERS = 2
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Progress:
+    """Work done so far, in bytes or items, shared between a job's threads and the UI"""
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.unit = "bytes"  # or "items"
+        self.current = ""
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, count):
+        with self.lock:
+            self.done += count
+
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+    def rate(self):
+        """Bytes per second since the copy started"""
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Seconds left, or None while the rate is unknown"""
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+
+class JobControl:
+    """Cancel and pause switch with the interface of threading.Event"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+
+    def is_set(self):
+        """True once cancelled; blocks while the job is paused"""
+        self.running.wait()
+        return self.cancelled.is_set()
+
+    def set(self):
+        self.cancelled.set()
+        self.running.set()
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def paused(self):
+        return not self.running.is_set()
+
+
+class Job:
+    """One queued file operation"""
+
+    def __init__(self, title, work):
+        self.title = title
+        self.work = work  # work(progress, control) -> result
+        self.progress = Progress()
+        self.control = JobControl()
+        self.state = "queued"  # queued, running, done, failed or cancelled
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+    def cancel(self):
+        self.control.set()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def status(self):
+        if self.state in ("queued", "running") and self.control.paused():
+            return "paused"
+        return self.state
+
+
+class JobQueue:
+    """Runs jobs in submission order on a few worker threads"""
+
+    def __init__(self, workers=WORKERS):
+        self.jobs = []
+        self.pending = queue.Queue()
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, title, work):
+        job = Job(title, work)
+        self.jobs.append(job)
+        self.pending.put(job)
+        return job
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if not job.finished()]
+
+    def _work(self):
+        while True:
+            job = self.pending.get()
+            if job.control.is_set():
+                job.state = "cancelled"
+                job.finished_at = time.monotonic()
+                continue
+            job.state = "running"
+            job.progress.started = time.monotonic()
+            try:
+                job.result = job.work(job.progress, job.control)
+                job.state = "done"
+            except Cancelled:
+                job.state = "cancelled"
+            except Exception as e:
+                job.error = e
+                job.state = "failed"
+            job.finished_at = time.monotonic()
+
+
+@process_wide
+def shared_jobs():
+    """Process-wide queue, so jobs keep running when the user switches views"""
+    return JobQueue()
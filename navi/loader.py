@@ -0,0 +1,126 @@
+"""Background folder listing.
+
+The folder is read with os.scandir on a worker thread and the entries are
+handed to the Tk thread in batches through after(), so the window stays
+responsive while a huge or slow folder is being read. Starting a new
+listing cancels the previous one. Folders inside a zip or tar archive are
+listed from the archive's index instead (navi.archive).
+"""
+import os
+import queue
+import threading
+import time
+
+from navi.archive import shared_archives, split_path
+from navi.dirmodel import entry_from_dirent
+from navi.instrument import count, count_entries
+from navi.jobs import Cancelled
+
+FIRST_BATCH = 100      # small first batch so icons show up right away
+BATCH_SIZE = 2000
+FLUSH_INTERVAL = 0.05  # seconds before a partial batch is sent anyway
+POLL_MS = 15
+
+
+class FolderLoader:
+    """Streams the entries of one folder at a time to the UI thread"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.cancel_event = None
+        self.results = None
+        self.poll_job = None
+        self.callbacks = None
+
+    def start(self, path, on_batch, on_done, on_error):
+        """List path in the background.
+
+        on_batch(entries) is called for every batch, then on_done() once the
+        folder is fully read, or on_error(exc) if reading it failed.
+        """
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
+        self.callbacks = (on_batch, on_done, on_error)
+        threading.Thread(
+            target=self._scan,
+            args=(path, self.results, self.cancel_event),
+            daemon=True,
+        ).start()
+        self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        """Stop the listing in progress, if any. Pending batches are dropped."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.results = None
+
+    def busy(self):
+        return self.results is not None
+
+    @staticmethod
+    def _scan(path, results, cancel_event):
+        if split_path(path) is not None:
+            FolderLoader._scan_archive(path, results, cancel_event)
+            return
+        batch = []
+        limit = FIRST_BATCH
+        last_flush = time.monotonic()
+        try:
+            count("scandir")
+            with os.scandir(path) as it:
+                for de in it:
+                    if cancel_event.is_set():
+                        return
+                    batch.append(entry_from_dirent(de))
+                    if len(batch) >= limit or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                        count_entries(len(batch))
+                        results.put(("batch", batch))
+                        batch = []
+                        limit = BATCH_SIZE
+                        last_flush = time.monotonic()
+        except OSError as e:
+            results.put(("error", e))
+            return
+        if batch:
+            count_entries(len(batch))
+            results.put(("batch", batch))
+        results.put(("done", None))
+
+    @staticmethod
+    def _scan_archive(path, results, cancel_event):
+        # The whole index is read at once, or is already cached
+        try:
+            entries = shared_archives().list_folder(path, cancel_event)
+        except Cancelled:
+            return
+        except OSError as e:
+            results.put(("error", e))
+            return
+        results.put(("batch", entries))
+        results.put(("done", None))
+
+    def _poll(self):
+        self.poll_job = None
+        results = self.results
+        on_batch, on_done, on_error = self.callbacks
+        while results is self.results:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                self.poll_job = self.widget.after(POLL_MS, self._poll)
+                return
+            if kind == "batch":
+                on_batch(payload)
+            else:
+                self.results = None
+                self.cancel_event = None
+                if kind == "done":
+                    on_done()
+                else:
+                    on_error(payload)
+                return
@@ -0,0 +1,57 @@
+"""On-screen table of the last recorded actions, toggled with F12"""
+import os
+import tkinter as tk
+
+from navi.instrument import shared_recorder
+
+PHASES = ("list", "sort", "filter", "render", "total")
+SHOWN = 10
+OVERLAY_BG = "#111111"
+OVERLAY_FG = "#7dcea0"
+OVERLAY_FONT = ("Courier", 9)
+
+
+def format_record(record):
+    name = os.path.basename(record.path.rstrip(os.sep)) or record.path
+    cells = [f"{record.phases[p] * 1000:7.1f}" if p in record.phases else "      -" for p in PHASES]
+    stats = record.calls.get("stat", 0)
+    note = " *" if record.superseded else ""
+    return (f"{name[:18]:18} {record.kind:6} {' '.join(cells)} "
+            f"{stats:6} {record.calls.get('entries', 0):7}{note}")
+
+
+class PerfOverlay:
+    """Label placed over a widget showing the recorder's history"""
+
+    def __init__(self, over):
+        self.recorder = shared_recorder()
+        self.visible = False
+        self.label = tk.Label(over, text="", bg=OVERLAY_BG, fg=OVERLAY_FG, font=OVERLAY_FONT,
+                              justify="left", anchor="nw", padx=8, pady=6)
+        self.recorder.listeners.append(self.update)
+
+    def toggle(self):
+        if self.visible:
+            self.label.place_forget()
+            self.visible = False
+            return
+        self.recorder.enable()  # counting starts the first time the overlay is shown
+        self.label.place(relx=1.0, x=-10, y=10, anchor="ne")
+        self.label.lift()
+        self.visible = True
+        self.update()
+
+    def update(self, record=None):
+        if not self.visible:
+            return
+        header = (f"{'folder':18} {'action':6} " + " ".join(f"{p:>7}" for p in PHASES)
+                  + f" {'stats':>6} {'entries':>7}")
+        lines = [header, "(ms)"]
+        lines.extend(format_record(r) for r in list(self.recorder.history)[-SHOWN:][::-1])
+        if len(lines) == 2:
+            lines.append("Open a folder to record it")
+        self.label.config(text="\n".join(lines))
+
+    def stop(self):
+        if self.update in self.recorder.listeners:
+            self.recorder.listeners.remove(self.update)
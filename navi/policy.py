@@ -0,0 +1,66 @@
+"""What a role may do: the difference between the guest and admin explorers.
+
+Every operation in navi.core names an action and the paths it touches,
+and asks the caller's Policy first. A refused action raises Denied
+before anything is changed. The GUIs use the same policies, so a script
+run as guest cannot do more than the guest window allows.
+"""
+import os
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+LIST = "list"        # read folder listings and search names
+READ = "read"        # open files and search their contents
+CREATE = "create"    # make new files and folders
+COPY = "copy"        # paste copies of existing items
+MOVE = "move"
+RENAME = "rename"
+DELETE = "delete"
+LINK = "link"        # replace duplicates by hard links
+SCAN = "scan"        # disk usage, duplicate and treemap scans
+
+ALL_ACTIONS = frozenset({LIST, READ, CREATE, COPY, MOVE, RENAME, DELETE, LINK, SCAN})
+
+
+class Denied(PermissionError):
+    """The policy does not allow an action"""
+
+
+class Policy:
+    """A named set of allowed actions, optionally limited to some folder trees"""
+
+    def __init__(self, name: str, actions: Iterable[str],
+                 roots: Optional[Iterable[str]] = None) -> None:
+        self.name = name
+        self.actions: FrozenSet[str] = frozenset(actions)
+        self.roots: Optional[Tuple[str, ...]] = None
+        if roots is not None:
+            self.roots = tuple(os.path.realpath(r) for r in roots)
+
+    def __repr__(self) -> str:
+        return f"Policy({self.name!r})"
+
+    def inside_roots(self, path: str) -> bool:
+        if self.roots is None:
+            return True
+        real = os.path.realpath(path)
+        return any(real == root or real.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots)
+
+    def allows(self, action: str, path: Optional[str] = None) -> bool:
+        if action not in self.actions:
+            return False
+        return path is None or self.inside_roots(path)
+
+    def check(self, action: str, *paths: str) -> None:
+        """Raise Denied unless action is allowed on every path"""
+        if action not in self.actions:
+            raise Denied(f"{self.name} may not {action}")
+        for path in paths:
+            if not self.inside_roots(path):
+                raise Denied(f"{self.name} may not {action} outside {', '.join(self.roots)}", path)
+
+
+ADMIN = Policy("admin", ALL_ACTIONS)
+# Guests browse, open, create and paste, but never move, rename or delete
+GUEST = Policy("guest", {LIST, READ, CREATE, COPY})
+
+POLICIES = {"admin": ADMIN, "guest": GUEST}
@@ -0,0 +1,254 @@
+"""Quick-open palette (Ctrl+P): jump to any folder or file the explorer knows.
+
+The candidates are the visited folders and opened files from the history
+store, followed by every path in the file index. That index covers the
+sidebar roots and any folder the user indexed. The list is built on a
+worker thread when the palette first opens, and again on a later open
+once it is POOL_TTL old; until then the old list is used. Frecent paths
+come first and get a bonus. The indexed paths follow, shortest first,
+so the first chunk a search looks at already holds the likeliest
+answers.
+
+Matching runs on a worker thread with navi.fuzzy. Every key cancels the
+running pass and starts a new one, which narrows the last result when
+the query grew. Partial top lists are shown as they arrive, so the Tk
+loop is never blocked, whatever the size of the index.
+"""
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from navi.fuzzy import Matcher
+from navi.history import FOLDER, shared_history
+from navi.index import shared_index
+from navi.shared import process_wide
+
+POOL_TTL = 60         # seconds before the candidate list is rebuilt
+BONUS_FRECENT = 32    # extra points for the most frecent path, less for the next ones
+FRECENT = 2000        # history entries taken into the list
+POLL_MS = 15
+POOL_POLL_MS = 100
+PANEL_BG = "#2c3e50"
+
+
+class PathPool:
+    """The palette's candidate list, rebuilt in the background"""
+
+    def __init__(self, history=None, index=None):
+        self.history = history or shared_history()
+        self.index = index or shared_index()
+        self.matcher = Matcher([], [])
+        self.kinds = {}       # path -> history kind, for the visited ones
+        self.built = 0.0
+        self.building = False
+
+    def refresh(self):
+        """Rebuild if the list is stale; returns at once"""
+        if self.building or time.monotonic() - self.built < POOL_TTL:
+            return
+        self.building = True
+        threading.Thread(target=self._build, daemon=True).start()
+
+    def _build(self):
+        try:
+            visits = self.history.ranked(limit=FRECENT)
+            paths = [v.path for v in visits]
+            kinds = {v.path: v.kind for v in visits}
+            known = set(paths)
+            indexed = [p for p in self.index.paths() if p not in known]
+            indexed.sort(key=len)
+            paths.extend(indexed)
+            folded = []
+            for path in paths:
+                f = path.casefold()
+                folded.append(path if f == path else f)  # share the string when nothing changed
+            boosts = {row: BONUS_FRECENT * (len(visits) - row) // len(visits) for row in range(len(visits))}
+            self.matcher = Matcher(paths, folded, boosts)
+            self.kinds = kinds
+        finally:
+            self.built = time.monotonic()
+            self.building = False
+
+    def recent(self, limit):
+        """The first paths of the list, most frecent first, for an empty query"""
+        return self.matcher.paths[:min(limit, len(self.kinds))]
+
+    def is_dir(self, path):
+        kind = self.kinds.get(path)
+        return kind == FOLDER if kind is not None else os.path.isdir(path)
+
+
+@process_wide
+def shared_path_pool():
+    """Process-wide PathPool, so the palette opens warm in every view"""
+    return PathPool()
+
+
+class FuzzySearch:
+    """Runs one matcher pass at a time on a worker thread, like FolderLoader"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.cancel_event = None
+        self.results = None
+        self.poll_job = None
+        self.on_results = None
+
+    def start(self, matcher, query, on_results):
+        """on_results(paths, final) for every partial top list and the final one"""
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
+        self.on_results = on_results
+        threading.Thread(target=self._run, args=(matcher, query, self.results, self.cancel_event),
+                         daemon=True).start()
+        self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.results = None
+
+    @staticmethod
+    def _run(matcher, query, results, cancel_event):
+        best = []
+        try:
+            for best in matcher.run(query, cancel_event):
+                results.put(([matcher.paths[row] for _, row in best], False))
+        finally:
+            # Also after an error, so the palette does not keep waiting
+            if not cancel_event.is_set():
+                results.put(([matcher.paths[row] for _, row in best], True))
+
+    def _poll(self):
+        self.poll_job = None
+        results = self.results
+        latest = None
+        while True:
+            try:
+                latest = results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            paths, final = latest
+            self.on_results(paths, final)
+            if final:
+                self.results = None
+                self.cancel_event = None
+                return
+        if results is self.results:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+
+class QuickOpen:
+    """The palette window: a query box over a list of matches"""
+
+    SHOWN = 50
+
+    def __init__(self, parent, on_open, pool=None):
+        self.on_open = on_open  # on_open(path, is_dir)
+        self.pool = pool or shared_path_pool()
+        self.shown = []
+        self.search = FuzzySearch(parent)
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Go to")
+        self.window.geometry("680x420")
+        self.window.configure(bg=PANEL_BG)
+        self.window.bind("<Escape>", lambda e: self.close())
+
+        self.query_var = tk.StringVar()
+        entry = tk.Entry(self.window, textvariable=self.query_var, font=("Segoe UI", 13),
+                         bg="#ecf0f1", fg="#2c3e50", relief="flat")
+        entry.pack(fill="x", padx=10, pady=(10, 4), ipady=4)
+        entry.bind("<Return>", lambda e: self.open_selected())
+        entry.bind("<Down>", lambda e: self.move(1))
+        entry.bind("<Up>", lambda e: self.move(-1))
+        entry.focus_set()
+        self.query_var.trace_add("write", lambda *args: self.update())
+
+        self.status = tk.Label(self.window, text="", bg=PANEL_BG, fg="#95a5a6", anchor="w",
+                               font=("Segoe UI", 9))
+        self.status.pack(fill="x", padx=10)
+
+        frame = tk.Frame(self.window, bg=PANEL_BG)
+        frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        scrollbar = ttk.Scrollbar(frame)
+        scrollbar.pack(side="right", fill="y")
+        self.listbox = tk.Listbox(frame, yscrollcommand=scrollbar.set, activestyle="none",
+                                  bg="#34495e", fg="white", font=("Segoe UI", 10))
+        self.listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<Double-1>", lambda e: self.open_selected())
+
+        self.pool_job = None
+        self.pool.refresh()
+        self.update()
+        if self.pool.building:
+            self.pool_job = self.window.after(POOL_POLL_MS, self.wait_for_pool)
+
+    def wait_for_pool(self):
+        """Search again once the candidate list has been rebuilt"""
+        if self.pool.building:
+            self.pool_job = self.window.after(POOL_POLL_MS, self.wait_for_pool)
+        else:
+            self.pool_job = None
+            self.update()
+
+    def update(self):
+        query = self.query_var.get().strip()
+        if not query:
+            self.search.cancel()
+            self.show(self.pool.recent(self.SHOWN), True)
+            return
+        self.status.config(text="Searching...")
+        self.search.start(self.pool.matcher, query, self.show)
+
+    def show(self, paths, final):
+        if not self.window.winfo_exists():
+            self.search.cancel()  # closed by the window manager
+            return
+        self.shown = paths
+        self.listbox.delete(0, tk.END)
+        for path in paths:
+            name = os.path.basename(path.rstrip(os.sep)) or path
+            self.listbox.insert(tk.END, f"{name}  -  {os.path.dirname(path)}")
+        if paths:
+            self.listbox.selection_set(0)
+        count = len(self.pool.matcher.paths)
+        state = "Building list..." if self.pool.building else f"{count:,} paths"
+        self.status.config(text=state if final else f"Searching {count:,} paths...")
+
+    def move(self, step):
+        if not self.shown:
+            return
+        current = self.listbox.curselection()
+        index = max(0, min(len(self.shown) - 1, (current[0] if current else -1) + step))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+
+    def open_selected(self):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        path = self.shown[selection[0]]
+        if not os.path.exists(path):
+            self.status.config(text=f"No longer exists: {path}")
+            return
+        is_dir = self.pool.is_dir(path)
+        self.close()
+        self.on_open(path, is_dir)
+
+    def close(self):
+        self.search.cancel()
+        if self.pool_job is not None:
+            self.window.after_cancel(self.pool_job)
+        self.window.destroy()
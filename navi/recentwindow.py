@@ -0,0 +1,86 @@
+"""Window listing recent folders and files, most frecent first, with a jump box"""
+import os
+import tkinter as tk
+from tkinter import ttk
+
+from navi.history import FOLDER
+
+SHOWN = 200
+PANEL_BG = "#2c3e50"
+
+
+class RecentWindow:
+    """Typing narrows the list to paths containing the typed words in order.
+
+    Enter or a double-click opens the selected path through on_open(path,
+    is_dir). The list is drawn from the HistoryStore in memory, so it is
+    filled again on every key.
+    """
+
+    def __init__(self, parent, store, on_open):
+        self.store = store
+        self.on_open = on_open
+        self.shown = []  # Visit per listbox row
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Recent")
+        self.window.geometry("640x440")
+        self.window.configure(bg=PANEL_BG)
+
+        self.query_var = tk.StringVar()
+        entry = tk.Entry(self.window, textvariable=self.query_var, font=("Segoe UI", 12),
+                         bg="#ecf0f1", fg="#2c3e50", relief="flat")
+        entry.pack(fill="x", padx=10, pady=(10, 5), ipady=4)
+        entry.bind("<KeyRelease>", self.on_key)
+        entry.bind("<Return>", lambda e: self.open_selected())
+        entry.bind("<Down>", lambda e: self.move(1))
+        entry.bind("<Up>", lambda e: self.move(-1))
+        entry.focus_set()
+
+        listbox_frame = tk.Frame(self.window, bg=PANEL_BG)
+        listbox_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        scrollbar = ttk.Scrollbar(listbox_frame)
+        scrollbar.pack(side="right", fill="y")
+        self.listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set, activestyle="none",
+                                  bg="#34495e", fg="white", font=("Segoe UI", 10))
+        self.listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<Double-1>", lambda e: self.open_selected())
+        self.listbox.bind("<Return>", lambda e: self.open_selected())
+
+        self.fill()
+
+    def fill(self):
+        self.shown = self.store.jump(self.query_var.get(), limit=SHOWN)
+        self.listbox.delete(0, tk.END)
+        for visit in self.shown:
+            name = os.path.basename(visit.path.rstrip(os.sep)) or visit.path
+            marker = os.sep if visit.kind == FOLDER else ""
+            self.listbox.insert(tk.END, f"{name}{marker}  -  {visit.path}")
+        if self.shown:
+            self.listbox.selection_set(0)
+
+    def on_key(self, event):
+        if event.keysym not in ("Up", "Down", "Return"):
+            self.fill()
+
+    def move(self, step):
+        if not self.shown:
+            return
+        current = self.listbox.curselection()
+        index = max(0, min(len(self.shown) - 1, (current[0] if current else -1) + step))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+
+    def open_selected(self):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        visit = self.shown[selection[0]]
+        if not os.path.exists(visit.path):
+            self.store.mark_missing(visit.path)  # hidden until it is visited again
+            self.fill()
+            return
+        self.window.destroy()
+        self.on_open(visit.path, visit.kind == FOLDER)
@@ -0,0 +1,136 @@
+"""Name filtering for the search bar.
+
+Names are lowercased once when an entry is created (Entry.lname). When the
+new query contains the previous one, as it does while the user keeps
+typing, only the previous matches are scanned again. Searches run after a
+short pause in typing rather than on every key.
+
+A deep search that has to walk a folder tree, or read an archive's
+index, runs on a worker thread through DeepSearch.
+"""
+import queue
+import threading
+
+from navi.jobs import Cancelled
+
+SEARCH_DELAY_MS = 150
+POLL_MS = 30
+
+
+class NameFilter:
+    """Substring filter over a folder's entries that reuses its last result"""
+
+    def __init__(self):
+        self.source = []
+        self.query = ""
+        self.result = []
+
+    def reset(self, entries):
+        """Filter a new list of entries, e.g. after a load or a sort"""
+        self.source = entries
+        self.query = ""
+        self.result = entries
+
+    def add(self, entries):
+        """Entries just appended to the source; returns the ones that match"""
+        if not self.query:
+            return entries
+        matches = [e for e in entries if self.query in e.lname]
+        self.result.extend(matches)
+        return matches
+
+    def apply(self, query):
+        """Entries whose name contains query"""
+        query = query.lower()
+        if query == self.query:
+            return self.result
+        if not query:
+            self.result = self.source
+        else:
+            # A longer query can only match a subset of the last result
+            candidates = self.result if self.query and self.query in query else self.source
+            self.result = [e for e in candidates if query in e.lname]
+        self.query = query
+        return self.result
+
+
+class Debouncer:
+    """Calls func once no trigger() has happened for delay_ms"""
+
+    def __init__(self, widget, delay_ms, func):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self.func = func
+        self.job = None
+
+    def trigger(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+        self.job = self.widget.after(self.delay_ms, self._fire)
+
+    def cancel(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def _fire(self):
+        self.job = None
+        self.func()
+
+
+class DeepSearch:
+    """Runs one slow search at a time on a worker thread, like FolderLoader"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.cancel_event = None
+        self.results = None
+        self.poll_job = None
+        self.on_done = None
+
+    def start(self, search, on_done):
+        """Run search(cancel_event) in the background, then on_done(entries) on the Tk thread.
+
+        Starting another search cancels this one. A search failing with
+        OSError finds nothing.
+        """
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
+        self.on_done = on_done
+        threading.Thread(target=self._run, args=(search, self.results, self.cancel_event),
+                         daemon=True).start()
+        self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.results = None
+
+    def busy(self):
+        return self.results is not None
+
+    @staticmethod
+    def _run(search, results, cancel_event):
+        try:
+            found = search(cancel_event)
+        except Cancelled:
+            return
+        except OSError:
+            found = []
+        results.put(found)
+
+    def _poll(self):
+        self.poll_job = None
+        try:
+            found = self.results.get_nowait()
+        except queue.Empty:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
+            return
+        self.results = None
+        self.cancel_event = None
+        self.on_done(found)
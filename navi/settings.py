@@ -0,0 +1,15 @@
+"""Locations of files the explorer keeps between runs"""
+import os
+
+HOME = os.path.expanduser("~")
+DATA_DIR = os.path.join(HOME, ".navi_explorer")
+# "natural" (the default) or "locale" to sort names by the LC_COLLATE rules
+COLLATION = os.environ.get("NAVI_COLLATION", "natural")
+# "1" to have the admin view index the whole filesystem from / at every start
+INDEX_FILESYSTEM = os.environ.get("NAVI_INDEX_FILESYSTEM") == "1"
+
+
+def data_path(name):
+    """Path of a file inside the explorer's data folder, creating the folder"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
@@ -0,0 +1,19 @@
+"""Process-wide objects shared by the views, like the job queue and the caches"""
+import functools
+import threading
+
+
+def process_wide(factory):
+    """Decorator making factory build its object once; later calls return the same one"""
+    lock = threading.Lock()
+    made = []
+
+    @functools.wraps(factory)
+    def shared():
+        if not made:
+            with lock:
+                if not made:
+                    made.append(factory())
+        return made[0]
+
+    return shared
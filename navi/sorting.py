@@ -0,0 +1,94 @@
+"""Sorting a folder listing by name, date, size or type.
+
+The metadata of a listing is copied once into columns. Numbers live in
+typed arrays and names are reduced to a rank in the order of their
+collation keys (navi.collation), where "file2" comes before "file10".
+The keys are built once per Entry, so a new set of columns only sorts
+strings that already exist. Every sort order is a permutation of row
+numbers, built with stable sorts that use a column's __getitem__ as the
+key. It is cached, so switching back to an order you already used just
+reindexes the rows. Sorting never touches the filesystem.
+
+Folders always come before files. Reversing an order only reverses the
+primary key. Ties are broken by the secondary keys and then by name.
+"""
+from array import array
+
+SORT_KEYS = ("name", "date", "size", "type")
+
+
+class SortColumns:
+    """Column copy of a listing with cached sort permutations"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.count = len(entries)
+        self.group = array("B", (0 if e.is_dir else 1 for e in entries))
+        self.size = array("q", (e.size for e in entries))
+        self.mtime = array("d", (e.mtime for e in entries))
+        self.ext = [e.ext for e in entries]
+
+        # Equal keys ("Readme", "README") fall back to the name itself
+        keys = [(e.collation_key, e.name) for e in entries]
+        by_name = sorted(range(self.count), key=keys.__getitem__)
+        self.name = array("l", [0]) * self.count
+        for rank, row in enumerate(by_name):
+            self.name[row] = rank
+        self.by_name = array("l", by_name)
+        self.orders = {}
+
+    def matches(self, entries):
+        """True if these columns were built from this very list, unchanged in length"""
+        return entries is self.entries and len(entries) == self.count
+
+    def _column(self, key):
+        if key == "name":
+            return self.name
+        if key == "date":
+            return self.mtime
+        if key == "size":
+            return self.size
+        if key == "type":
+            return self.ext
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def order(self, keys, reverse=False):
+        """Row numbers in sort order.
+
+        keys is one key name or a sequence of them, primary first. A
+        secondary key with a leading "-" sorts descending.
+        """
+        if isinstance(keys, str):
+            keys = (keys,)
+        cache_key = (tuple(keys), reverse)
+        perm = self.orders.get(cache_key)
+        if perm is not None:
+            return perm
+
+        rows = self.by_name
+        for depth in range(len(keys) - 1, -1, -1):
+            key = keys[depth]
+            descending = key.startswith("-")
+            key = key.lstrip("-")
+            if depth == 0:
+                descending = reverse
+            if key == "name" and not descending and rows is self.by_name:
+                continue
+            rows = sorted(rows, key=self._column(key).__getitem__, reverse=descending)
+        # Python's sort is stable, reverse=True included, so the group
+        # pass keeps the order inside folders and inside files
+        rows = sorted(rows, key=self.group.__getitem__)
+        perm = array("l", rows)
+        self.orders[cache_key] = perm
+        return perm
+
+    def sorted(self, keys, reverse=False):
+        """The entries in sort order"""
+        entries = self.entries
+        return [entries[i] for i in self.order(keys, reverse)]
+
+    def refresh_sizes(self):
+        """Reread the sizes from the entries, e.g. as folder sizes come in"""
+        self.size = array("q", (e.size for e in self.entries))
+        for cache_key in [k for k in self.orders if any(s.lstrip("-") == "size" for s in k[0])]:
+            del self.orders[cache_key]
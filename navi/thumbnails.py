@@ -0,0 +1,214 @@
+"""Thumbnails for image files in the grid.
+
+Thumbnails are only asked for when a cell is drawn, i.e. for entries in
+view. They are decoded on a pool of worker threads, using Image.draft so
+JPEGs are decoded at a reduced scale, and then shrunk with thumbnail(),
+which uses reduce() for the first large steps.
+
+Finished thumbnails are stored as small PNGs in a disk cache named after
+a hash of the file's path, size and mtime. The cache has a size cap and
+evicts the least recently used files first. Only the conversion to a
+PhotoImage happens on the Tk thread.
+"""
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from navi.settings import data_path
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff", ".ico"}
+THUMB_SIZE = 48
+MAX_PENDING = 256         # older requests are dropped when scrolling fast
+MAX_PHOTOS = 1000         # PhotoImages kept in memory
+MAX_DISK_BYTES = 200 * 1024 * 1024
+POLL_MS = 50
+
+
+class ThumbnailStore:
+    """Disk cache of thumbnail PNGs with a size cap and LRU eviction"""
+
+    def __init__(self, root, max_bytes=MAX_DISK_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total = None
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(path, size, mtime):
+        return hashlib.sha1(f"{path}\0{size}\0{mtime}".encode("utf-8", "surrogatepass")).hexdigest()
+
+    def file_for(self, key):
+        return os.path.join(self.root, key[:2], key + ".png")
+
+    def get(self, key):
+        """Cached thumbnail for key, or None"""
+        path = self.file_for(key)
+        try:
+            image = Image.open(path)
+            image.load()
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return image
+
+    def put(self, key, image):
+        path = self.file_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        try:
+            image.save(tmp, "PNG")
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with self.lock:
+            if self.total is None:
+                self.total = sum(size for _, _, size in self._files())
+            else:
+                self.total += os.path.getsize(path)
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, path, st.st_size
+
+    def _evict(self):
+        """Delete least recently used files until the cache is at 90% of its cap"""
+        target = self.max_bytes * 0.9
+        for _, path, size in sorted(self._files()):
+            if self.total <= target:
+                break
+            try:
+                os.remove(path)
+                self.total -= size
+            except OSError:
+                pass
+
+
+def make_thumbnail(path, size=THUMB_SIZE):
+    """Decode an image file at reduced scale and fit it in size x size"""
+    with Image.open(path) as image:
+        # JPEG can decode straight to 1/2, 1/4 or 1/8 scale
+        image.draft("RGB", (size * 2, size * 2))
+        image.thumbnail((size, size), reducing_gap=2.0)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        else:
+            image.load()
+        return image
+
+
+class ThumbnailLoader:
+    """Hands out thumbnail PhotoImages, generating missing ones off the Tk thread"""
+
+    def __init__(self, widget, on_ready, workers=None, store=None):
+        """on_ready() runs on the Tk thread whenever new thumbnails are available"""
+        self.widget = widget
+        self.on_ready = on_ready
+        self.store = store or ThumbnailStore(data_path("thumbnails"))
+        self.photos = OrderedDict()
+        self.failed = set()
+        self.in_flight = set()
+        self.pending = OrderedDict()  # key -> path, newest last
+        self.condition = threading.Condition()
+        self.results = queue.Queue()
+        self.poll_job = None
+        self.stopped = False
+        for _ in range(workers or min(4, os.cpu_count() or 1)):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def stop(self):
+        """Let the worker threads exit and stop polling"""
+        with self.condition:
+            self.stopped = True
+            self.pending.clear()
+            self.condition.notify_all()
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+
+    def get(self, entry):
+        """PhotoImage for an image entry, or None while it is being made"""
+        key = (entry.path, entry.size, entry.mtime)
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+            return photo
+        if key not in self.failed and key not in self.in_flight:
+            self._request(key)
+        return None
+
+    def _request(self, key):
+        self.in_flight.add(key)
+        with self.condition:
+            self.pending[key] = key[0]
+            while len(self.pending) > MAX_PENDING:
+                dropped, _ = self.pending.popitem(last=False)
+                self.in_flight.discard(dropped)
+            self.condition.notify()
+        if self.poll_job is None:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                # Newest first: those are the cells the user is looking at
+                key, path = self.pending.popitem(last=True)
+            store_key = ThumbnailStore.key(*key)
+            image = self.store.get(store_key)
+            if image is None:
+                try:
+                    image = make_thumbnail(path)
+                except Exception:
+                    image = None
+                if image is not None:
+                    try:
+                        self.store.put(store_key, image)
+                    except OSError:
+                        pass  # disk full or read-only: show it anyway, uncached
+            self.results.put((key, image))
+
+    def _poll(self):
+        self.poll_job = None
+        got = False
+        while True:
+            try:
+                key, image = self.results.get_nowait()
+            except queue.Empty:
+                break
+            got = True
+            self.in_flight.discard(key)
+            if image is None:
+                self.failed.add(key)
+                continue
+            self.photos[key] = ImageTk.PhotoImage(image)
+            while len(self.photos) > MAX_PHOTOS:
+                self.photos.popitem(last=False)
+        if got:
+            self.on_ready()
+        with self.condition:
+            busy = bool(self.pending)
+        if busy or self.in_flight:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
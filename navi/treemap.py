@@ -0,0 +1,227 @@
+"""Where the space goes: a compact size tree of a folder and its squarified treemap layout"""
+import heapq
+import os
+import stat
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from navi.jobs import Cancelled
+
+WORKERS = 8
+FILES_PER_FOLDER = 16  # largest files of a folder that get a node of their own
+PROGRESS_INTERVAL = 0.3
+
+DIR = 0
+FILE = 1
+OTHER = 2  # the smaller files of a folder, summed
+
+
+class SpaceTree:
+    """Folders and their largest files as parallel arrays; node 0 is the root"""
+
+    def __init__(self, root):
+        self.root = root.rstrip(os.sep) or os.sep
+        self.names = [self.root]
+        self.parent = array("l", [-1])
+        self.size = array("q", [0])
+        self.kind = array("B", [DIR])
+        self.children = [[]]  # per node; None for files
+        self.complete = False
+        self.lock = threading.Lock()
+
+    def add(self, parent, name, kind, size=0):
+        """New node below parent. Only called from the scanning thread."""
+        node = len(self.names)
+        self.names.append(name)
+        self.parent.append(parent)
+        self.size.append(0)
+        self.kind.append(kind)
+        self.children.append([] if kind == DIR else None)
+        self.children[parent].append(node)
+        if size:
+            self.grow(node, size)
+        return node
+
+    def grow(self, node, size):
+        """Add size to a node and every folder above it"""
+        while node >= 0:
+            self.size[node] += size
+            node = self.parent[node]
+
+    def path_of(self, node):
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parent[node]
+        return os.path.join(self.root, *reversed(parts))
+
+    def find(self, path):
+        """Node of a folder path inside the tree, or None"""
+        path = path.rstrip(os.sep) or os.sep
+        if path == self.root:
+            return 0
+        relative = os.path.relpath(path, self.root)
+        if relative.startswith(os.pardir):
+            return None
+        node = 0
+        for name in relative.split(os.sep):
+            children = self.children[node] or ()
+            node = next((c for c in children if self.kind[c] == DIR and self.names[c] == name), None)
+            if node is None:
+                return None
+        return node
+
+    def __len__(self):
+        return len(self.names)
+
+
+def read_folder(path, dev):
+    """Largest files, sum of the other files, sub-folders and multi-linked files of one folder"""
+    files = []
+    other_size = other_count = 0
+    subdirs = []
+    links = []
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return [], 0, 0, [], []
+    for de in entries:
+        try:
+            st = de.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            if st.st_dev == dev:
+                subdirs.append(de.name)
+        elif st.st_nlink > 1:
+            links.append((de.name, st.st_dev, st.st_ino, st.st_size))
+        else:
+            files.append((st.st_size, de.name))
+    if len(files) > FILES_PER_FOLDER:
+        largest = heapq.nlargest(FILES_PER_FOLDER, files)
+        other_count = len(files) - len(largest)
+        other_size = sum(size for size, _ in files) - sum(size for size, _ in largest)
+        files = largest
+    return files, other_size, other_count, subdirs, links
+
+
+def scan(tree, progress, cancel_event, workers=WORKERS):
+    """Fill tree from its root. progress counts folders; raises Cancelled."""
+    progress.unit = "items"
+    progress.started = time.monotonic()
+    dev = os.stat(tree.root).st_dev
+    seen_links = set()
+    with ThreadPoolExecutor(workers) as pool:
+        pending = {pool.submit(read_folder, tree.root, dev): 0}
+        progress.total = 1
+        while pending:
+            if cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                raise Cancelled()
+            done, _ = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                files, other_size, other_count, subdirs, links = future.result()
+                folder = tree.path_of(node)
+                progress.current = folder
+                with tree.lock:
+                    for name, link_dev, ino, size in links:
+                        if (link_dev, ino) not in seen_links:
+                            seen_links.add((link_dev, ino))
+                            files.append((size, name))
+                    for size, name in files:
+                        tree.add(node, name, FILE, size)
+                    if other_count:
+                        tree.add(node, f"{other_count:,} smaller files", OTHER, other_size)
+                    for name in subdirs:
+                        child = tree.add(node, name, DIR)
+                        pending[pool.submit(read_folder, os.path.join(folder, name), dev)] = child
+                progress.total += len(subdirs)
+                progress.add(1)
+    tree.complete = True
+    return tree
+
+
+def _worst(row_sum, row_max, row_min, side):
+    side2 = side * side
+    sum2 = row_sum * row_sum
+    return max(side2 * row_max / sum2, sum2 / (side2 * row_min))
+
+
+def squarify(areas, x, y, w, h):
+    """Rectangles (x, y, w, h) for areas sorted largest first, filling the box"""
+    rects = []
+    i = 0
+    count = len(areas)
+    while i < count and w > 0 and h > 0:
+        side = min(w, h)
+        row_sum = row_max = row_min = areas[i]
+        j = i + 1
+        while j < count:
+            a = areas[j]
+            if _worst(row_sum + a, row_max, a, side) > _worst(row_sum, row_max, row_min, side):
+                break
+            row_sum += a
+            row_min = a
+            j += 1
+        if w >= h:
+            width = row_sum / h
+            top = y
+            for a in areas[i:j]:
+                rects.append((x, top, width, a / width))
+                top += a / width
+            x += width
+            w -= width
+        else:
+            height = row_sum / w
+            left = x
+            for a in areas[i:j]:
+                rects.append((left, y, a / height, height))
+                left += a / height
+            y += height
+            h -= height
+        i = j
+    return rects
+
+
+def layout(tree, node, x0, y0, x1, y1, max_depth=4, min_side=4, header=16, pad=2):
+    """(node, x0, y0, x1, y1, depth) boxes for node's subtree, parents before children"""
+    boxes = []
+    queue = deque([(node, x0, y0, x1, y1, 0)])
+    sizes = tree.size
+    with tree.lock:
+        while queue:
+            current, x0, y0, x1, y1, depth = queue.popleft()
+            children = tree.children[current]
+            if depth == max_depth or not children:
+                continue
+            # the folder's name sits in a header strip above its content
+            ix0, iy0, ix1, iy1 = x0 + pad, y0 + header, x1 - pad, y1 - pad
+            if depth == 0:
+                ix0, iy0, ix1, iy1 = x0, y0, x1, y1
+            width, height = ix1 - ix0, iy1 - iy0
+            total = sizes[current]
+            if width < min_side or height < min_side or total <= 0:
+                continue
+            scale = width * height / total
+            ranked = sorted(children, key=sizes.__getitem__, reverse=True)
+            # children too small to see are left out of the layout
+            areas = []
+            for child in ranked:
+                area = sizes[child] * scale
+                if area < min_side * min_side:
+                    break
+                areas.append(area)
+            rects = squarify(areas, ix0, iy0, width, height)
+            for child, (x, y, w, h) in zip(ranked, rects):
+                if w < 1 or h < 1:
+                    continue
+                boxes.append((child, x, y, x + w, y + h, depth + 1))
+                if tree.kind[child] == DIR and w > 3 * header and h > 2 * header:
+                    queue.append((child, x, y, x + w, y + h, depth + 1))
+    return boxes
@@ -0,0 +1,180 @@
+"""Treemap of a SpaceTree drawn on the explorer's canvas.
+
+While the treemap is shown, the icon grid is suspended and the canvas
+belongs to this view. Boxes are drawn in slices that each fit in a frame
+budget, biggest first. A large map therefore never blocks the Tk loop,
+and redrawing during a scan or after a resize stays smooth.
+"""
+import time
+
+from navi.du import human_size
+from navi.treemap import SpaceTree, scan, layout, DIR, FILE
+
+TAG = "treemap"
+FRAME_BUDGET = 0.012  # seconds of drawing per Tk frame
+REDRAW_MS = 1000      # redraw period while the scan is running
+DIR_COLORS = ("#1f4e79", "#2e6b8a", "#3b8686", "#4a7c59", "#6b6b3b")
+FILE_COLOR = "#7f8c8d"
+OTHER_COLOR = "#5d6d7e"
+OUTLINE = "#1b2631"
+LABEL_COLOR = "white"
+LABEL_FONT = ("Segoe UI", 9)
+
+
+class TreemapView:
+    """Draws a folder's space use and lets the user drill down and back up"""
+
+    def __init__(self, canvas, submit, on_status):
+        self.canvas = canvas
+        self.submit = submit  # the view's JobPanel.submit, used for the scan
+        self.on_status = on_status  # on_status(text) with the folder or box under the mouse
+        self.active = False
+        self.tree = None
+        self.scan_job = None
+        self.node = 0
+        self.nodes = {}  # canvas item id -> node
+        self.pending = []  # boxes not drawn yet
+        self.draw_job = None
+        self.redraw_job = None
+
+        canvas.bind("<ButtonRelease-1>", self._on_click, add="+")
+        canvas.bind("<Button-3>", self._on_up, add="+")
+        canvas.bind("<Motion>", self._on_motion, add="+")
+        canvas.bind("<Configure>", lambda e: self.render() if self.active else None, add="+")
+
+    def show(self, path):
+        """Show path's treemap, scanning only if it is not inside the last scan"""
+        self.active = True
+        self.canvas.configure(scrollregion=(0, 0, 0, 0))
+        self.canvas.yview_moveto(0)
+        node = self.tree.find(path) if self.tree is not None else None
+        if node is None or (not self.tree.complete and self.scan_job is None):
+            self.start_scan(path)
+            node = 0
+        self.node = node
+        self.render()
+
+    def hide(self):
+        self.active = False
+        self._cancel_drawing()
+        if self.redraw_job is not None:
+            self.canvas.after_cancel(self.redraw_job)
+            self.redraw_job = None
+        self.canvas.delete(TAG)
+        self.nodes = {}
+
+    def stop(self):
+        self.hide()
+        if self.scan_job is not None:
+            self.scan_job.cancel()
+
+    def start_scan(self, path):
+        """Scan path as a job in the job panel.
+
+        It shares the two workers of navi.jobs.shared_jobs with pastes,
+        deletes and the other jobs, so while both are busy the scan waits
+        in the panel as queued and the map stays empty until it starts.
+        """
+        if self.scan_job is not None:
+            self.scan_job.cancel()
+        if self.redraw_job is not None:
+            self.canvas.after_cancel(self.redraw_job)
+        tree = SpaceTree(path)
+        self.tree = tree
+        self.scan_job = self.submit(f"Disk map of {path}",
+                                    lambda progress, control: scan(tree, progress, control),
+                                    lambda job: self._scan_finished(job, tree))
+        self.redraw_job = self.canvas.after(REDRAW_MS, self._redraw_while_scanning)
+
+    def _scan_finished(self, job, tree):
+        if tree is not self.tree:
+            return
+        self.scan_job = None
+        if job.state == "failed":
+            self.on_status(f"Disk map failed: {job.error}")
+        if self.active:
+            self.render()
+
+    def _redraw_while_scanning(self):
+        self.redraw_job = None
+        if self.active and self.scan_job is not None:
+            self.render()
+            self.redraw_job = self.canvas.after(REDRAW_MS, self._redraw_while_scanning)
+
+    def render(self):
+        """Lay out the current node again and start drawing it"""
+        if not self.active or self.tree is None:
+            return
+        self._cancel_drawing()
+        self.canvas.delete(TAG)
+        self.nodes = {}
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        self.pending = layout(self.tree, self.node, 0, 0, width, height)
+        self.pending.reverse()  # popped from the end, parents first
+        self._status(self.node)
+        self._draw_slice()
+
+    def _cancel_drawing(self):
+        if self.draw_job is not None:
+            self.canvas.after_cancel(self.draw_job)
+            self.draw_job = None
+        self.pending = []
+
+    def _draw_slice(self):
+        self.draw_job = None
+        deadline = time.perf_counter() + FRAME_BUDGET
+        tree = self.tree
+        canvas = self.canvas
+        while self.pending and time.perf_counter() < deadline:
+            node, x0, y0, x1, y1, depth = self.pending.pop()
+            kind = tree.kind[node]
+            if kind == DIR:
+                color = DIR_COLORS[(depth - 1) % len(DIR_COLORS)]
+            else:
+                color = FILE_COLOR if kind == FILE else OTHER_COLOR
+            item = canvas.create_rectangle(x0, y0, x1, y1, fill=color, outline=OUTLINE, tags=TAG)
+            self.nodes[item] = node
+            if x1 - x0 > 50 and y1 - y0 > 14:
+                label = f"{tree.names[node]}  {human_size(tree.size[node])}"
+                text = canvas.create_text(x0 + 3, y0 + 2, anchor="nw", text=label, fill=LABEL_COLOR,
+                                          font=LABEL_FONT, width=x1 - x0 - 6, tags=TAG)
+                self.nodes[text] = node
+        if self.pending:
+            self.draw_job = canvas.after(1, self._draw_slice)
+
+    def _node_at(self):
+        items = self.canvas.find_withtag("current")
+        return self.nodes.get(items[0]) if items else None
+
+    def _status(self, node):
+        tree = self.tree
+        text = f"{tree.path_of(node)}  —  {human_size(tree.size[node])}"
+        if not tree.complete:
+            text += "  (scanning...)"
+        self.on_status(text)
+
+    def _on_click(self, event):
+        if not self.active:
+            return
+        node = self._node_at()
+        if node is None:
+            return
+        # Drill into the top-level folder that contains the clicked box
+        while node > 0 and self.tree.parent[node] != self.node:
+            node = self.tree.parent[node]
+        if node > 0 and self.tree.kind[node] == DIR:
+            self.node = node
+            self.render()
+
+    def _on_up(self, event):
+        if self.active and self.node > 0:
+            self.node = self.tree.parent[self.node]
+            self.render()
+
+    def _on_motion(self, event):
+        if not self.active:
+            return
+        node = self._node_at()
+        if node is not None:
+            self._status(node)
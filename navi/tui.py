@@ -0,0 +1,480 @@
+"""Terminal explorer built on curses, replacing cli_explorer.c.
+
+    python -m navi.tui [--role admin|guest] [path]
+
+It uses the GUI's Entry model, sort columns and name filter through
+navi.core. A folder is read in chunks on a worker thread. The first rows
+show as soon as the first chunk arrives, and the rest stream in while
+the keyboard stays live. Once the folder has been read, it is sorted on
+the same thread and the view switches to the sorted order, keeping the
+selected entry. Only the rows in the window are drawn. A row is redrawn
+only when its entry or highlight changed, so moving the cursor rewrites
+two lines even in a folder of a million entries.
+
+Keys: arrows, PgUp/PgDn, Home/End move; Enter or Right opens; Left or
+Backspace goes up; / filters as you type; s cycles the sort key and S
+reverses it; r renames; d deletes; q quits. Zip and tar archives open as
+read-only folders.
+"""
+import argparse
+import curses
+import os
+import platform
+import subprocess
+import threading
+import time
+
+from navi import core
+from navi.archive import inside_archive, is_archive_name
+from navi.dirmodel import entry_from_path
+from navi.du import human_size
+from navi.policy import DELETE, POLICIES, RENAME, Denied
+from navi.search import NameFilter
+from navi.sorting import SORT_KEYS, SortColumns
+
+CHUNK = 2000       # entries per read from the worker thread
+POLL_MS = 50       # key timeout while a folder is still being read or sorted
+SIZE_WIDTH = 9
+DATE_WIDTH = 16
+KEY_ESC = 27
+KEYS_BACK = (curses.KEY_LEFT, curses.KEY_BACKSPACE, 127, 8)
+KEYS_ENTER = (curses.KEY_ENTER, curses.KEY_RIGHT, 10, 13)
+
+
+class Listing:
+    """One folder read and sorted on a worker thread.
+
+    entries grows while the folder is read. sorted is None until the
+    whole folder is read, then the entries in the current sort order.
+    version changes every time either of them does, which is how the
+    screen knows it has something new to show.
+    """
+
+    def __init__(self, path, policy, keys, reverse):
+        self.path = path
+        self.policy = policy
+        self.keys = keys
+        self.reverse = reverse
+        self.entries = []
+        self.sorted = None
+        self.columns = None
+        self.done = False
+        self.sorting = False
+        self.error = None
+        self.version = 0
+        self.lock = threading.Lock()  # one sort at a time
+        self.cancel_event = threading.Event()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def busy(self):
+        return not self.done or self.sorting
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _read(self):
+        try:
+            for chunk in core.iter_dir(self.path, CHUNK, self.policy):
+                if self.cancel_event.is_set():
+                    return
+                self.entries.extend(chunk)
+                self.version += 1
+        except (OSError, Denied) as e:
+            self.error = e
+            self.done = True
+            self.version += 1
+            return
+        self.sorting = True  # before done, so the listing never looks idle in between
+        self.done = True
+        self._sort()
+
+    def sort(self, keys, reverse):
+        """Sort again in the background; ignored until the folder is read"""
+        self.keys = keys
+        self.reverse = reverse
+        if self.done and self.error is None:
+            self.sorting = True
+            threading.Thread(target=self._sort, daemon=True).start()
+
+    def _sort(self):
+        self.sorting = True
+        with self.lock:
+            keys, reverse = self.keys, self.reverse
+            if self.columns is None:
+                self.columns = SortColumns(self.entries)
+            ordered = self.columns.sorted(keys, not reverse if keys[0] == "date" else reverse)
+        if self.cancel_event.is_set():
+            return
+        self.sorting = (keys, reverse) != (self.keys, self.reverse)  # a newer sort is queued
+        self.sorted = ordered
+        self.version += 1
+
+    def removed(self, entry):
+        with self.lock:
+            self.entries.remove(entry)
+            if self.sorted is not None:
+                self.sorted.remove(entry)
+            self.columns = None
+        self.version += 1
+
+    def replaced(self, old, new):
+        """Put new where old was; it moves to its sorted place on the next sort"""
+        with self.lock:
+            self.entries[self.entries.index(old)] = new
+            if self.sorted is not None:
+                self.sorted[self.sorted.index(old)] = new
+            self.columns = None
+        self.version += 1
+
+
+class Browser:
+    """The curses screen: a header line, a window of rows and a status line"""
+
+    def __init__(self, screen, path, policy):
+        self.screen = screen
+        self.policy = policy
+        self.sort_key = "name"
+        self.reverse = False
+        self.name_filter = NameFilter()
+        self.query = ""
+        self.filtering = False
+        self.message = ""
+        self.listing = None
+        self.base = None      # list the filter runs over
+        self.seen = 0         # entries of base already given to the filter
+        self.version = -1
+        self.view = []
+        self.selected = 0
+        self.top = 0
+        self.drawn = {}       # screen row -> what it shows, for incremental redraws
+        self.open_folder(path)
+
+    # Folder and view
+
+    def open_folder(self, path, select_name=None):
+        if self.listing is not None:
+            self.listing.cancel()
+        self.path = os.path.abspath(path)
+        self.listing = Listing(self.path, self.policy, self.keys(), self.reverse)
+        self.base = None
+        self.view = []
+        self.selected = 0
+        self.top = 0
+        self.version = -1
+        self.select_name = select_name  # selected once it has been read, e.g. after going up
+        self.query = ""
+        self.filtering = False
+
+    def keys(self):
+        return (self.sort_key,) if self.sort_key == "name" else (self.sort_key, "name")
+
+    def sync(self):
+        """Take over what the worker added since the last look; True if the view changed"""
+        listing = self.listing
+        if listing.version == self.version:
+            return False
+        self.version = listing.version
+        if listing.error is not None:
+            self.message = f"Cannot read folder: {listing.error}"
+        # The selected entry stays selected when the order changes, unless it is the top one
+        current = self.view[self.selected] if self.view else None
+        base = listing.sorted if listing.sorted is not None else listing.entries
+        if base is self.base:
+            # The same list grew while the folder was being read
+            end = len(base)
+            self.name_filter.add(base[self.seen:end])
+            self.seen = end
+        else:
+            self.base = base
+            self.seen = len(base)
+            self.name_filter.reset(base)
+            self.name_filter.apply(self.query)
+        self.view = self.name_filter.result
+        if self.select_name is not None and listing.sorted is not None:
+            for i, entry in enumerate(self.view):
+                if entry.name == self.select_name:
+                    self.select(i)
+                    self.select_name = None
+                    break
+        elif current is not None and self.selected > 0 and (not self.view or self.view[min(self.selected, len(self.view) - 1)]
+                                      is not current):
+            try:
+                self.select(self.view.index(current))
+            except ValueError:
+                self.select(self.selected)
+        return True
+
+    def refilter(self):
+        current = self.view[self.selected] if self.view else None
+        self.view = self.name_filter.apply(self.query)
+        if current is not None and current in self.view:
+            self.select(self.view.index(current))
+        else:
+            self.select(0)
+
+    def select(self, index):
+        self.selected = max(0, min(index, len(self.view) - 1))
+        rows = self.rows()
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + rows:
+            self.top = self.selected - rows + 1
+
+    def rows(self):
+        return max(1, self.screen.getmaxyx()[0] - 2)
+
+    # Drawing
+
+    def put(self, y, text, attr=0):
+        """Write one full-width line; curses refuses the bottom-right cell, so stop short of it"""
+        width = self.screen.getmaxyx()[1]
+        try:
+            self.screen.addstr(y, 0, text[:width - 1].ljust(width - 1), attr)
+        except curses.error:
+            pass
+
+    def format_row(self, entry, width):
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.mtime)) if entry.mtime else ""
+        size = "" if entry.is_dir else human_size(entry.size)
+        name = entry.name + (os.sep if entry.is_dir else "")
+        name_width = max(1, width - SIZE_WIDTH - DATE_WIDTH - 4)
+        if len(name) > name_width:
+            name = name[:name_width - 1] + "~"
+        return f" {name:<{name_width}} {size:>{SIZE_WIDTH}} {stamp:>{DATE_WIDTH}}"
+
+    def header(self):
+        listing = self.listing
+        count = f"{len(self.view):,}"
+        if self.query:
+            count += f" of {len(self.base or ()):,}"
+        state = "reading..." if not listing.done else "sorting..." if listing.sorting else ""
+        arrow = "v" if self.reverse else "^"
+        return f" {self.path}  [{count}]  {self.sort_key} {arrow}  {state}"
+
+    def footer(self):
+        if self.filtering:
+            return f" /{self.query}"
+        if self.message:
+            return f" {self.message}"
+        hint = "Enter open  <- up  / filter  s sort  S reverse  q quit"
+        if self.policy.allows(RENAME):
+            hint += "  r rename"
+        if self.policy.allows(DELETE):
+            hint += "  d delete"
+        return f" {hint}" + (f"   filter: {self.query}" if self.query else "")
+
+    def draw(self):
+        height, width = self.screen.getmaxyx()
+        lines = {0: (self.header(), curses.A_BOLD), height - 1: (self.footer(), curses.A_DIM)}
+        for row in range(self.rows()):
+            index = self.top + row
+            if index < len(self.view):
+                entry = self.view[index]
+                attr = curses.A_REVERSE if index == self.selected else (curses.A_BOLD if entry.is_dir else 0)
+                lines[row + 1] = (entry, attr)
+            else:
+                lines[row + 1] = ("", 0)
+        for y, (what, attr) in lines.items():
+            key = (what, attr, width)
+            if self.drawn.get(y) == key:
+                continue
+            self.drawn[y] = key
+            self.put(y, what if isinstance(what, str) else self.format_row(what, width), attr)
+        self.screen.refresh()
+
+    def prompt(self, question):
+        """Read a line on the status row; None if cancelled with Esc"""
+        height = self.screen.getmaxyx()[0]
+        self.drawn.pop(height - 1, None)
+        text = ""
+        self.screen.timeout(-1)
+        while True:
+            self.put(height - 1, f" {question}{text}", curses.A_BOLD)
+            self.screen.refresh()
+            key = self.screen.get_wch()
+            if key in ("\n", "\r", curses.KEY_ENTER):
+                return text
+            if key in ("\x1b",):
+                return None
+            if key in ("\x7f", "\b", curses.KEY_BACKSPACE):
+                text = text[:-1]
+            elif isinstance(key, str) and key.isprintable():
+                text += key
+
+    # Actions
+
+    def current(self):
+        return self.view[self.selected] if self.view else None
+
+    def enter(self):
+        entry = self.current()
+        if entry is None:
+            return
+        if entry.is_dir or (is_archive_name(entry.name) and not inside_archive(entry.path)):
+            self.open_folder(entry.path)
+        elif inside_archive(entry.path):
+            self.message = "Files inside archives open from the explorer window"
+        else:
+            open_file(entry.path)
+
+    def up(self):
+        parent = os.path.dirname(self.path)
+        if parent != self.path:
+            self.open_folder(parent, select_name=os.path.basename(self.path))
+
+    def cycle_sort(self, reverse_only=False):
+        if reverse_only:
+            self.reverse = not self.reverse
+        else:
+            self.sort_key = SORT_KEYS[(SORT_KEYS.index(self.sort_key) + 1) % len(SORT_KEYS)]
+            self.reverse = False
+        self.listing.sort(self.keys(), self.reverse)
+
+    def ready_for_change(self):
+        if not self.listing.done or self.listing.sorting:
+            self.message = "Wait until the folder has been read"
+            return False
+        return self.current() is not None
+
+    def rename(self):
+        if not self.ready_for_change():
+            return
+        entry = self.current()
+        self.policy.check(RENAME, entry.path)
+        new_name = self.prompt(f"Rename {entry.name} to: ")
+        if not new_name:
+            return
+        new_path = core.rename(entry.path, new_name, self.policy)
+        new = entry_from_path(new_path)
+        if self.view is not self.base:
+            self.view[self.selected] = new  # the filtered view is a list of its own
+        self.listing.replaced(entry, new)
+        self.message = f"Renamed to {os.path.basename(new_path)}"
+
+    def delete(self):
+        if not self.ready_for_change():
+            return
+        entry = self.current()
+        self.policy.check(DELETE, entry.path)
+        answer = self.prompt(f"Delete {entry.name}{os.sep if entry.is_dir else ''}? [y/N] ")
+        if not answer or answer.lower() not in ("y", "yes"):
+            return
+        core.run_job(core.delete_job([entry.path], self.policy))
+        if self.view is not self.base:
+            del self.view[self.selected]
+        self.listing.removed(entry)
+        self.seen = len(self.base)
+        self.select(self.selected)
+        self.message = f"Deleted {entry.name}"
+
+    def handle_filter_key(self, key):
+        if key in ("\n", "\r", curses.KEY_ENTER):
+            self.filtering = False
+        elif key == "\x1b":
+            self.filtering = False
+            self.query = ""
+            self.refilter()
+        elif key in ("\x7f", "\b", curses.KEY_BACKSPACE):
+            self.query = self.query[:-1]
+            self.refilter()
+        elif isinstance(key, str) and key.isprintable():
+            self.query += key
+            self.refilter()
+
+    def handle_key(self, key):
+        """Act on one key; False to quit"""
+        if self.filtering:
+            self.handle_filter_key(key)
+            return True
+        # Control characters are compared by code, like the KEY_ constants
+        code = ord(key) if isinstance(key, str) and (key < " " or key == "\x7f") else key
+        self.message = ""
+        rows = self.rows()
+        if key == "q":
+            return False
+        if code == curses.KEY_UP or key == "k":
+            self.select(self.selected - 1)
+        elif code == curses.KEY_DOWN or key == "j":
+            self.select(self.selected + 1)
+        elif code == curses.KEY_PPAGE:
+            self.top = max(0, self.top - rows)
+            self.select(self.selected - rows)
+        elif code == curses.KEY_NPAGE:
+            self.top = max(0, min(self.top + rows, len(self.view) - rows))
+            self.select(self.selected + rows)
+        elif code == curses.KEY_HOME:
+            self.select(0)
+        elif code == curses.KEY_END:
+            self.select(len(self.view) - 1)
+        elif code in KEYS_ENTER:
+            self.enter()
+        elif code in KEYS_BACK:
+            self.up()
+        elif key == "/":
+            self.filtering = True
+        elif code == KEY_ESC and self.query:
+            self.query = ""
+            self.refilter()
+        elif key == "s":
+            self.cycle_sort()
+        elif key == "S":
+            self.cycle_sort(reverse_only=True)
+        elif key == "r":
+            self.rename()
+        elif key == "d":
+            self.delete()
+        elif code == curses.KEY_RESIZE:
+            self.screen.erase()
+            self.drawn.clear()
+            self.select(self.selected)
+        return True
+
+    def run(self):
+        while True:
+            self.sync()
+            self.draw()
+            busy = self.listing.busy() or self.listing.version != self.version
+            self.screen.timeout(POLL_MS if busy else -1)
+            try:
+                key = self.screen.get_wch()
+            except curses.error:
+                continue  # timed out; look for new entries
+            try:
+                if not self.handle_key(key):
+                    return
+            except Denied as e:
+                self.message = f"Not allowed: {e.args[0]}"
+            except (OSError, ValueError) as e:
+                self.message = f"Error: {e}"
+
+
+def open_file(path):
+    """Hand a file to the desktop's default application, without waiting"""
+    try:
+        if platform.system() == "Windows":
+            os.startfile(path)
+        elif platform.system() == "Darwin":
+            subprocess.Popen(["open", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            subprocess.Popen(["xdg-open", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass
+
+
+def browse(screen, path, policy):
+    curses.curs_set(0)
+    screen.keypad(True)
+    Browser(screen, path, policy).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m navi.tui", description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default=".")
+    parser.add_argument("--role", choices=sorted(POLICIES), default="guest")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("ESCDELAY", "25")  # Esc should not wait for an escape sequence
+    curses.wrapper(browse, args.path, POLICIES[args.role])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Watches the open folder for changes made by other programs.
+
+On Linux the kernel's inotify API is used through ctypes. Elsewhere, or if
+inotify cannot be set up, the folder's mtime is polled and the folder is
+listed again on a worker thread when it changes.
+
+Events are not forwarded one by one. The names they touch are collected
+for a short while, then each name is stat'ed once on the worker thread and
+the UI gets a single {name: Entry or None} dict, where None means the name
+is gone. A rename shows up as the old name removed and the new one added.
+A burst like unpacking an archive therefore turns into a few UI updates.
+
+If the folder changed between its listing and the start of the watch,
+it is listed again on the worker thread and compared with the entries
+the UI has, which also comes down to one change dict. RESYNC, a full
+reload by the UI, is only sent when the events themselves were lost
+(queue overflow) or the folder itself was deleted or moved.
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from navi.archive import split_path
+from navi.dirmodel import entry_from_path, scan_dir
+
+COALESCE_SECONDS = 0.25
+POLL_SECONDS = 2.0
+POLL_MS = 100
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+SELF_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED | IN_Q_OVERFLOW
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+RESYNC = None  # sent instead of a change dict when the folder must be listed again
+
+
+def load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+LIBC = load_libc()
+
+
+class FolderWatcher:
+    """Sends coalesced changes of one folder at a time to the UI thread"""
+
+    def __init__(self, widget, on_changes):
+        """on_changes(mtime_ns, changes) runs on the Tk thread. changes is a
+        {name: Entry or None} dict, or RESYNC if the folder has to be reread.
+        """
+        self.widget = widget
+        self.on_changes = on_changes
+        self.stop_event = None
+        self.results = None
+        self.poll_job = None
+
+    def watch(self, path, mtime, entries):
+        """Watch path, whose listing entries was read when its mtime was mtime (ns)"""
+        self.stop()
+        if split_path(path) is not None:
+            return  # archives are browsed read-only, from a snapshot of their index
+        self.stop_event = threading.Event()
+        self.results = queue.Queue()
+        target = self._inotify_loop if LIBC is not None else self._poll_loop
+        # A copy, the UI thread keeps changing its own list
+        threading.Thread(target=target, args=(path, mtime, list(entries), self.results, self.stop_event),
+                         daemon=True).start()
+        self.poll_job = self.widget.after(POLL_MS, self._deliver)
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.stop_event = None
+        if self.poll_job is not None:
+            self.widget.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.results = None
+
+    def _deliver(self):
+        self.poll_job = None
+        results = self.results
+        while results is self.results:
+            try:
+                mtime, changes = results.get_nowait()
+            except queue.Empty:
+                self.poll_job = self.widget.after(POLL_MS, self._deliver)
+                return
+            self.on_changes(mtime, changes)
+
+    @staticmethod
+    def _stat_names(path, names):
+        """Folder mtime and the current state of each changed name"""
+        # The mtime is read first, so anything that changes after it bumps
+        # the mtime again and cannot be missed by the directory cache
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, RESYNC
+        changes = {}
+        for name in names:
+            full = os.path.join(path, name)
+            changes[name] = entry_from_path(full) if os.path.lexists(full) else None
+        return mtime, changes
+
+    @staticmethod
+    def _compare(known, entries):
+        """{name: Entry or None} of what differs between known and a new listing"""
+        changes = {}
+        seen = set()
+        for e in entries:
+            seen.add(e.name)
+            if known.get(e.name) != (e.is_dir, e.size, e.mtime):
+                changes[e.name] = e
+        for name in known.keys() - seen:
+            changes[name] = None
+        return changes
+
+    def _inotify_loop(self, path, mtime, listed, results, stop_event):
+        fd = LIBC.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            self._poll_loop(path, mtime, listed, results, stop_event)
+            return
+        try:
+            if LIBC.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+                self._poll_loop(path, mtime, listed, results, stop_event)
+                return
+            current_mtime = os.stat(path).st_mtime_ns
+            if current_mtime != mtime:
+                # Changed between the listing and the watch being set up.
+                # Anything changing from now on also sends an event.
+                known = {e.name: (e.is_dir, e.size, e.mtime) for e in listed}
+                changes = self._compare(known, scan_dir(path))
+                if changes:
+                    results.put((current_mtime, changes))
+            pending = set()
+            deadline = None
+            while not stop_event.is_set():
+                timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if ready:
+                    data = os.read(fd, 65536)
+                    for mask, name in parse_events(data):
+                        if mask & SELF_GONE:
+                            results.put((None, RESYNC))
+                            return
+                        if name:
+                            pending.add(name)
+                    if pending and deadline is None:
+                        deadline = time.monotonic() + COALESCE_SECONDS
+                if deadline is not None and time.monotonic() >= deadline:
+                    results.put(self._stat_names(path, pending))
+                    pending = set()
+                    deadline = None
+        except OSError:
+            results.put((None, RESYNC))
+        finally:
+            os.close(fd)
+
+    def _poll_loop(self, path, mtime, listed, results, stop_event):
+        # The first round compares with the listing the UI has, so a
+        # change made before the watch started is found like any other
+        known = {e.name: (e.is_dir, e.size, e.mtime) for e in listed}
+        first = True
+        while first or not stop_event.wait(POLL_SECONDS):
+            first = False
+            try:
+                current_mtime = os.stat(path).st_mtime_ns
+                if current_mtime == mtime:
+                    continue
+                entries = scan_dir(path)
+            except OSError:
+                results.put((None, RESYNC))
+                return
+            changes = self._compare(known, entries)
+            known = {e.name: (e.is_dir, e.size, e.mtime) for e in entries}
+            mtime = current_mtime
+            if changes:
+                results.put((mtime, changes))
+
+
+def parse_events(data):
+    """Yield (mask, name) for each inotify_event in a read buffer"""
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b"\0")
+        offset += length
+        yield mask, os.fsdecode(name)